@@ -1,6 +1,7 @@
 from typing import Optional, Tuple, Callable
 from models.ssh_connection import SSHConnection
 from models.config_manager import ConfigManager, SSHConfig
+from models.transfer_engine import TransferSettings
 class ConnectionController:
     def __init__(self):
         self.ssh_connection = SSHConnection()
@@ -11,8 +12,10 @@ class ConnectionController:
                 password: Optional[str] = None,
                 identity_file: Optional[str] = None,
                 protocol: str = "SFTP",
-                passphrase: Optional[str] = None) -> Tuple[bool, str]:
+                passphrase: Optional[str] = None,
+                transfer_settings: Optional[TransferSettings] = None) -> Tuple[bool, str]:
 
+        self.ssh_connection.transfer_settings = transfer_settings or TransferSettings()
         success, message = self.ssh_connection.connect(
             host=host,
             port=port,
@@ -41,7 +44,8 @@ class ConnectionController:
     def save_connection_config(self, name: str, host: str, port: int,
                                username: str, password: Optional[str] = None,
                                identity_file: Optional[str] = None,
-                               protocol: str = "SFTP"):
+                               protocol: str = "SFTP",
+                               transfer_settings: Optional[TransferSettings] = None):
         config = SSHConfig(
             name=name,
             host=host,
@@ -49,7 +53,8 @@ class ConnectionController:
             username=username,
             password=password,
             identity_file=identity_file,
-            protocol=protocol
+            protocol=protocol,
+            transfer_settings=transfer_settings
         )
         self.config_manager.save_connection(config)
 
@@ -73,5 +78,6 @@ class ConnectionController:
             username=config.username,
             password=config.password,
             identity_file=config.identity_file,
-            protocol=config.protocol
+            protocol=config.protocol,
+            transfer_settings=config.transfer_settings
         )
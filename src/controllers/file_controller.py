@@ -1,6 +1,24 @@
-from typing import List, Optional, Tuple, Callable
+import os
+import posixpath
+import threading
+from typing import List, Optional, Set, Tuple, Callable
+from collections import OrderedDict
+from models.dir_cache import RemoteDirCache
+from models.dir_prefetcher import DirPrefetcher
+from models.listing_view import ListingView
+from models.remote_watcher import RemoteWatcher
 from models.file_operations import FileOperations, FileInfo
-from models.ssh_connection import SSHConnection
+from models.ssh_connection import SSHConnection, _clean_remote_path
+from models.transfer_queue import TransferQueue, TransferJob
+from models.resume_journal import ResumeJournal
+from models.delta_sync import DELTA_MIN_SIZE
+
+# จำโฟลเดอร์ที่เพิ่งเปิดไว้กี่ที่ (ใช้เดาโฟลเดอร์ถัดไป)
+VISITED_LIMIT = 64
+# delta ที่มีชื่อเปลี่ยนมากกว่านี้ (เช่น แตก tar ลงโฟลเดอร์ที่เฝ้าอยู่) list ใหม่ครั้งเดียวถูกกว่า lstat ทีละชื่อ
+WATCH_DELTA_STAT_LIMIT = 32
+
+
 class FileController:
     def __init__(self, ssh_connection: SSHConnection):
         self.ssh_connection = ssh_connection
@@ -12,98 +30,399 @@ class FileController:
         self.sort_key = "name"
         self.sort_reverse = False
         self.filter_pattern = ""
+        self.current_files: List[FileInfo] = []
+        self.listing = ListingView()
+        self.transfer_queue: Optional[TransferQueue] = None
+        self.resume_journal = ResumeJournal()
+        self.dir_cache = RemoteDirCache()
+        # ตรวจ listing ที่หมด TTL ใหม่เบื้องหลังด้วย SFTP session ของตัวเอง
+        self._background_ops: Optional[FileOperations] = None
+        self._background_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._revalidating = set()
+        self._updated_paths = set()
+        # การนำทางล่าสุด และสถานะล่าสุดที่โหลดสำเร็จ (ไว้ย้อนกลับเมื่อเปิดโฟลเดอร์ไม่ได้)
+        self._nav_seq = 0
+        self._committed_nav = ("/", ["/"], 0)
+        # การนำทางที่ listing (self.listing) เป็นของมัน ต่างจาก _nav_seq = โฟลเดอร์ใหม่ยังโหลดไม่เสร็จ
+        self._listing_seq = 0
+        # โฟลเดอร์ที่เพิ่งเปิด (ใหม่สุดอยู่ท้าย) ใช้เดาว่าจะกลับไปที่ไหนอีก
+        self._visited: "OrderedDict[str, None]" = OrderedDict()
+        self.prefetcher: Optional[DirPrefetcher] = None
+        # ติดตามโฟลเดอร์ปัจจุบันแบบสด (ผู้ใช้เปิดเอง) แจ้ง UI ผ่าน on_listing_update(path)
+        self.watch_enabled = False
+        self.watcher: Optional[RemoteWatcher] = None
+        self.on_listing_update: Optional[Callable[[str], None]] = None
 
     def initialize(self):
         if self.ssh_connection.is_connected():
             sftp = self.ssh_connection.get_sftp()
             self.file_ops.set_sftp(sftp)
-            self.current_path = self.ssh_connection.get_current_path()
-            self.history = [self.current_path]
-            self.history_index = 0
+            self.file_ops.set_transfer_settings(self.ssh_connection.transfer_settings)
+            self.file_ops.limiter = self.ssh_connection.bandwidth
+            with self._state_lock:
+                self._begin_navigation(self.ssh_connection.get_current_path())
+                self.history = [self.current_path]
+                self.history_index = 0
+                self._committed_nav = (self.current_path, list(self.history), 0)
+
+            self.shutdown()
+            self.dir_cache.clear()
+            self.transfer_queue = TransferQueue(
+                self.ssh_connection.get_transport(),
+                settings=self.ssh_connection.transfer_settings,
+                journal=self.resume_journal,
+                connection_key=self.ssh_connection.get_connection_key(),
+                limiter=self.ssh_connection.bandwidth
+            )
+            self.transfer_queue.on_job_update = self._on_job_update
+            self._visited.clear()
+            self.prefetcher = DirPrefetcher(self.dir_cache, self._background_fetch, self._link_busy)
+            self.watcher = RemoteWatcher(self.ssh_connection.get_transport(), self._on_watch_delta,
+                                         self._on_watch_poll, self._link_busy)
+            if self.watch_enabled:
+                self.watcher.watch(self.current_path)
+
+    def shutdown(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        if self.transfer_queue:
+            self.transfer_queue.stop()
+            self.transfer_queue = None
+        with self._background_lock:
+            if self._background_ops is not None:
+                try:
+                    self._background_ops.sftp.close()
+                except Exception:
+                    pass
+                self._background_ops = None
 
     def list_current_directory(self) -> List[FileInfo]:
-        files = self.file_ops.list_directory(self.current_path)
-        files = self._apply_filter(files)
-        files = self._apply_sort(files)
+        path = self.current_path
+        files, fresh = self.dir_cache.get(path)
+        if files is None:
+            files = self._fetch_listing(path)
+        elif not fresh:
+            # แสดงของที่ cache ไว้ไปก่อน แล้วค่อยตรวจกับ Pi เบื้องหลัง
+            self._revalidate_async(path)
+        self.current_files = files
+        return self._present(files)
+
+    def invalidate_current_directory(self):
+        self.dir_cache.invalidate(self.current_path)
+
+    def is_revalidating(self) -> bool:
+        with self._state_lock:
+            return bool(self._revalidating)
+
+    def take_listing_update(self) -> bool:
+        """โฟลเดอร์ปัจจุบันถูกตรวจใหม่แล้วพบว่าเปลี่ยนไปหรือไม่ (อ่านแล้วล้างสถานะ)"""
+        with self._state_lock:
+            changed = self.current_path in self._updated_paths
+            self._updated_paths.clear()
+            return changed
+
+    def _fetch_listing(self, path: str, raise_errors: bool = False) -> List[FileInfo]:
+        if not self.file_ops.sftp:
+            return []
+        generation = self.dir_cache.generation(path)
+        try:
+            files = self.file_ops.fetch_directory(path)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error listing directory: {e}")
+            return []
+        self.dir_cache.put(path, files, generation)
+        return files
+
+    def _stream_listing(self, path: str, seq: int,
+                        on_batch: Callable[[List[FileInfo]], None]) -> Optional[List[FileInfo]]:
+        if not self.file_ops.sftp:
+            return []
+        generation = self.dir_cache.generation(path)
+        files: List[FileInfo] = []
+        batches = self.file_ops.iter_directory(path)
+        try:
+            for batch in batches:
+                if seq != self._nav_seq:
+                    # มีการนำทางใหม่แล้ว เลิกอ่านต่อ (generator ปิด handle ให้)
+                    return None
+                files.extend(batch)
+                on_batch(batch)
+        finally:
+            batches.close()
+        self.dir_cache.put(path, files, generation)
         return files
 
-    def change_directory(self, path: str):
+    def _revalidate_async(self, path: str):
+        with self._state_lock:
+            if path in self._revalidating:
+                return
+            self._revalidating.add(path)
+        threading.Thread(target=self._revalidate, args=(path,), daemon=True).start()
+
+    def _revalidate(self, path: str):
         try:
-            self.ssh_connection.change_directory(path)
-            self.current_path = self.ssh_connection.get_current_path()
+            generation = self.dir_cache.generation(path)
+            files = self._background_fetch(path)
+            if self.dir_cache.put(path, files, generation):
+                with self._state_lock:
+                    self._updated_paths.add(path)
+        except Exception as e:
+            print(f"Error revalidating directory: {e}")
+        finally:
+            with self._state_lock:
+                self._revalidating.discard(path)
+
+    def _background_fetch(self, path: str) -> List[FileInfo]:
+        # งานเบื้องหลัง (ตรวจ cache ใหม่/ดึงล่วงหน้า) ใช้ SFTP session ของตัวเองร่วมกันทีละงาน
+        with self._background_lock:
+            return self._background_file_ops().fetch_directory(path)
+
+    def _background_file_ops(self) -> FileOperations:
+        # ต้องถือ _background_lock อยู่
+        if self._background_ops is None:
+            # SFTPClient ของ paramiko ใช้พร้อมกันหลาย thread ไม่ได้ (response ของอีก thread อาจถูกอ่านทิ้ง)
+            self._background_ops = FileOperations(self.ssh_connection.open_sftp_session())
+        return self._background_ops
+
+    def _link_busy(self) -> bool:
+        """มีงานที่ผู้ใช้รออยู่หรือกำลังส่งไฟล์ → งานเดาล่วงหน้าต้องหลีกทาง"""
+        if self.ssh_connection.io.is_busy() or self.ssh_connection.bandwidth.is_interactive_busy():
+            return True
+        return self.transfer_queue is not None and not self.transfer_queue.is_idle()
+
+    # ---------- Watch ----------
+    def set_watch(self, enabled: bool):
+        self.watch_enabled = enabled
+        if not self.watcher:
+            return
+        if enabled:
+            self.watcher.watch(self.current_path)
+        else:
+            self.watcher.stop()
+
+    def _on_watch_delta(self, path: str, changed: Set[str], removed: Set[str]):
+        # (thread ของ watcher) stat เฉพาะชื่อที่มี event แล้วแก้ listing ใน cache
+        if len(changed) > WATCH_DELTA_STAT_LIMIT:
+            try:
+                self._on_watch_poll(path)
+            except Exception as e:
+                print(f"Error refreshing watched directory: {e}")
+            return
+        upserts = []
+        with self._background_lock:
+            sftp = self._background_file_ops().sftp
+            for name in changed:
+                try:
+                    upserts.append(FileInfo.from_attr(sftp.lstat(posixpath.join(path, name)), path, name))
+                except IOError:
+                    # ถูกลบ/ย้ายไปแล้วก่อนได้ stat
+                    removed = removed | {name}
+        if self.dir_cache.apply_delta(path, upserts, removed):
+            self._notify_listing_update(path)
+
+    def _on_watch_poll(self, path: str) -> bool:
+        generation = self.dir_cache.generation(path)
+        files = self._background_fetch(path)
+        if self.dir_cache.put(path, files, generation):
+            self._notify_listing_update(path)
+            return True
+        return False
 
+    def _notify_listing_update(self, path: str):
+        if self.on_listing_update:
+            self.on_listing_update(path)
+
+    # ---------- Prefetch ----------
+    def prefetch_directory(self, path: str):
+        """โฟลเดอร์ที่ถูกเลือก/ชี้อยู่ น่าจะถูกเปิดเป็นลำดับถัดไป"""
+        if self.prefetcher:
+            self.prefetcher.hint([path])
+
+    def _prefetch_neighbours(self, path: str):
+        if not self.prefetcher:
+            return
+        self._visited.pop(path, None)
+        self._visited[path] = None
+        while len(self._visited) > VISITED_LIMIT:
+            self._visited.popitem(last=False)
+
+        parent = posixpath.dirname(path.rstrip("/")) or "/"
+        recent = [p for p in reversed(self._visited) if p != path]
+        with self._state_lock:
+            index = self.history_index
+            history = [self.history[i] for i in (index - 1, index + 1) if 0 <= i < len(self.history)]
+        # ลูกที่เคยเข้า, ย้อน/ไปหน้าในประวัติ, โฟลเดอร์แม่, พี่น้องที่เคยเข้า
+        children = [p for p in recent if posixpath.dirname(p) == path]
+        siblings = [p for p in recent if posixpath.dirname(p) == parent]
+        self.prefetcher.hint(children + history + [parent] + siblings, replace=True)
+
+    def _on_job_update(self, job: TransferJob):
+        # เรียกจาก worker thread ของคิว; cache มี lock ของตัวเอง
+        if job.direction == TransferJob.UPLOAD and job.state == TransferJob.DONE:
+            self.dir_cache.invalidate_parent(job.remote_path)
+            if job.is_dir:
+                self.dir_cache.remove_tree(job.remote_path)
+
+    # ---------- Navigation ----------
+    # การนำทางเปลี่ยนสถานะฝั่ง client ทันที (ไม่มี round trip) และได้เลขลำดับกลับไป
+    # I/O thread โหลดเฉพาะเป้าหมายล่าสุด คลิกซ้อนกันเร็ว ๆ จึงเสีย listing ครั้งเดียว
+    def change_directory(self, path: str) -> int:
+        path = _clean_remote_path(path)
+        with self._state_lock:
             if self.history_index < len(self.history) - 1:
                 self.history = self.history[:self.history_index + 1]
 
-            self.history.append(self.current_path)
+            self.history.append(path)
             self.history_index = len(self.history) - 1
+            seq = self._begin_navigation(path)
+        self._notify_directory_change(path)
+        return seq
 
-            if self.on_directory_change:
-                self.on_directory_change(self.current_path)
-        except Exception as e:
-            print(f"Error changing directory: {e}")
-
-    def go_back(self) -> bool:
-        if self.history_index > 0:
-            self.history_index -= 1
-            path = self.history[self.history_index]
-            self.ssh_connection.change_directory(path)
-            self.current_path = path
+    def go_back(self) -> Optional[int]:
+        return self._step_history(-1)
 
-            if self.on_directory_change:
-                self.on_directory_change(self.current_path)
-            return True
-        return False
+    def go_forward(self) -> Optional[int]:
+        return self._step_history(1)
 
-    def go_forward(self) -> bool:
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            path = self.history[self.history_index]
-            self.ssh_connection.change_directory(path)
+    def go_to_parent(self) -> int:
+        parent = "/".join(self.current_path.rstrip("/").split("/")[:-1]) or "/"
+        return self.change_directory(parent)
+
+    def is_latest_navigation(self, seq: int) -> bool:
+        return seq == self._nav_seq
+
+    def is_navigation_pending(self) -> bool:
+        """listing ที่ถืออยู่ยังเป็นของโฟลเดอร์ก่อนหน้า (โฟลเดอร์ใหม่ยังโหลดไม่เสร็จ)"""
+        return self._listing_seq != self._nav_seq
+
+    def load_directory(self, seq: int,
+                       on_batch: Optional[Callable[[List[FileInfo]], None]] = None) -> Optional[List[FileInfo]]:
+        """
+        (I/O thread) โหลด listing ของการนำทางครั้งที่ seq
+        คืน None ถ้ามีการนำทางที่ใหม่กว่าแล้ว: ไม่ต้องยิงคำขอ และผลที่ได้มาทีหลังก็ไม่ต้องแสดง
+        เปิดโฟลเดอร์ไม่ได้: ย้อนกลับไปโฟลเดอร์ล่าสุดที่โหลดสำเร็จแล้วโยน exception ต่อให้ผู้เรียกแจ้งผู้ใช้
+        ถ้าให้ on_batch มา โฟลเดอร์ที่ไม่อยู่ใน cache จะถูกส่งให้ทีละชุดระหว่างอ่าน (ยังไม่กรอง ยังไม่เรียง)
+        """
+        with self._state_lock:
+            if seq != self._nav_seq:
+                return None
+            path = self.current_path
+
+        files, fresh = self.dir_cache.get(path)
+        if files is None:
+            # listdir ยืนยันในตัวว่าโฟลเดอร์มีอยู่จริง ไม่ต้อง chdir/getcwd ก่อน
+            try:
+                if on_batch is not None:
+                    files = self._stream_listing(path, seq, on_batch)
+                    if files is None:
+                        return None
+                else:
+                    files = self._fetch_listing(path, raise_errors=True)
+            except Exception as e:
+                print(f"Error changing directory: {e}")
+                # การนำทางที่ใหม่กว่าเป็นเจ้าของหน้าจอแล้ว ไม่ต้องแจ้ง
+                if not self._rollback_navigation(seq):
+                    return None
+                raise
+        elif not fresh:
+            self._revalidate_async(path)
+
+        with self._state_lock:
+            if seq != self._nav_seq:
+                # ผลยังอยู่ใน cache ให้ครั้งต่อไปใช้ แต่ไม่ต้องแสดง
+                return None
+            self._committed_nav = (path, list(self.history), self.history_index)
+        # นำทางฝั่ง client ไม่ chdir บน server แล้ว จึงต้องบอก connection เองว่าตอนนี้อยู่โฟลเดอร์ไหน
+        self.ssh_connection.set_current_path(path)
+        self.current_files = files
+        self._prefetch_neighbours(path)
+        if self.watch_enabled and self.watcher:
+            self.watcher.watch(path)
+        rows = self._present(files)
+        self._listing_seq = seq
+        return rows
+
+    def _begin_navigation(self, path: str) -> int:
+        # ต้องถือ _state_lock อยู่
+        self._nav_seq += 1
+        self.current_path = path
+        return self._nav_seq
+
+    def _step_history(self, step: int) -> Optional[int]:
+        with self._state_lock:
+            index = self.history_index + step
+            if not 0 <= index < len(self.history):
+                return None
+            self.history_index = index
+            path = self.history[index]
+            seq = self._begin_navigation(path)
+        self._notify_directory_change(path)
+        return seq
+
+    def _rollback_navigation(self, seq: int) -> bool:
+        """เป้าหมายล่าสุดเปิดไม่ได้ → กลับไปโฟลเดอร์สุดท้ายที่โหลดสำเร็จ"""
+        with self._state_lock:
+            if seq != self._nav_seq:
+                return False
+            path, history, index = self._committed_nav
             self.current_path = path
+            self.history = list(history)
+            self.history_index = index
+            # listing ที่ถืออยู่เป็นของโฟลเดอร์ที่ย้อนกลับมาพอดี
+            self._listing_seq = seq
+        self._notify_directory_change(path)
+        return True
 
-            if self.on_directory_change:
-                self.on_directory_change(self.current_path)
-            return True
-        return False
-
-    def go_to_parent(self):
-        parent = "/".join(self.current_path.rstrip("/").split("/")[:-1]) or "/"
-        self.change_directory(parent)
+    def _notify_directory_change(self, path: str):
+        if self.on_directory_change:
+            self.on_directory_change(path)
 
     def create_file(self, filename: str, content: str = "") -> Tuple[bool, str]:
         path = f"{self.current_path}/{filename}"
-        return self.file_ops.create_file(path, content)
+        return self._invalidate_on_success(self.file_ops.create_file(path, content), path)
 
     def read_file(self, path: str) -> Tuple[bool, str]:
         return self.file_ops.read_file(path)
 
+    def open_reader(self, path: str) -> Tuple[bool, object]:
+        # (I/O thread) viewer อ่านทุกช่วงผ่าน io เหมือนงานอื่น จึงใช้ session หลักได้เลย
+        return self.file_ops.open_reader(path)
+
     def write_file(self, path: str, content: str) -> Tuple[bool, str]:
-        return self.file_ops.write_file(path, content)
+        return self._invalidate_on_success(self.file_ops.write_file(path, content), path)
 
     def delete_file(self, path: str) -> Tuple[bool, str]:
-        return self.file_ops.delete_file(path)
+        return self._invalidate_on_success(self.file_ops.delete_file(path), path)
 
     def create_directory(self, dirname: str) -> Tuple[bool, str]:
         path = f"{self.current_path}/{dirname}"
-        return self.file_ops.create_directory(path)
+        return self._invalidate_on_success(self.file_ops.create_directory(path), path)
 
     def delete_directory(self, path: str) -> Tuple[bool, str]:
-        return self.file_ops.delete_directory(path)
+        return self._invalidate_on_success(self.file_ops.delete_directory(path), path, removed=True)
 
     def rename(self, old_name: str, new_name: str) -> Tuple[bool, str]:
         old_path = f"{self.current_path}/{old_name}"
         new_path = f"{self.current_path}/{new_name}"
-        return self.file_ops.rename(old_path, new_path)
+        result = self._invalidate_on_success(self.file_ops.rename(old_path, new_path), old_path, removed=True)
+        return self._invalidate_on_success(result, new_path)
 
     def move(self, source: str, destination: str) -> Tuple[bool, str]:
-        return self.file_ops.move(source, destination)
+        result = self._invalidate_on_success(self.file_ops.move(source, destination), source, removed=True)
+        return self._invalidate_on_success(result, destination)
 
     def copy(self, source: str, destination: str) -> Tuple[bool, str]:
-        return self.file_ops.copy_file(source, destination)
+        return self._invalidate_on_success(self.file_ops.copy_file(source, destination), destination)
 
     def change_permissions(self, path: str, mode: int) -> Tuple[bool, str]:
-        return self.file_ops.change_permissions(path, mode)
+        return self._invalidate_on_success(self.file_ops.change_permissions(path, mode), path)
 
     def get_file_info(self, path: str) -> Optional[FileInfo]:
         return self.file_ops.get_file_stat(path)
@@ -113,41 +432,106 @@ class FileController:
 
     def upload_file(self, local_path: str, filename: str) -> Tuple[bool, str]:
         remote_path = f"{self.current_path}/{filename}"
-        return self.file_ops.upload_file(local_path, remote_path)
+        result = self._journaled(TransferJob.UPLOAD, local_path, remote_path,
+                                 lambda resume: self.file_ops.upload_file(local_path, remote_path, resume=resume))
+        return self._invalidate_on_success(result, remote_path)
 
     def download_file(self, remote_path: str, local_path: str) -> Tuple[bool, str]:
-        return self.file_ops.download_file(remote_path, local_path)
+        return self._journaled(TransferJob.DOWNLOAD, local_path, remote_path,
+                               lambda resume: self.file_ops.download_file(remote_path, local_path, resume=resume))
+
+    def _journaled(self, direction: str, local_path: str, remote_path: str,
+                   transfer: Callable[[bool], Tuple[bool, str]]) -> Tuple[bool, str]:
+        # ส่งตรงไม่ผ่านคิวก็ต้องลง journal (และเขียนลงดิสก์) ก่อนแตะปลายทาง
+        # แอปตายกลางทางแล้วส่งซ้ำ จะต่อจากไฟล์ที่ค้างแทนการเขียนทับจากศูนย์
+        key = self.ssh_connection.get_connection_key()
+        remote_path = _clean_remote_path(remote_path)
+        resume = self.resume_journal.add(key, direction, local_path, remote_path)
+        self.resume_journal.save()
+        result = transfer(resume)
+        if result[0]:
+            self.resume_journal.remove(key, direction, local_path, remote_path)
+            self.resume_journal.save_if_due()
+        return result
+
+    def queue_upload(self, local_path: str, filename: str, delta: Optional[bool] = None) -> Optional[TransferJob]:
+        if not self.transfer_queue:
+            return None
+        remote_path = f"{self.current_path}/{filename}"
+        if delta is None and not os.path.isdir(local_path):
+            # มีไฟล์ชื่อเดียวกันอยู่แล้วและไฟล์ใหญ่พอ → ส่งเฉพาะส่วนที่เปลี่ยน
+            delta = os.path.getsize(local_path) >= DELTA_MIN_SIZE and any(
+                f.name == filename and not f.is_dir for f in self.current_files
+            )
+        return self.transfer_queue.submit_upload(local_path, remote_path, delta=bool(delta))
+
+    def queue_download(self, remote_path: str, local_path: str, is_dir: bool = False,
+                       size: int = 0) -> Optional[TransferJob]:
+        if not self.transfer_queue:
+            return None
+        return self.transfer_queue.submit_download(remote_path, local_path, is_dir=is_dir, size=size)
+
+    def resume_pending_transfers(self) -> List[TransferJob]:
+        if not self.transfer_queue:
+            return []
+        return self.transfer_queue.restore_pending()
+
+    def cancel_transfers(self):
+        if self.transfer_queue:
+            self.transfer_queue.cancel_all()
+
+    def get_last_transfer_rate(self) -> str:
+        stats = self.file_ops.last_transfer
+        return stats.get_rate_str() if stats else ""
 
     def get_disk_usage(self):
         return self.file_ops.get_disk_usage(self.current_path)
 
     def move_to_recycle(self, path: str) -> Tuple[bool, str]:
-        return self.file_ops.move_to_recycle(path)
+        result = self.file_ops.move_to_recycle(path)
+        if result[0]:
+            # ถังขยะอยู่ที่ไหนขึ้นกับ FileOperations ล้างทั้ง cache ง่ายและถูกต้องกว่า
+            self.dir_cache.clear()
+        return result
 
     def restore_from_recycle(self, filename: str, original_path: str) -> Tuple[bool, str]:
-        return self.file_ops.restore_from_recycle(filename, original_path)
+        result = self.file_ops.restore_from_recycle(filename, original_path)
+        if result[0]:
+            self.dir_cache.clear()
+        return result
 
     def change_owner(self, path: str, uid: int, gid: int) -> Tuple[bool, str]:
-        return self.file_ops.change_owner(path, uid, gid)
-
+        return self._invalidate_on_success(self.file_ops.change_owner(path, uid, gid), path)
+
+    def _invalidate_on_success(self, result: Tuple[bool, str], path: str,
+                               removed: bool = False) -> Tuple[bool, str]:
+        """งานแก้ไขสำเร็จ → ล้างเฉพาะ listing ของโฟลเดอร์แม่ (และ subtree ถ้า path ถูกลบ/ย้ายไป)"""
+        if result[0]:
+            path = posixpath.normpath(path)
+            self.dir_cache.invalidate_parent(path)
+            if removed:
+                self.dir_cache.remove_tree(path)
+        return result
+
+    # ---------- Sort / Filter (ในหน่วยความจำ ไม่แตะเครือข่าย) ----------
     def set_sort(self, sort_key: str, reverse: bool = False):
         self.sort_key = sort_key
         self.sort_reverse = reverse
+        self.listing.set_sort(sort_key, reverse)
 
     def set_filter(self, pattern: str):
         self.filter_pattern = pattern
+        self.listing.set_filter(pattern)
 
-    def _apply_sort(self, files: List[FileInfo]) -> List[FileInfo]:
-        if self.sort_key == "name":
-            return sorted(files, key=lambda x: (not x.is_dir, x.name.lower()), reverse=self.sort_reverse)
-        elif self.sort_key == "size":
-            return sorted(files, key=lambda x: (not x.is_dir, x.size), reverse=self.sort_reverse)
-        elif self.sort_key == "modified":
-            return sorted(files, key=lambda x: (not x.is_dir, x.modified_time), reverse=self.sort_reverse)
-        return files
+    def current_rows(self) -> List[FileInfo]:
+        """listing ที่โหลดไว้แล้ว เรียง/กรองตามค่าปัจจุบัน (เรียกจาก UI thread ได้ทันที)"""
+        return self.listing.rows()
+
+    def filter_rows(self, files: List[FileInfo]) -> List[FileInfo]:
+        """กรองแถวที่ยังไม่อยู่ใน listing (เช่นชุดที่กำลังสตรีม) ด้วยตัวกรองปัจจุบัน"""
+        return [f for f in files if self.listing.matches(f)]
 
-    def _apply_filter(self, files: List[FileInfo]) -> List[FileInfo]:
-        if not self.filter_pattern:
-            return files
-        pattern = self.filter_pattern.lower()
-        return [f for f in files if pattern in f.name.lower()]
+    def _present(self, files: List[FileInfo]) -> List[FileInfo]:
+        if files is not self.listing.entries:
+            self.listing.set_entries(files)
+        return self.listing.rows()
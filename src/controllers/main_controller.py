@@ -10,6 +10,8 @@ class MainController:
     def _on_connection_changed(self, connected: bool):
         if connected:
             self.file_controller.initialize()
+        else:
+            self.file_controller.shutdown()
 
     def get_connection_controller(self) -> ConnectionController:
         return self.connection_controller
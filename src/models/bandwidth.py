@@ -0,0 +1,104 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+# ลำดับความสำคัญของงาน (เลขน้อยได้ก่อน)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+# ไฟล์ใหญ่กว่านี้ถือเป็นงาน bulk (เช่น backup) โดยอัตโนมัติ
+BULK_SIZE = 64 * 1024 * 1024
+# งาน bulk หยุดรอ interactive ได้ไม่เกินเท่านี้ต่อก้อน
+MAX_PREEMPT_WAIT = 2.0
+# ช่วง interactive ที่ยาวกว่านี้ (วินาที) เลิกแย่งลิงก์ ให้งานส่งไฟล์วิ่งตามปกติ กันส่งไฟล์ช้าลงเหลือก้อนละ 2 วินาที
+MAX_PREEMPT_SPAN = 5.0
+# burst ของ bucket = ค่าเท่ากับกี่วินาทีของ rate
+BURST_SECONDS = 0.25
+
+
+def classify_priority(size: int) -> int:
+    return PRIORITY_BULK if size >= BULK_SIZE else PRIORITY_NORMAL
+
+
+class TokenBucket:
+    """
+    token bucket แบบยอมติดหนี้: consume หักได้เสมอแล้วค่อย sleep จนหนี้หมด
+    ใช้ร่วมกันหลาย thread ได้ โดยไม่ sleep ขณะถือ lock
+    rate <= 0 คือไม่จำกัด
+    """
+
+    def __init__(self, rate: float = 0):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate = max(0.0, float(rate or 0))
+            self.capacity = self.rate * BURST_SECONDS
+            self.tokens = self.capacity
+            self.last = time.monotonic()
+
+    def consume(self, n: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BandwidthLimiter:
+    """
+    จำกัดแบนด์วิดท์ต่อ connection (bucket เดียวร่วมทุกงาน) และต่องาน (bucket ของใครของมัน)
+    งาน interactive (terminal, list โฟลเดอร์, เปิดไฟล์) ที่กำลังทำอยู่จะทำให้งานส่งไฟล์ทั่วไปหยุดรอก่อน
+    """
+
+    def __init__(self, rate: float = 0, job_rate: float = 0):
+        self.bucket = TokenBucket(rate)
+        self.job_rate = job_rate
+        self._interactive = 0
+        self._interactive_since = 0.0
+        self._cond = threading.Condition()
+
+    def configure(self, rate: float = 0, job_rate: float = 0):
+        self.bucket.set_rate(rate)
+        self.job_rate = job_rate
+
+    def job_bucket(self) -> Optional[TokenBucket]:
+        return TokenBucket(self.job_rate) if self.job_rate > 0 else None
+
+    @contextmanager
+    def interactive(self):
+        with self._cond:
+            if self._interactive == 0:
+                self._interactive_since = time.monotonic()
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._interactive -= 1
+                self._cond.notify_all()
+
+    def is_interactive_busy(self) -> bool:
+        return self._interactive > 0
+
+    def throttle(self, n: int, job_bucket: Optional[TokenBucket] = None,
+                 priority: int = PRIORITY_NORMAL):
+        if priority > PRIORITY_INTERACTIVE and self._interactive:
+            with self._cond:
+                remaining = self._interactive_since + MAX_PREEMPT_SPAN - time.monotonic()
+                if self._interactive and remaining > 0:
+                    self._cond.wait_for(lambda: self._interactive == 0,
+                                        timeout=min(MAX_PREEMPT_WAIT, remaining))
+        if job_bucket is not None:
+            job_bucket.consume(n)
+        self.bucket.consume(n)
@@ -0,0 +1,95 @@
+import re
+import shlex
+from typing import Dict, List, Optional
+
+import paramiko
+
+from models.ssh_connection import open_exec_channel
+
+
+# สำรองสำหรับเครื่องที่ไม่มี sha256sum (coreutils) แต่มี python3
+REMOTE_SHA256_FALLBACK = (
+    "import hashlib,sys\n"
+    "h=hashlib.sha256()\n"
+    "f=open(sys.argv[1],'rb')\n"
+    "for b in iter(lambda:f.read(1<<20),b''): h.update(b)\n"
+    "print(h.hexdigest())"
+)
+
+# escape ในชื่อไฟล์ที่ sha256sum พิมพ์ออกมา (coreutils รุ่นใหม่ escape \r ด้วย)
+_SHA256SUM_ESCAPE = re.compile(r'\\(.)')
+_SHA256SUM_UNESCAPE = {'\\': '\\', 'n': '\n', 'r': '\r'}
+
+
+class ChecksumMismatch(IOError):
+    pass
+
+
+class RemoteChecksum:
+    """
+    สั่ง Pi คำนวณ sha256 ของไฟล์ด้วย exec เดียว
+    เริ่มทันทีที่สร้าง จึงรันขนานไปกับการดาวน์โหลดได้ แล้วค่อยอ่านผลด้วย result()
+    """
+
+    def __init__(self, transport: paramiko.Transport, remote_path: str):
+        path = shlex.quote(remote_path)
+        command = (f"sha256sum {path} 2>/dev/null"
+                   f" || python3 -c {shlex.quote(REMOTE_SHA256_FALLBACK)} {path}")
+        self.channel = open_exec_channel(transport, command)
+        self.channel.shutdown_write()
+
+    def result(self) -> Optional[str]:
+        """คืน hex digest หรือ None ถ้าคำนวณบน Pi ไม่ได้"""
+        output = self.channel.makefile('rb').read().decode(errors='replace').split()
+        exit_code = self.channel.recv_exit_status()
+        if exit_code != 0 or not output or len(output[0]) != 64:
+            return None
+        return output[0].lower()
+
+    def close(self):
+        self.channel.close()
+
+
+def remote_sha256_many(transport: paramiko.Transport, remote_paths: List[str]) -> Dict[str, str]:
+    """hash หลายไฟล์ด้วย sha256sum ครั้งเดียว คืน {path: digest} เฉพาะไฟล์ที่คำนวณได้"""
+    if not remote_paths:
+        return {}
+    # ส่งรายชื่อทาง stdin ให้ xargs แบ่งรอบเอง: พาธนับพันต่อบรรทัดคำสั่งเดียวชน ARG_MAX ได้
+    channel = open_exec_channel(transport, "xargs -0 sha256sum -- 2>/dev/null")
+    try:
+        channel.sendall(b"".join(p.encode() + b"\0" for p in remote_paths))
+        channel.shutdown_write()
+        output = channel.makefile('rb').read().decode(errors='replace')
+        channel.recv_exit_status()
+    finally:
+        channel.close()
+
+    digests = {}
+    for line in output.split("\n"):
+        # ชื่อที่มี \ หรือขึ้นบรรทัดใหม่ sha256sum จะ escape และขึ้นต้นบรรทัดด้วย \
+        escaped = line.startswith("\\")
+        digest, _, path = (line[1:] if escaped else line).partition("  ")
+        if escaped:
+            path = _SHA256SUM_ESCAPE.sub(lambda m: _SHA256SUM_UNESCAPE.get(m.group(1), m.group(0)), path)
+        if len(digest) == 64 and path:
+            digests[path] = digest.lower()
+    return digests
+
+
+def compare_remote_digest(transport: paramiko.Transport, remote_path: str, local_digest: str,
+                          pending: Optional[RemoteChecksum] = None) -> Optional[bool]:
+    """
+    เทียบ digest ที่คำนวณระหว่างส่งกับของไฟล์บน Pi
+    คืน True เมื่อตรงกัน, None เมื่อตรวจฝั่ง Pi ไม่ได้, ไม่ตรงจะ raise ChecksumMismatch
+    """
+    remote = pending or RemoteChecksum(transport, remote_path)
+    try:
+        remote_digest = remote.result()
+    finally:
+        remote.close()
+
+    if remote_digest is None:
+        return None
+    if remote_digest != local_digest:
+        raise ChecksumMismatch(f"checksum mismatch: local {local_digest[:16]}…, remote {remote_digest[:16]}…")
+    return True
@@ -0,0 +1,237 @@
+import os
+import posixpath
+import shlex
+import threading
+import time
+import zlib
+from typing import Callable, Optional, Tuple
+
+import paramiko
+
+from models.ssh_connection import open_exec_channel
+from models.transfer_engine import DEFAULT_CHUNK_SIZE, TransferStats
+
+
+# ไฟล์เล็กกว่านี้ไม่คุ้มค่าเปิด channel ใหม่ + probe
+COMPRESS_MIN_SIZE = 256 * 1024
+LOCAL_SAMPLE_SIZE = 256 * 1024
+REMOTE_SAMPLE_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 1
+# ต้องเร็วขึ้น (หรือเล็กลง) อย่างน้อย 15% ถึงจะบีบ
+MIN_GAIN = 0.85
+# ยังไม่เคยวัดความเร็วสาย → บีบเฉพาะข้อมูลที่เล็กลงเกินครึ่ง
+UNKNOWN_LINK_MAX_RATIO = 0.5
+BANDWIDTH_SMOOTHING = 0.3
+GZIP_WBITS = 31
+# นามสกุลที่ข้อมูลถูกบีบอัดมาแล้ว (archive/รูป/เสียง/วิดีโอ/เอกสาร Office ที่เป็น zip) บีบซ้ำไม่ได้อะไร
+COMPRESSED_EXTENSIONS = frozenset({
+    'zip', 'rar', '7z', 'gz', 'tgz', 'bz2', 'xz', 'zst',
+    'jpg', 'jpeg', 'png', 'gif',
+    'mp3', 'flac',
+    'mp4', 'avi', 'mkv', 'mov',
+    'docx', 'xlsx', 'pptx', 'pdf',
+})
+
+
+def is_compressed_file(filename: str) -> bool:
+    name = posixpath.basename(filename.replace(os.sep, "/")).lower()
+    return '.' in name and name.rsplit('.', 1)[1] in COMPRESSED_EXTENSIONS
+
+
+class CompressionPolicy:
+    """
+    ตัดสินใจต่อไฟล์ว่าจะส่งผ่าน gzip pipe หรือไม่:
+    - ข้ามไฟล์ที่บีบมาแล้ว (ตาม COMPRESSED_EXTENSIONS) และไฟล์เล็ก
+    - ประเมินอัตราบีบอัดจากตัวอย่างข้อมูลจริง
+    - เทียบเวลาส่งแบบธรรมดา (ขนาด / แบนด์วิดท์) กับแบบบีบ (ช้ากว่าระหว่างสายกับ CPU ที่บีบ)
+      แบนด์วิดท์วัดจากงานส่งที่ผ่านมา, CPU ของ Pi วัดตอน probe ด้วย gzip -1 จริง
+    """
+
+    def __init__(self, transport: paramiko.Transport):
+        self.transport = transport
+        self.link_bandwidth: Optional[float] = None
+        self.remote_gzip_rate: Optional[float] = None
+        self._has_gzip: Optional[bool] = None
+        self._exec_overhead: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_transfer(self, stats: TransferStats):
+        """อัปเดตค่าประมาณแบนด์วิดท์ (EWMA) จากไบต์ที่วิ่งบนสายจริงของงานที่เสร็จแล้ว"""
+        if stats.wire_bytes < COMPRESS_MIN_SIZE or stats.elapsed <= 0:
+            return
+        rate = stats.wire_bytes / stats.elapsed
+        with self._lock:
+            if self.link_bandwidth is None:
+                self.link_bandwidth = rate
+            else:
+                self.link_bandwidth += BANDWIDTH_SMOOTHING * (rate - self.link_bandwidth)
+
+    def should_compress_upload(self, local_path: str, size: int) -> bool:
+        if size < COMPRESS_MIN_SIZE or is_compressed_file(local_path) or not self.has_gzip():
+            return False
+
+        with open(local_path, 'rb') as f:
+            sample = f.read(LOCAL_SAMPLE_SIZE)
+        start = time.perf_counter()
+        compressed = zlib.compress(sample, COMPRESS_LEVEL)
+        local_rate = len(sample) / max(time.perf_counter() - start, 1e-6)
+        # ฝั่ง Pi แค่ gunzip ซึ่งเร็วกว่าการบีบหลายเท่า คอขวดจึงเป็นการบีบฝั่งเครื่องเรา
+        return self._worth_it(len(compressed) / max(len(sample), 1), local_rate)
+
+    def should_compress_download(self, remote_path: str, size: int) -> bool:
+        if size < COMPRESS_MIN_SIZE or is_compressed_file(remote_path) or not self.has_gzip():
+            return False
+
+        probe = self._probe_remote(remote_path, min(size, REMOTE_SAMPLE_SIZE))
+        if probe is None:
+            return False
+        ratio, rate = probe
+        return self._worth_it(ratio, rate)
+
+    def has_gzip(self) -> bool:
+        if self._has_gzip is None:
+            start = time.perf_counter()
+            channel = open_exec_channel(self.transport, "command -v gzip >/dev/null 2>&1")
+            try:
+                self._has_gzip = channel.recv_exit_status() == 0
+            finally:
+                channel.close()
+            # เวลาเปิด channel + รันคำสั่งเปล่า ใช้หักออกตอนวัดความเร็ว gzip บน Pi
+            self._exec_overhead = time.perf_counter() - start
+        return self._has_gzip
+
+    # ---------- Internal helpers ----------
+    def _worth_it(self, ratio: float, cpu_rate: float) -> bool:
+        if ratio > MIN_GAIN:
+            return False
+        bandwidth = self.link_bandwidth
+        if bandwidth is None:
+            return ratio <= UNKNOWN_LINK_MAX_RATIO
+        plain_time = 1.0 / bandwidth
+        compressed_time = max(ratio / bandwidth, 1.0 / max(cpu_rate, 1.0))
+        return compressed_time < plain_time * MIN_GAIN
+
+    def _probe_remote(self, remote_path: str, sample_size: int) -> Optional[Tuple[float, float]]:
+        """บีบตัวอย่างต้นไฟล์บน Pi จริง → (อัตราบีบอัด, ความเร็ว gzip ของ Pi เป็น byte/s)"""
+        command = f"head -c {sample_size} {shlex.quote(remote_path)} | gzip -{COMPRESS_LEVEL} | wc -c"
+        start = time.perf_counter()
+        channel = open_exec_channel(self.transport, command)
+        try:
+            channel.shutdown_write()
+            output = channel.makefile('rb').read().decode(errors='replace').strip()
+            exit_code = channel.recv_exit_status()
+        finally:
+            channel.close()
+        elapsed = time.perf_counter() - start - (self._exec_overhead or 0.0)
+
+        try:
+            compressed_size = int(output)
+        except ValueError:
+            return None
+        if exit_code != 0 or compressed_size <= 0:
+            return None
+
+        rate = sample_size / max(elapsed, 1e-3)
+        with self._lock:
+            if self.remote_gzip_rate is None:
+                self.remote_gzip_rate = rate
+            else:
+                self.remote_gzip_rate += BANDWIDTH_SMOOTHING * (rate - self.remote_gzip_rate)
+            rate = self.remote_gzip_rate
+        return compressed_size / sample_size, rate
+
+
+class CompressedTransfer:
+    """ส่งไฟล์ผ่าน exec channel โดยบีบ gzip ระหว่างทาง (upload: zlib ฝั่งเรา → gzip -dc บน Pi, download กลับกัน)"""
+
+    def __init__(self, transport: paramiko.Transport, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.transport = transport
+        self.chunk_size = chunk_size
+
+    def upload(self, local_path: str, remote_path: str, mode: int = 0o644,
+               callback: Optional[Callable[[int, int], None]] = None, hasher=None,
+               throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        start = time.time()
+        size = os.path.getsize(local_path)
+        directory, name = posixpath.split(remote_path)
+        tmp_path = shlex.quote(posixpath.join(directory, f".{name}.gz-{os.getpid()}"))
+        command = (f"gzip -dc > {tmp_path} && chmod {mode:o} {tmp_path}"
+                   f" && mv -f {tmp_path} {shlex.quote(remote_path)}"
+                   f" || {{ rm -f {tmp_path}; exit 1; }}")
+
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        channel = open_exec_channel(self.transport, command)
+        sent = wire = 0
+        try:
+            with open(local_path, 'rb') as src:
+                while True:
+                    data = src.read(self.chunk_size)
+                    if not data:
+                        break
+                    if hasher is not None:
+                        hasher.update(data)
+                    out = compressor.compress(data)
+                    if out:
+                        if throttle:
+                            throttle(len(out))
+                        channel.sendall(out)
+                        wire += len(out)
+                    sent += len(data)
+                    if callback:
+                        callback(sent, size)
+            out = compressor.flush()
+            channel.sendall(out)
+            wire += len(out)
+            channel.shutdown_write()
+            self._check_exit(channel, "compressed upload")
+        finally:
+            channel.close()
+
+        if sent != size:
+            raise IOError(f"size mismatch in upload: sent {sent}, expected {size}")
+        elapsed = time.time() - start
+        return TransferStats(sent, elapsed, wire_bytes=wire, phases={"transfer": elapsed})
+
+    def download(self, remote_path: str, local_path: str, size: int,
+                 callback: Optional[Callable[[int, int], None]] = None, hasher=None,
+                 throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        start = time.time()
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        channel = open_exec_channel(self.transport, f"gzip -{COMPRESS_LEVEL} -c {shlex.quote(remote_path)}")
+        received = wire = 0
+        try:
+            channel.shutdown_write()
+            with open(local_path, 'wb') as dst:
+                while True:
+                    data = channel.recv(self.chunk_size)
+                    if not data:
+                        break
+                    wire += len(data)
+                    if throttle:
+                        throttle(len(data))
+                    out = decompressor.decompress(data)
+                    dst.write(out)
+                    if hasher is not None:
+                        hasher.update(out)
+                    received += len(out)
+                    if callback:
+                        callback(received, size)
+                out = decompressor.flush()
+                dst.write(out)
+                if hasher is not None:
+                    hasher.update(out)
+                received += len(out)
+            self._check_exit(channel, "compressed download")
+        finally:
+            channel.close()
+
+        if not decompressor.eof or received != size:
+            raise IOError(f"size mismatch in download: got {received}, expected {size}")
+        elapsed = time.time() - start
+        return TransferStats(received, elapsed, wire_bytes=wire, phases={"transfer": elapsed})
+
+    def _check_exit(self, channel: paramiko.Channel, what: str):
+        stderr = channel.makefile_stderr('rb').read().decode(errors='replace')
+        exit_code = channel.recv_exit_status()
+        if exit_code != 0:
+            raise IOError(f"{what} failed: {stderr.strip() or exit_code}")
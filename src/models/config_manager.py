@@ -2,10 +2,11 @@ import json
 import os
 from pathlib import Path
 from typing import Dict, List, Optional
+from models.transfer_engine import TransferSettings
 class SSHConfig:
     def __init__(self, name: str, host: str, port: int, username: str,
                  password: Optional[str] = None, identity_file: Optional[str] = None,
-                 protocol: str = "SFTP"):
+                 protocol: str = "SFTP", transfer_settings: Optional[TransferSettings] = None):
         self.name = name
         self.host = host
         self.port = port
@@ -13,6 +14,7 @@ class SSHConfig:
         self.password = password
         self.identity_file = identity_file
         self.protocol = protocol
+        self.transfer_settings = transfer_settings or TransferSettings()
 
     def to_dict(self) -> Dict:
         return {
@@ -22,7 +24,8 @@ class SSHConfig:
             "username": self.username,
             "password": self.password,
             "identity_file": self.identity_file,
-            "protocol": self.protocol
+            "protocol": self.protocol,
+            "transfer": self.transfer_settings.to_dict()
         }
 
     @staticmethod
@@ -34,7 +37,8 @@ class SSHConfig:
             username=data.get("username", ""),
             password=data.get("password"),
             identity_file=data.get("identity_file"),
-            protocol=data.get("protocol", "SFTP")
+            protocol=data.get("protocol", "SFTP"),
+            transfer_settings=TransferSettings.from_dict(data.get("transfer"))
         )
 
 
@@ -0,0 +1,300 @@
+import hashlib
+import math
+import mmap
+import os
+import posixpath
+import shlex
+import struct
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import paramiko
+
+from models.ssh_connection import open_exec_channel
+from models.transfer_engine import TransferStats
+
+
+DELTA_MIN_SIZE = 1024 * 1024
+MIN_BLOCK_SIZE = 2048
+MAX_BLOCK_SIZE = 65536
+# ถ้าต้องส่ง literal เกินเพดานนี้ ส่งทั้งไฟล์ตรง ๆ ถูกกว่า (การไล่ rolling checksum ใน Python ช้า)
+MAX_LITERAL_RATIO = 0.3
+MAX_LITERAL_BYTES = 16 * 1024 * 1024
+REPORT_INTERVAL = 1024 * 1024
+LITERAL_PACKET_SIZE = 65536
+ADLER_MOD = 65521
+SIGNATURE_RECORD = struct.Struct('>I16s')
+
+# สคริปต์ฝั่ง Pi: คำนวณ adler32 + md5 ของทุกบล็อกเต็มในไฟล์เดิม
+REMOTE_SIGNATURE_SCRIPT = r'''
+import os, sys, zlib, hashlib, struct
+path, bs = sys.argv[1], int(sys.argv[2])
+st = os.lstat(path)
+uid = os.geteuid()
+# rename ทับ symlink/hardlink จะตัดลิงก์ และเปลี่ยน owner/group ที่เราตั้งคืนไม่ได้ → ให้ส่งทั้งไฟล์ผ่าน SFTP แทน
+if (os.path.islink(path) or st.st_nlink > 1
+        or (uid != 0 and (st.st_uid != uid or st.st_gid not in os.getgroups() + [os.getegid()]))):
+    sys.exit(3)
+out = sys.stdout.buffer
+with open(path, 'rb') as f:
+    while True:
+        b = f.read(bs)
+        if len(b) < bs:
+            break
+        out.write(struct.pack('>I16s', zlib.adler32(b) & 0xffffffff, hashlib.md5(b).digest()))
+out.flush()
+'''
+
+# สคริปต์ฝั่ง Pi: ประกอบไฟล์ใหม่จากบล็อกเดิม + literal ลงไฟล์ชั่วคราว ตรวจ sha256 แล้ว rename ทับ
+# rename เป็นขั้นสุดท้าย พังตรงไหนก่อนหน้านั้นไฟล์เดิมยังอยู่ครบ
+REMOTE_APPLY_SCRIPT = r'''
+import sys, os, struct, hashlib
+target, tmp, bs, size, digest = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5]
+inp = sys.stdin.buffer
+def readn(n):
+    buf = b''
+    while len(buf) < n:
+        d = inp.read(n - len(buf))
+        if not d:
+            raise IOError('truncated delta stream')
+        buf += d
+    return buf
+try:
+    st = os.lstat(target)
+    if os.path.islink(target) or st.st_nlink > 1:
+        raise IOError('target is a link')
+    h = hashlib.sha256()
+    with open(target, 'rb') as old, open(tmp, 'wb') as new:
+        while True:
+            op = readn(1)
+            if op == b'C':
+                idx, count = struct.unpack('>QI', readn(12))
+                old.seek(idx * bs)
+                remaining = count * bs
+                while remaining:
+                    d = old.read(min(remaining, 1 << 20))
+                    if not d:
+                        raise IOError('basis file shorter than expected')
+                    new.write(d)
+                    h.update(d)
+                    remaining -= len(d)
+            elif op == b'L':
+                n = struct.unpack('>I', readn(4))[0]
+                d = readn(n)
+                new.write(d)
+                h.update(d)
+            elif op == b'E':
+                break
+            else:
+                raise IOError('bad delta op')
+        new.flush()
+        os.fsync(new.fileno())
+    if os.path.getsize(tmp) != size or h.hexdigest() != digest:
+        raise IOError('checksum mismatch after delta apply')
+    os.chown(tmp, st.st_uid, st.st_gid)
+    os.chmod(tmp, st.st_mode & 0o7777)
+    os.rename(tmp, target)
+except Exception as e:
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+    sys.stderr.write(str(e) + '\n')
+    sys.exit(2)
+sys.stdout.write('OK\n')
+'''
+
+
+class DeltaUnavailable(Exception):
+    """ใช้ delta ไม่ได้ (ไม่มีไฟล์เดิม/เป็นลิงก์/ไม่มี python3 บน Pi/ไฟล์ต่างกันมากเกิน) → ให้ส่งทั้งไฟล์แทน"""
+    pass
+
+
+def choose_block_size(size: int) -> int:
+    # แบบเดียวกับ rsync: ประมาณ sqrt(ขนาดไฟล์) ปัดเป็นทวีคูณของ 1KB
+    block = int(math.sqrt(max(size, 1))) // 1024 * 1024
+    return max(MIN_BLOCK_SIZE, min(block, MAX_BLOCK_SIZE))
+
+
+def build_delta_plan(data, size: int, block_size: int, signatures: Dict[int, Dict[bytes, int]],
+                     max_literal: int,
+                     callback: Optional[Callable[[int, int], None]] = None) -> List[Tuple[str, int, int]]:
+    """
+    จับคู่บล็อกแบบ rolling checksum (adler32) + md5
+    คืนรายการ op: ('C', block_index, count) หรือ ('L', start, end)
+    """
+    plan: List[Tuple[str, int, int]] = []
+    literal_total = 0
+    literal_start = 0
+    p = 0
+    fresh = True
+    a = b = 0
+    next_report = 0
+    lookup = signatures.get
+    md5 = hashlib.md5
+
+    def add_literal(start: int, end: int):
+        nonlocal literal_total
+        if end > start:
+            plan.append(('L', start, end))
+            literal_total += end - start
+
+    def add_copy(index: int):
+        if plan and plan[-1][0] == 'C' and plan[-1][1] + plan[-1][2] == index:
+            plan[-1] = ('C', plan[-1][1], plan[-1][2] + 1)
+        else:
+            plan.append(('C', index, 1))
+
+    while p + block_size <= size:
+        if fresh:
+            checksum = zlib.adler32(data[p:p + block_size])
+            a = checksum & 0xffff
+            b = checksum >> 16
+            fresh = False
+
+        # วงในเลื่อนหน้าต่างทีละ 1 ไบต์จนเจอบล็อกที่ตรงกัน (เป็นส่วนที่กิน CPU มากที่สุด)
+        stop = min(size - block_size, literal_start + max_literal - literal_total, p + REPORT_INTERVAL)
+        index = None
+        while True:
+            candidates = lookup((b << 16) | a)
+            if candidates is not None:
+                index = candidates.get(md5(data[p:p + block_size]).digest())
+                if index is not None:
+                    break
+            if p >= stop:
+                break
+            x_out = data[p]
+            a = (a - x_out + data[p + block_size]) % ADLER_MOD
+            b = (b - block_size * x_out + a - 1) % ADLER_MOD
+            p += 1
+
+        if index is not None:
+            add_literal(literal_start, p)
+            add_copy(index)
+            p += block_size
+            literal_start = p
+            fresh = True
+        elif p >= size - block_size:
+            break
+        elif literal_total + p - literal_start >= max_literal:
+            raise DeltaUnavailable("too many changes for delta transfer")
+
+        if callback and p >= next_report:
+            callback(p, size)
+            next_report = p + REPORT_INTERVAL
+
+    add_literal(literal_start, size)
+    if literal_total > max_literal:
+        raise DeltaUnavailable("too many changes for delta transfer")
+    return plan
+
+
+class DeltaUploader:
+    """
+    อัปโหลดเฉพาะส่วนที่เปลี่ยนของไฟล์ที่มีอยู่แล้วบน Pi:
+    1) ให้ Pi คำนวณ checksum ของทุกบล็อกในไฟล์เดิม
+    2) ฝั่งเครื่องเราหาบล็อกที่ตรงกันด้วย rolling checksum
+    3) ส่งเฉพาะ literal + อ้างอิงบล็อก ไปให้ Pi ประกอบไฟล์ใหม่แล้ว rename ทับแบบ atomic
+    """
+
+    def __init__(self, transport: paramiko.Transport):
+        self.transport = transport
+
+    def upload(self, local_path: str, remote_path: str,
+               callback: Optional[Callable[[int, int], None]] = None, hasher=None,
+               throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        start = time.time()
+        size = os.path.getsize(local_path)
+        if size < DELTA_MIN_SIZE:
+            raise DeltaUnavailable("file too small for delta transfer")
+
+        block_size = choose_block_size(size)
+        phases: Dict[str, float] = {}
+        mark = time.perf_counter()
+        signatures = self._fetch_signatures(remote_path, block_size)
+        if not signatures:
+            raise DeltaUnavailable("no matching blocks on remote")
+        phases["signature"] = time.perf_counter() - mark
+
+        with open(local_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            plan = build_delta_plan(data, size, block_size, signatures,
+                                    max_literal=min(int(size * MAX_LITERAL_RATIO), MAX_LITERAL_BYTES),
+                                    callback=callback)
+            phases["plan"] = time.perf_counter() - mark - phases["signature"]
+            # สคริปต์ฝั่ง Pi ตรวจ sha256 ของไฟล์ที่ประกอบเสร็จกับค่านี้อยู่แล้ว
+            hasher = hasher if hasher is not None else hashlib.sha256()
+            hasher.update(data)
+            digest = hasher.hexdigest()
+            sent = self._apply_remote(data, plan, remote_path, block_size, size, digest, throttle)
+        phases["transfer"] = time.perf_counter() - mark - phases["signature"] - phases["plan"]
+
+        if callback:
+            callback(size, size)
+        return TransferStats(sent, time.time() - start, phases=phases)
+
+    # ---------- Internal helpers ----------
+    def _run_python(self, script: str, args: List[str]) -> paramiko.Channel:
+        command = "python3 -c " + shlex.quote(script) + " " + " ".join(shlex.quote(a) for a in args)
+        return open_exec_channel(self.transport, command)
+
+    def _fetch_signatures(self, remote_path: str, block_size: int) -> Dict[int, Dict[bytes, int]]:
+        channel = self._run_python(REMOTE_SIGNATURE_SCRIPT, [remote_path, str(block_size)])
+        try:
+            channel.shutdown_write()
+            stdout = channel.makefile('rb')
+            signatures: Dict[int, Dict[bytes, int]] = {}
+            index = 0
+            while True:
+                record = stdout.read(SIGNATURE_RECORD.size)
+                if len(record) < SIGNATURE_RECORD.size:
+                    break
+                weak, strong = SIGNATURE_RECORD.unpack(record)
+                signatures.setdefault(weak, {}).setdefault(strong, index)
+                index += 1
+            exit_code = channel.recv_exit_status()
+        finally:
+            channel.close()
+
+        if exit_code != 0:
+            raise DeltaUnavailable(f"remote signature failed (exit code {exit_code})")
+        return signatures
+
+    def _apply_remote(self, data, plan: List[Tuple[str, int, int]], remote_path: str,
+                      block_size: int, size: int, digest: str,
+                      throttle: Optional[Callable[[int], None]] = None) -> int:
+        directory, name = posixpath.split(remote_path)
+        tmp_path = posixpath.join(directory, f".{name}.delta-{os.getpid()}")
+        channel = self._run_python(
+            REMOTE_APPLY_SCRIPT, [remote_path, tmp_path, str(block_size), str(size), digest]
+        )
+        sent = 0
+        try:
+            for op, first, second in plan:
+                if op == 'C':
+                    packet = b'C' + struct.pack('>QI', first, second)
+                    channel.sendall(packet)
+                    sent += len(packet)
+                    continue
+                for start in range(first, second, LITERAL_PACKET_SIZE):
+                    end = min(start + LITERAL_PACKET_SIZE, second)
+                    if throttle:
+                        throttle(end - start)
+                    channel.sendall(b'L' + struct.pack('>I', end - start))
+                    channel.sendall(data[start:end])
+                    sent += 5 + end - start
+            channel.sendall(b'E')
+            channel.shutdown_write()
+
+            stderr = channel.makefile_stderr('rb').read().decode(errors='replace')
+            exit_code = channel.recv_exit_status()
+        except (IOError, EOFError, paramiko.SSHException) as e:
+            # python3 บน Pi ตาย/channel หลุดกลางทาง: ยังไม่ถึง rename ไฟล์เดิมไม่ถูกแตะ
+            raise DeltaUnavailable(f"delta apply failed: {e}") from e
+        finally:
+            channel.close()
+
+        if exit_code != 0:
+            # สร้างไฟล์ชั่วคราวไม่ได้ (โฟลเดอร์อ่านอย่างเดียว), ลิงก์, checksum ไม่ตรง ฯลฯ → ส่งทั้งไฟล์แทน
+            raise DeltaUnavailable(f"delta apply failed: {stderr.strip() or exit_code}")
+        return sent + 1
@@ -0,0 +1,129 @@
+import posixpath
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.file_operations import FileInfo
+
+
+# listing ที่เก่ากว่านี้ (วินาที) ยังแสดงได้ทันที แต่ต้องไปตรวจกับ Pi ใหม่เบื้องหลัง
+DIR_CACHE_TTL = 10.0
+
+
+class DirNode:
+    def __init__(self, name: str):
+        self.name = name
+        self.children: Dict[str, 'DirNode'] = {}
+        self.entries: Optional[List[FileInfo]] = None
+        self.fetched_at = 0.0
+        # เพิ่มทุกครั้งที่ถูก invalidate: ผล listdir ที่เริ่มก่อนหน้านั้นถือว่าเก่า ห้ามเขียนทับ
+        self.generation = 0
+
+
+class RemoteDirCache:
+    """
+    cache ของ listing บน Pi เก็บเป็น tree ตามพาธ ใช้ร่วมกันทั้ง UI และงานเบื้องหลัง
+    - listing ที่หมด TTL ยังใช้แสดงได้ (stale) ระหว่างรอตรวจใหม่
+    - งานแก้ไขของเราเองสำเร็จ → invalidate เฉพาะโฟลเดอร์ที่ได้รับผล ครั้งหน้าต้องดึงใหม่ก่อนแสดง
+    """
+
+    def __init__(self, ttl: float = DIR_CACHE_TTL):
+        self.ttl = ttl
+        self.root = DirNode("/")
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Tuple[Optional[List[FileInfo]], bool]:
+        """คืน (listing หรือ None ถ้าไม่มี/ถูก invalidate, ยังสดอยู่หรือไม่)"""
+        with self._lock:
+            node = self._find(path)
+            if node is None or node.entries is None:
+                return None, False
+            return node.entries, time.monotonic() - node.fetched_at < self.ttl
+
+    def generation(self, path: str) -> int:
+        with self._lock:
+            return self._find(path, create=True).generation
+
+    def put(self, path: str, entries: List[FileInfo], generation: Optional[int] = None) -> bool:
+        """
+        เก็บผล listdir ถ้าไม่มีใคร invalidate ระหว่างดึง (generation ตรงกับตอนเริ่ม)
+        คืน True เมื่อเนื้อหาต่างจากที่ cache ไว้เดิม
+        """
+        with self._lock:
+            node = self._find(path, create=True)
+            if generation is not None and generation != node.generation:
+                return False
+            changed = node.entries is None or _signature(node.entries) != _signature(entries)
+            node.entries = entries
+            node.fetched_at = time.monotonic()
+            # โฟลเดอร์ลูกที่หายไปจาก listing ก็ไม่ควรค้างอยู่ใน tree
+            names = {e.name for e in entries if e.is_dir}
+            for name in list(node.children):
+                if name not in names:
+                    del node.children[name]
+            return changed
+
+    def apply_delta(self, path: str, upserts: List[FileInfo], removed: Iterable[str]) -> bool:
+        """
+        แก้ listing ที่ cache ไว้ตาม event โดยไม่ต้อง list ใหม่ทั้งโฟลเดอร์
+        คืน False ถ้าโฟลเดอร์นี้ไม่มี listing ให้แก้ (ครั้งหน้าก็ดึงใหม่อยู่แล้ว)
+        """
+        removed = set(removed)
+        with self._lock:
+            node = self._find(path)
+            if node is None or node.entries is None:
+                return False
+            drop = removed | {f.name for f in upserts}
+            entries = [e for e in node.entries if e.name not in drop] + list(upserts)
+            node.entries = entries
+            node.fetched_at = time.monotonic()
+            # listdir ที่เริ่มก่อน event นี้อาจยังไม่เห็นการเปลี่ยนแปลง ห้ามเขียนทับ
+            node.generation += 1
+            for name in removed:
+                node.children.pop(name, None)
+            return True
+
+    def invalidate(self, path: str):
+        with self._lock:
+            node = self._find(path)
+            if node is not None:
+                node.entries = None
+                node.generation += 1
+
+    def invalidate_parent(self, path: str):
+        self.invalidate(posixpath.dirname(path.rstrip("/")) or "/")
+
+    def remove_tree(self, path: str):
+        """ลบโฟลเดอร์ (และลูกทั้งหมด) ออกจาก cache เช่นหลังลบ/ย้าย/เปลี่ยนชื่อโฟลเดอร์"""
+        parts = _split(path)
+        if not parts:
+            self.clear()
+            return
+        with self._lock:
+            parent = self._find("/" + "/".join(parts[:-1]))
+            if parent is not None:
+                parent.children.pop(parts[-1], None)
+
+    def clear(self):
+        with self._lock:
+            self.root = DirNode("/")
+
+    # ---------- Internal helpers ----------
+    def _find(self, path: str, create: bool = False) -> Optional[DirNode]:
+        node = self.root
+        for part in _split(path):
+            child = node.children.get(part)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[part] = DirNode(part)
+            node = child
+        return node
+
+
+def _split(path: str) -> List[str]:
+    return [p for p in posixpath.normpath(path or "/").split("/") if p]
+
+
+def _signature(entries: List[FileInfo]):
+    return sorted((e.name, e.mode, e.size, e.mtime) for e in entries)
@@ -0,0 +1,78 @@
+import threading
+from typing import Callable, Iterable, List
+
+from models.dir_cache import RemoteDirCache
+from models.file_operations import FileInfo
+
+
+# โฟลเดอร์ที่รอดึงล่วงหน้าได้มากสุด (คำใบ้ใหม่ดันของเก่าออก)
+PREFETCH_MAX_PENDING = 8
+# ลิงก์กำลังยุ่ง (ส่งไฟล์/ผู้ใช้รอผลอยู่) → รอเท่านี้ (วินาที) แล้วค่อยดูใหม่
+PREFETCH_BUSY_BACKOFF = 0.5
+
+
+class DirPrefetcher:
+    """
+    ดึง listing ของโฟลเดอร์ที่ผู้ใช้น่าจะเปิดต่อไปมาใส่ cache ล่วงหน้า ทีละโฟลเดอร์บน thread ของตัวเอง
+    - คิวมีขนาดจำกัด เรียงตามความน่าจะเป็น (คำใบ้ล่าสุดอยู่หน้า)
+    - ไม่แย่งลิงก์: ถ้า is_busy() ยังจริงอยู่ก็รอ และไม่ดึงซ้ำโฟลเดอร์ที่ cache ยังสดอยู่
+    """
+
+    def __init__(self, cache: RemoteDirCache, fetch: Callable[[str], List[FileInfo]],
+                 is_busy: Callable[[], bool]):
+        self.cache = cache
+        self._fetch = fetch
+        self._is_busy = is_busy
+        self._pending: List[str] = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def hint(self, paths: Iterable[str], replace: bool = False):
+        """เพิ่มโฟลเดอร์ที่น่าจะถูกเปิด (ตัวแรกสำคัญสุด) replace=True ทิ้งคำใบ้เดิมทั้งหมด"""
+        paths = [p for p in dict.fromkeys(paths) if p]
+        with self._cond:
+            if self._stopped:
+                return
+            if replace:
+                self._pending.clear()
+            self._pending = paths + [p for p in self._pending if p not in paths]
+            del self._pending[PREFETCH_MAX_PENDING:]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify()
+
+    # ---------- Internal helpers ----------
+    def _next(self):
+        with self._cond:
+            while not self._stopped:
+                if not self._pending:
+                    self._cond.wait()
+                elif self._is_busy():
+                    self._cond.wait(PREFETCH_BUSY_BACKOFF)
+                else:
+                    return self._pending.pop(0)
+            return None
+
+    def _run(self):
+        while True:
+            path = self._next()
+            if path is None:
+                return
+            files, fresh = self.cache.get(path)
+            if files is not None and fresh:
+                continue
+            generation = self.cache.generation(path)
+            try:
+                files = self._fetch(path)
+            except Exception:
+                # เดาผิด (ไม่มีสิทธิ์/ถูกลบไปแล้ว) ก็แค่ข้าม
+                continue
+            self.cache.put(path, files, generation)
@@ -0,0 +1,473 @@
+import os
+import posixpath
+import shlex
+import stat
+import tarfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import paramiko
+
+from models.ssh_connection import open_exec_channel, remote_command_exists
+from models.transfer_engine import TransferEngine, TransferSettings, TransferStats
+
+
+STREAM_CHUNK_SIZE = 65536
+# ไฟล์เล็กกว่านี้รวมส่งเป็น tar ก้อนเดียวได้ (ไฟล์ใหญ่ส่งผ่าน SFTP ตามปกติ)
+BATCH_FILE_MAX_SIZE = 256 * 1024
+BATCH_MAX_BYTES = 16 * 1024 * 1024
+BATCH_MAX_FILES = 1000
+
+
+class DirectoryProgress:
+    def __init__(self):
+        self.files_done = 0
+        self.files_total = 0
+        self.bytes_done = 0
+        self.bytes_total = 0
+
+
+class _ChannelWriter:
+    """file-like สำหรับ tarfile โหมด stream เขียนลง stdin ของคำสั่งบน Pi"""
+
+    def __init__(self, channel: paramiko.Channel, throttle: Optional[Callable[[int], None]] = None):
+        self.channel = channel
+        self.throttle = throttle
+
+    def write(self, data) -> int:
+        if self.throttle:
+            self.throttle(len(data))
+        self.channel.sendall(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class _StderrReader:
+    """
+    อ่าน stderr ของ channel ไปพร้อมกับงานหลัก: stdout กับ stderr ใช้ window เดียวกัน
+    ถ้าปล่อยไว้จนจบ tar ที่บ่นเยอะจะค้างรอเขียน stderr และหยุดอ่าน stdin ของเรา
+    """
+
+    def __init__(self, channel: paramiko.Channel):
+        self._chunks: List[bytes] = []
+        self._thread = threading.Thread(target=self._run, args=(channel,), daemon=True)
+        self._thread.start()
+
+    def _run(self, channel: paramiko.Channel):
+        while True:
+            data = channel.recv_stderr(STREAM_CHUNK_SIZE)
+            if not data:
+                break
+            self._chunks.append(data)
+
+    def read(self) -> str:
+        """รอจน channel ปิด stderr แล้วคืนข้อความทั้งหมด"""
+        self._thread.join()
+        return b"".join(self._chunks).decode(errors='replace')
+
+
+class _HashingReader:
+    def __init__(self, f, hasher):
+        self.f = f
+        self.hasher = hasher
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.hasher.update(data)
+        return data
+
+
+class _CountingReader:
+    def __init__(self, f, on_read: Callable[[int], None]):
+        self.f = f
+        self.on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        if data:
+            self.on_read(len(data))
+        return data
+
+
+class BatchUploader:
+    """
+    รวมไฟล์เล็กหลายไฟล์ (ต่างโฟลเดอร์กันได้) เป็น tar stream เดียวแล้วแตกที่ / บน Pi
+    ประหยัด round trip ของ open/write/close/chmod ทีละไฟล์
+    ผลลัพธ์แยกรายไฟล์จาก error ที่ tar รายงานทาง stderr
+    """
+
+    def __init__(self, transport: paramiko.Transport, throttle: Optional[Callable[[int], None]] = None):
+        self.transport = transport
+        self.throttle = throttle
+
+    def upload(self, items: List[Tuple[str, str]], mode: int = 0o644,
+               callback: Optional[Callable[[int], None]] = None,
+               hashers: Optional[List] = None) -> List[Optional[str]]:
+        """
+        items: [(local_path, remote_path)] คืนรายการ error ตามลำดับเดียวกัน
+        ("" = สำเร็จ, None = ไม่ได้ส่งเพราะปลายทางเป็นลิงก์ ให้ส่งผ่าน SFTP ตามปกติแทน)
+        callback(index) ถูกเรียกเมื่อใส่ไฟล์ลำดับนั้นลง stream ครบแล้ว
+        """
+        errors: List[Optional[str]] = [""] * len(items)
+        arcnames = [remote_path.lstrip("/") for _, remote_path in items]
+        # tar -C / สร้างโฟลเดอร์แม่ที่ไม่มีให้เองเงียบ ๆ แต่การ upload ผ่าน SFTP จะล้ม ต้องตรวจก่อนให้ผลเหมือนกัน
+        missing = self._missing_dirs({posixpath.dirname(remote_path) for _, remote_path in items})
+        links = self._link_targets([remote_path for _, remote_path in items])
+        for index, (_, remote_path) in enumerate(items):
+            if posixpath.dirname(remote_path) in missing:
+                errors[index] = f"No such directory: {posixpath.dirname(remote_path)}"
+            elif remote_path in links:
+                errors[index] = None
+
+        # umask 022 + mode ใน archive → สิทธิ์ตรงกับการ upload ผ่าน SFTP (chmod 644)
+        channel = open_exec_channel(self.transport, "umask 022 && tar -x -o -f - -C /")
+        stderr_reader = _StderrReader(channel)
+        try:
+            with tarfile.open(fileobj=_ChannelWriter(channel, self.throttle), mode='w|',
+                              format=tarfile.PAX_FORMAT) as tar:
+                for index, (local_path, _) in enumerate(items):
+                    if errors[index] != "":
+                        continue
+                    try:
+                        f = open(local_path, 'rb')
+                    except OSError as e:
+                        errors[index] = str(e)
+                        continue
+                    with f:
+                        # stat จากไฟล์ที่เปิดแล้ว: symlink ถูกส่งเป็นเนื้อไฟล์จริงเหมือนทาง SFTP
+                        info = tar.gettarinfo(arcname=arcnames[index], fileobj=f)
+                        if not info.isfile():
+                            errors[index] = f"Not a regular file: {local_path}"
+                            continue
+                        info.mode = mode
+                        info.uid = info.gid = 0
+                        info.uname = info.gname = ""
+                        hasher = hashers[index] if hashers else None
+                        tar.addfile(info, _HashingReader(f, hasher) if hasher else f)
+                    if callback:
+                        callback(index)
+            channel.shutdown_write()
+            stderr = stderr_reader.read()
+            exit_code = channel.recv_exit_status()
+        finally:
+            channel.close()
+
+        if exit_code != 0:
+            indexes = {name: index for index, name in enumerate(arcnames)}
+            matched = False
+            for line in stderr.splitlines():
+                index = self._error_member(line, indexes)
+                if index is not None:
+                    errors[index] = errors[index] or line
+                    matched = True
+            if not matched:
+                # ระบุไม่ได้ว่าไฟล์ไหนพัง (เช่น stream ขาดกลางทาง) → ถือว่าล้มเหลวทั้งก้อน
+                message = stderr.strip() or f"tar exited with {exit_code}"
+                errors = [message if e == "" else e for e in errors]
+        return errors
+
+    @staticmethod
+    def _error_member(line: str, indexes: dict) -> Optional[int]:
+        # GNU tar / busybox รายงานเป็น "tar: <ชื่อใน archive>: <สาเหตุ>" ชื่ออาจมี ": " ได้จึงลองทุกจุดตัด
+        if not line.startswith("tar: "):
+            return None
+        rest = line[len("tar: "):]
+        start = 0
+        while True:
+            cut = rest.find(": ", start)
+            if cut < 0:
+                return None
+            if rest[:cut] in indexes:
+                return indexes[rest[:cut]]
+            start = cut + 1
+
+    def _missing_dirs(self, dirs) -> set:
+        return self._probe('for d; do [ -d "$d" ] || printf "%s\\0" "$d"; done', sorted(dirs))
+
+    def _link_targets(self, paths) -> set:
+        # tar -x แทนที่ symlink/hardlink ปลายทางด้วยไฟล์ใหม่ ส่วน SFTP เขียนทะลุไปที่ไฟล์จริง
+        return self._probe('find "$@" -maxdepth 0 \\( -type l -o -links +1 \\) -print0 2>/dev/null', paths)
+
+    def _probe(self, script: str, paths: List[str]) -> set:
+        """รัน script กับพาธทั้งหมดบน Pi (ส่งทาง stdin ให้ xargs แบ่งเอง ไม่ชน ARG_MAX) คืนพาธที่ script พิมพ์ออกมา"""
+        if not paths:
+            return set()
+        channel = open_exec_channel(self.transport, f"xargs -0 sh -c {shlex.quote(script)} sh")
+        try:
+            channel.sendall(b"".join(p.encode() + b"\0" for p in paths))
+            channel.shutdown_write()
+            output = channel.makefile('rb').read().decode(errors='replace')
+            channel.recv_exit_status()
+        finally:
+            channel.close()
+        return {p for p in output.split("\0") if p}
+
+
+class DirectoryTransfer:
+    """
+    ส่งทั้งโฟลเดอร์แบบ recursive
+    - ทางเร็ว: stream tar ผ่าน exec channel เดียว (tar xf - / tar cf -) ไม่ต้องเปิด/ปิดไฟล์ทีละไฟล์ผ่าน SFTP
+    - ทางสำรอง: ไล่โฟลเดอร์แล้วส่งทีละไฟล์ผ่าน SFTP (สำหรับเครื่องที่ไม่มี tar)
+    """
+
+    def __init__(self, transport: paramiko.Transport, settings: Optional[TransferSettings] = None,
+                 throttle: Optional[Callable[[int], None]] = None):
+        self.transport = transport
+        self.engine = TransferEngine(settings)
+        self.throttle = throttle
+        self._has_tar: Optional[bool] = None
+        # คำเตือนที่ไม่ทำให้งานล้ม เช่น "file changed as we read it" ของ tar บน Pi
+        self.warnings: List[str] = []
+
+    # ---------- Upload ----------
+    def upload_directory(self, sftp: paramiko.SFTPClient, local_dir: str, remote_dir: str,
+                         callback: Optional[Callable[[DirectoryProgress], None]] = None) -> TransferStats:
+        start = time.time()
+        progress = DirectoryProgress()
+        entries = self._scan_local(local_dir, progress)
+
+        if self.has_tar():
+            self._upload_tar(local_dir, remote_dir, entries, progress, callback)
+        else:
+            self._upload_sftp(sftp, local_dir, remote_dir, entries, progress, callback)
+        return TransferStats(progress.bytes_done, time.time() - start)
+
+    def _upload_tar(self, local_dir: str, remote_dir: str, entries: List[Tuple[str, str]],
+                    progress: DirectoryProgress, callback):
+        remote_parent, remote_name = posixpath.split(remote_dir.rstrip("/"))
+        command = f"mkdir -p {shlex.quote(remote_parent)} && tar -x -o -f - -C {shlex.quote(remote_parent)}"
+        channel = open_exec_channel(self.transport, command)
+        stderr_reader = _StderrReader(channel)
+
+        def on_read(n: int):
+            progress.bytes_done += n
+
+        try:
+            with tarfile.open(fileobj=_ChannelWriter(channel, self.throttle), mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                for rel_path, full_path in entries:
+                    arcname = posixpath.join(remote_name, rel_path) if rel_path else remote_name
+                    info = tar.gettarinfo(full_path, arcname=arcname)
+                    if info is None or not (info.isfile() or info.isdir() or info.issym()):
+                        # socket/FIFO/device: ทาง SFTP ก็ไม่ส่ง (gettarinfo คืน None ให้ socket) ข้ามไป
+                        continue
+                    if info.isfile():
+                        with open(full_path, 'rb') as f:
+                            tar.addfile(info, _CountingReader(f, on_read))
+                        progress.files_done += 1
+                        if callback:
+                            callback(progress)
+                    else:
+                        tar.addfile(info)
+            channel.shutdown_write()
+            self._check_exit(channel, stderr_reader, "tar upload")
+        finally:
+            channel.close()
+
+    def _upload_sftp(self, sftp: paramiko.SFTPClient, local_dir: str, remote_dir: str,
+                     entries: List[Tuple[str, str]], progress: DirectoryProgress, callback):
+        for rel_path, full_path in entries:
+            target = posixpath.join(remote_dir, rel_path) if rel_path else remote_dir
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                self._sftp_mkdir(sftp, target)
+                continue
+            if not os.path.isfile(full_path):
+                continue
+
+            base = progress.bytes_done
+
+            def on_chunk(transferred: int, total: int):
+                progress.bytes_done = base + transferred
+                if callback:
+                    callback(progress)
+
+            self.engine.upload(sftp, full_path, target,
+                               mode=stat.S_IMODE(os.stat(full_path).st_mode), callback=on_chunk,
+                               throttle=self.throttle)
+            progress.files_done += 1
+            if callback:
+                callback(progress)
+
+    # ---------- Download ----------
+    def download_directory(self, sftp: paramiko.SFTPClient, remote_dir: str, local_dir: str,
+                           callback: Optional[Callable[[DirectoryProgress], None]] = None) -> TransferStats:
+        start = time.time()
+        progress = DirectoryProgress()
+
+        if self.has_tar():
+            self._download_tar(remote_dir, local_dir, progress, callback)
+        else:
+            self._download_sftp(sftp, remote_dir, local_dir, progress, callback)
+        return TransferStats(progress.bytes_done, time.time() - start)
+
+    def _download_tar(self, remote_dir: str, local_dir: str, progress: DirectoryProgress, callback):
+        remote_parent, remote_name = posixpath.split(remote_dir.rstrip("/"))
+        self._remote_totals(remote_parent, remote_name, progress)
+        if callback:
+            callback(progress)
+
+        command = f"tar cf - -C {shlex.quote(remote_parent)} {shlex.quote(remote_name)}"
+        channel = open_exec_channel(self.transport, command)
+        stderr_reader = _StderrReader(channel)
+        links: List[Tuple[str, str]] = []
+        try:
+            channel.shutdown_write()
+            with tarfile.open(fileobj=channel.makefile('rb'), mode='r|') as tar:
+                for member in tar:
+                    target = self._local_member_path(local_dir, remote_name, member.name)
+                    if target is None:
+                        continue
+                    if member.isdir():
+                        os.makedirs(target, exist_ok=True)
+                    elif member.isfile():
+                        self._extract_file(tar, member, target, progress, callback)
+                        progress.files_done += 1
+                        if callback:
+                            callback(progress)
+                    elif member.issym():
+                        # สร้าง link ทีหลังสุด ไม่งั้น member ถัดไป (dir/link/x) จะเขียนทะลุ link ออกนอก local_dir ได้
+                        links.append((member.linkname, target))
+            # GNU tar ออก 1 เมื่อไฟล์บน Pi เปลี่ยนระหว่างอ่าน: ได้ของครบแต่บางไฟล์อาจไม่ใช่ฉบับล่าสุด
+            self._check_exit(channel, stderr_reader, "tar download", warn_on_one=True)
+        finally:
+            channel.close()
+
+        for linkname, target in links:
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(linkname, target)
+            except OSError:
+                pass
+
+    def _download_sftp(self, sftp: paramiko.SFTPClient, remote_dir: str, local_dir: str,
+                       progress: DirectoryProgress, callback):
+        files: List[Tuple[str, str, int]] = []
+        dirs: List[str] = [local_dir]
+        self._scan_remote(sftp, remote_dir, local_dir, files, dirs)
+        progress.files_total = len(files)
+        progress.bytes_total = sum(size for _, _, size in files)
+
+        for d in dirs:
+            os.makedirs(d, exist_ok=True)
+        for remote_path, local_path, _ in files:
+            base = progress.bytes_done
+
+            def on_chunk(transferred: int, total: int):
+                progress.bytes_done = base + transferred
+                if callback:
+                    callback(progress)
+
+            self.engine.download(sftp, remote_path, local_path, callback=on_chunk, throttle=self.throttle)
+            progress.files_done += 1
+            if callback:
+                callback(progress)
+
+    # ---------- Helpers ----------
+    def has_tar(self) -> bool:
+        if self._has_tar is None:
+            self._has_tar = remote_command_exists(self.transport, "tar")
+        return self._has_tar
+
+    def _scan_local(self, local_dir: str, progress: DirectoryProgress) -> List[Tuple[str, str]]:
+        """คืน (relative posix path, full path) ของทุก entry โดยโฟลเดอร์มาก่อนไฟล์ข้างใน"""
+        entries: List[Tuple[str, str]] = [("", local_dir)]
+        for root, dirnames, filenames in os.walk(local_dir):
+            rel_root = os.path.relpath(root, local_dir)
+            rel_root = "" if rel_root == "." else rel_root.replace(os.sep, "/")
+            for name in sorted(dirnames):
+                entries.append((posixpath.join(rel_root, name), os.path.join(root, name)))
+            for name in sorted(filenames):
+                full_path = os.path.join(root, name)
+                entries.append((posixpath.join(rel_root, name), full_path))
+                if os.path.isfile(full_path) and not os.path.islink(full_path):
+                    progress.files_total += 1
+                    progress.bytes_total += os.path.getsize(full_path)
+        return entries
+
+    def _scan_remote(self, sftp: paramiko.SFTPClient, remote_dir: str, local_dir: str,
+                     files: List[Tuple[str, str, int]], dirs: List[str]):
+        for entry in sftp.listdir_attr(remote_dir):
+            remote_path = posixpath.join(remote_dir, entry.filename)
+            local_path = os.path.join(local_dir, entry.filename)
+            if stat.S_ISDIR(entry.st_mode):
+                dirs.append(local_path)
+                self._scan_remote(sftp, remote_path, local_path, files, dirs)
+            elif stat.S_ISREG(entry.st_mode):
+                files.append((remote_path, local_path, entry.st_size or 0))
+
+    def _remote_totals(self, remote_parent: str, remote_name: str, progress: DirectoryProgress):
+        # ขนาดจาก du -sk เป็นค่าประมาณ ใช้แสดงความคืบหน้าเท่านั้น
+        command = (f"cd {shlex.quote(remote_parent)} && find {shlex.quote(remote_name)} -type f | wc -l"
+                   f" && du -sk {shlex.quote(remote_name)}")
+        channel = open_exec_channel(self.transport, command)
+        try:
+            channel.shutdown_write()
+            output = channel.makefile('rb').read().decode(errors='replace').split()
+            channel.recv_exit_status()
+        finally:
+            channel.close()
+        try:
+            progress.files_total = int(output[0])
+            progress.bytes_total = int(output[1]) * 1024
+        except (IndexError, ValueError):
+            pass
+
+    def _local_member_path(self, local_dir: str, remote_name: str, member_name: str) -> Optional[str]:
+        # แทนชื่อโฟลเดอร์บนสุดด้วยชื่อปลายทาง และกันพาธหลุดออกนอก local_dir
+        parts = [p for p in member_name.split("/") if p not in ("", ".")]
+        if not parts or parts[0] != remote_name or ".." in parts:
+            return None
+        target = os.path.join(local_dir, *parts[1:])
+        # ตามทุก symlink ของโฟลเดอร์แม่จริง ๆ (abspath ไม่ตาม link)
+        root = os.path.realpath(local_dir)
+        parent = os.path.realpath(os.path.dirname(target)) if parts[1:] else root
+        if os.path.commonpath([root, parent]) != root:
+            return None
+        return target
+
+    def _extract_file(self, tar: tarfile.TarFile, member: tarfile.TarInfo, target: str,
+                      progress: DirectoryProgress, callback):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.islink(target):
+            # link เดิมจากรอบก่อน: open() จะเขียนทะลุไปที่ปลาย link ให้แทนที่ตัว link แทน
+            os.remove(target)
+        src = tar.extractfile(member)
+        with open(target, 'wb') as dst:
+            while True:
+                data = src.read(STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                if self.throttle:
+                    self.throttle(len(data))
+                dst.write(data)
+                progress.bytes_done += len(data)
+                if callback:
+                    callback(progress)
+        try:
+            os.chmod(target, member.mode & 0o7777)
+            os.utime(target, (member.mtime, member.mtime))
+        except OSError:
+            pass
+
+    def _sftp_mkdir(self, sftp: paramiko.SFTPClient, path: str):
+        try:
+            sftp.mkdir(path)
+        except IOError:
+            # มีอยู่แล้ว
+            if not stat.S_ISDIR(sftp.stat(path).st_mode):
+                raise
+
+    def _check_exit(self, channel: paramiko.Channel, stderr_reader: _StderrReader, what: str,
+                    warn_on_one: bool = False):
+        stderr = stderr_reader.read()
+        exit_code = channel.recv_exit_status()
+        if exit_code == 1 and warn_on_one:
+            lines = [line for line in stderr.splitlines() if line.strip()]
+            self.warnings.extend(lines or [f"{what}: some files changed while being read"])
+            return
+        if exit_code != 0:
+            raise IOError(f"{what} failed: {stderr.strip() or exit_code}")
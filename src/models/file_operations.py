@@ -1,9 +1,19 @@
+import hashlib
 import os
 import stat
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from collections import deque
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import paramiko
 import posixpath
+import shlex
+from contextlib import nullcontext
+from models.bandwidth import BandwidthLimiter
+from models.transfer_engine import TransferEngine, TransferSettings, TransferStats
+from models.checksum import RemoteChecksum, compare_remote_digest
+from models.ranged_reader import RangedReader
+from models.ssh_connection import open_exec_channel
+from models.transfer_progress import TransferProgress
 
 
 # ===== Helper: ใช้กับ "พาธฝั่งรีโมต (Linux/Pi)" เท่านั้น =====
@@ -28,16 +38,81 @@ def _pjoin(base: str, name: str) -> str:
     return _posix_abs(posixpath.join(base, name))
 
 
+# listing แบบทยอย: จำนวน READDIR ที่ยิงค้างไว้ และขนาดชุดที่ส่งให้ UI
+LISTING_READ_AHEAD = 16
+LISTING_BATCH_SIZE = 500
+
+# ไฟล์เล็กกว่านี้เขียนทับเลยถูกกว่าเปิด exec ให้ Pi คำนวณ sha256 มาเทียบ
+SKIP_UNCHANGED_MIN_SIZE = 256 * 1024
+# จำนวนชั้นของ symlink ที่ตามไปหาไฟล์จริงตอนบันทึก (เท่ากับ MAXSYMLINKS ของ Linux)
+MAX_SYMLINK_HOPS = 40
+
+# สตริง rwx ของสิทธิ์ 9 บิตทั้ง 512 แบบ คำนวณไว้ครั้งเดียว
+_PERMISSION_TABLE = tuple(
+    ''.join(c if bits & (0o400 >> i) else '-' for i, c in enumerate('rwxrwxrwx'))
+    for bits in range(0o1000)
+)
+# ค่า mode/uid ซ้ำกันเกือบทั้งโฟลเดอร์ ใช้ int object ตัวเดียวกันร่วมกัน
+_SHARED_INTS: Dict[int, int] = {}
+
+
+def permissions_str(mode: int) -> str:
+    return ('d' if stat.S_ISDIR(mode) else '-') + _PERMISSION_TABLE[mode & 0o777]
+
+
+def _shared(value: Optional[int]) -> Optional[int]:
+    if value is None:
+        return None
+    return _SHARED_INTS.setdefault(value, value)
+
+
 class FileInfo:
-    def __init__(self, name: str, path: str, size: int, is_dir: bool,
-                 permissions: str, modified_time: datetime, owner: str = ""):
+    """
+    รายการไฟล์บน Pi เก็บค่าดิบจาก stat (ไม่มี __dict__)
+    สิทธิ์/วันที่/owner แปลงเป็นข้อความเมื่อถูกขอ (เช่น ตอนวาดแถวที่มองเห็น) เท่านั้น
+    path ประกอบจากโฟลเดอร์แม่ที่ทุกรายการในโฟลเดอร์เดียวกันใช้ string ร่วมกัน
+    """
+    __slots__ = ("name", "parent", "size", "mode", "mtime", "uid")
+
+    def __init__(self, name: str, parent: str, size: int = 0, mode: int = 0,
+                 mtime: int = 0, uid: Optional[int] = None):
         self.name = name
-        self.path = path
+        self.parent = parent
         self.size = size
-        self.is_dir = is_dir
-        self.permissions = permissions
-        self.modified_time = modified_time
-        self.owner = owner
+        self.mode = _shared(mode)
+        self.mtime = mtime
+        self.uid = _shared(uid)
+
+    @classmethod
+    def from_attr(cls, attr: paramiko.SFTPAttributes, parent: str, name: Optional[str] = None) -> 'FileInfo':
+        return cls(
+            name=name if name is not None else attr.filename,
+            parent=parent,
+            size=attr.st_size or 0,
+            mode=attr.st_mode or 0,
+            mtime=attr.st_mtime or 0,
+            uid=attr.st_uid
+        )
+
+    @property
+    def path(self) -> str:
+        return self.parent + self.name if self.parent.endswith("/") else f"{self.parent}/{self.name}"
+
+    @property
+    def is_dir(self) -> bool:
+        return stat.S_ISDIR(self.mode)
+
+    @property
+    def permissions(self) -> str:
+        return permissions_str(self.mode)
+
+    @property
+    def modified_time(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime)
+
+    @property
+    def owner(self) -> str:
+        return "" if self.uid is None else str(self.uid)
 
     def get_size_str(self) -> str:
         if self.is_dir:
@@ -54,52 +129,114 @@ class FileInfo:
         return f"{size:.2f} {units[unit_index]}"
 
 
+class _StatusReply:
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.num = None
+
+    def _async_response(self, t, msg, num):
+        self.num = num
+        self.status = msg.get_int() if t == paramiko.sftp.CMD_STATUS else -1
+
+
 class FileOperations:
     def __init__(self, sftp: Optional[paramiko.SFTPClient] = None):
         self.sftp = sftp
         self.recycle_bin_path = ".guios_recycle"
+        self.transfer_engine = TransferEngine()
+        self.last_transfer: Optional[TransferStats] = None
+        self.limiter: Optional[BandwidthLimiter] = None
+        # server รองรับ extension copy-data / fsync@openssh.com หรือไม่ (None = ยังไม่เคยลอง)
+        self._copy_data_supported: Optional[bool] = None
+        self._fsync_supported: Optional[bool] = None
 
     def set_sftp(self, sftp: Optional[paramiko.SFTPClient]):
         self.sftp = sftp
+        self._copy_data_supported = None
+        self._fsync_supported = None
+
+    def set_transfer_settings(self, settings: Optional[TransferSettings]):
+        self.transfer_engine.settings = settings or TransferSettings()
+
+    def _interactive(self):
+        # งานที่ผู้ใช้รอดูผลอยู่ (list/เปิดไฟล์) ให้งานส่งไฟล์เบื้องหลังหลีกทางก่อน
+        return self.limiter.interactive() if self.limiter else nullcontext()
+
+    def _throttle(self, n: int):
+        if self.limiter:
+            self.limiter.throttle(n)
 
     # ---------- List ----------
     def list_directory(self, path: str = ".") -> List[FileInfo]:
         if not self.sftp:
             return []
         try:
-            path = _posix_abs(path)
-            files = []
-            for entry in self.sftp.listdir_attr(path):
-                is_dir = stat.S_ISDIR(entry.st_mode)
-                permissions = self._get_permissions_str(entry.st_mode)
-                modified = datetime.fromtimestamp(entry.st_mtime)
-                file_info = FileInfo(
-                    name=entry.filename,
-                    path=_pjoin(path, entry.filename),   # ✅ POSIX absolute
-                    size=getattr(entry, "st_size", 0),
-                    is_dir=is_dir,
-                    permissions=permissions,
-                    modified_time=modified,
-                    owner=str(getattr(entry, "st_uid", ""))
-                )
-                files.append(file_info)
-            return sorted(files, key=lambda x: (not x.is_dir, x.name.lower()))
+            return self.fetch_directory(path)
         except Exception as e:
             print(f"Error listing directory: {e}")
             return []
 
+    def fetch_directory(self, path: str) -> List[FileInfo]:
+        """เหมือน list_directory แต่ปล่อย exception ออกไป (ให้ผู้เรียกแยก error กับโฟลเดอร์ว่างได้)"""
+        path = _posix_abs(path)
+        files = []
+        with self._interactive():
+            entries = self.sftp.listdir_attr(path)
+        for entry in entries:
+            files.append(FileInfo.from_attr(entry, path))
+        # ไม่เรียงที่นี่ ลำดับการแสดงเป็นหน้าที่ของ ListingView
+        return files
+
+    def iter_directory(self, path: str, batch_size: int = LISTING_BATCH_SIZE) -> Iterator[List[FileInfo]]:
+        """
+        อ่านโฟลเดอร์แบบทยอยส่ง: ยิง READDIR ล่วงหน้าไว้หลายคำขอ แล้วคืนรายการเป็นชุด (ตามลำดับที่ server ส่ง ยังไม่เรียง)
+        ชุดแรกออกทันทีที่ได้คำตอบแรก ชุดต่อไปทุก batch_size รายการ
+        เลิกอ่านกลางทาง (close generator) ได้ handle จะถูกปิดให้เสมอ
+        """
+        path = _posix_abs(path)
+        sftp = self.sftp
+        # ถือสถานะ interactive เฉพาะตอนรอคำตอบ ไม่ถือค้างข้าม yield
+        # ไม่งั้นงานส่งไฟล์จะหยุดรอตลอดเวลาที่ UI ยังวาดรายการโฟลเดอร์ใหญ่อยู่
+        with self._interactive():
+            t, msg = sftp._request(paramiko.sftp.CMD_OPENDIR, path)
+        if t != paramiko.sftp.CMD_HANDLE:
+            raise paramiko.SFTPError("Expected handle")
+        handle = msg.get_binary()
+        try:
+            pending = deque(sftp._async_request(type(None), paramiko.sftp.CMD_READDIR, handle)
+                            for _ in range(LISTING_READ_AHEAD))
+            batch: List[FileInfo] = []
+            first = True
+            while pending:
+                try:
+                    # คำขอที่ค้างอยู่หลัง EOF ถูก _read_response รอบถัดไปอ่านทิ้งเอง
+                    with self._interactive():
+                        t, msg = sftp._read_response(pending.popleft())
+                except EOFError:
+                    break
+                pending.append(sftp._async_request(type(None), paramiko.sftp.CMD_READDIR, handle))
+                for _ in range(msg.get_int()):
+                    filename = msg.get_text()
+                    longname = msg.get_text()
+                    attr = paramiko.SFTPAttributes._from_msg(msg, filename, longname)
+                    if filename not in (".", ".."):
+                        batch.append(FileInfo.from_attr(attr, path))
+                if batch and (first or len(batch) >= batch_size):
+                    first = False
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            sftp._request(paramiko.sftp.CMD_CLOSE, handle)
+
     # ---------- Create / Read / Write ----------
     def create_file(self, path: str, content: str = "") -> Tuple[bool, str]:
         if not self.sftp:
             return False, "Not connected"
         try:
             path = _posix_abs(path)
-            with self.sftp.file(path, 'w') as f:
-                f.write(content)
-            try:
-                self.sftp.chmod(path, 0o644)
-            except Exception:
-                pass
+            self._atomic_write(path, content.encode('utf-8'), mode=0o644)
             return True, "File created successfully"
         except Exception as e:
             return False, str(e)
@@ -109,7 +246,7 @@ class FileOperations:
             return False, "Not connected"
         try:
             path = _posix_abs(path)
-            with self.sftp.file(path, 'rb') as f:
+            with self._interactive(), self.sftp.file(path, 'rb') as f:
                 data = f.read()
             try:
                 content = data.decode('utf-8', errors='replace')
@@ -119,17 +256,126 @@ class FileOperations:
         except Exception as e:
             return False, str(e)
 
-    def write_file(self, path: str, content: str) -> Tuple[bool, str]:
+    def open_reader(self, path: str, owns_sftp: bool = False) -> Tuple[bool, object]:
+        """
+        เปิดไฟล์สำหรับอ่านทีละช่วง (ไม่โหลดทั้งไฟล์) คืน (True, RangedReader) หรือ (False, ข้อความ error)
+        owns_sftp=True: reader ปิด session นี้ให้เองตอน close
+        """
+        if not self.sftp:
+            return False, "Not connected"
+        try:
+            return True, RangedReader(self.sftp, _posix_abs(path), interactive=self._interactive,
+                                      owns_sftp=owns_sftp)
+        except Exception as e:
+            return False, str(e)
+
+    def write_file(self, path: str, content: str, skip_unchanged: bool = True) -> Tuple[bool, str]:
         if not self.sftp:
             return False, "Not connected"
         try:
             path = _posix_abs(path)
-            with self.sftp.file(path, 'w') as f:
-                f.write(content)
+            data = content.encode('utf-8')
+            if skip_unchanged and len(data) >= SKIP_UNCHANGED_MIN_SIZE and self._is_unchanged(path, data):
+                return True, "File unchanged"
+            self._atomic_write(path, data)
             return True, "File written successfully"
         except Exception as e:
             return False, str(e)
 
+    def _atomic_write(self, path: str, data: bytes, mode: Optional[int] = None):
+        """
+        เขียนลงไฟล์ชั่วคราวข้างไฟล์จริงทีละก้อน → fsync → สลับเข้าที่ด้วย posix-rename
+        connection หลุดกลางทางไฟล์เดิมยังอยู่ครบ ไม่มีทางเหลือไฟล์ครึ่ง ๆ
+        """
+        # เขียนทับไฟล์ปลายทางของ symlink ไม่ใช่แทนที่ตัว link
+        for _ in range(MAX_SYMLINK_HOPS):
+            try:
+                target_stat = self.sftp.lstat(path)
+            except IOError:
+                target_stat = None
+            if target_stat is None or not stat.S_ISLNK(target_stat.st_mode):
+                break
+            path = _posix_abs(posixpath.join(posixpath.dirname(path), self.sftp.readlink(path)))
+        else:
+            # link วนหรือยาวเกิน: ห้ามแทนที่ตัว link และห้ามเอา mode 0o777 ของ link ไปใช้
+            raise IOError(f"Too many levels of symbolic links: {path}")
+        if mode is None:
+            mode = stat.S_IMODE(target_stat.st_mode) if target_stat is not None else 0o644
+
+        directory, name = posixpath.split(path)
+        tmp_path = posixpath.join(directory, f".{name}.save-{os.getpid()}")
+        engine = self.transfer_engine
+        chunk_size = engine.settings.chunk_size
+        try:
+            with self._interactive(), self.sftp.open(tmp_path, 'wb') as f:
+                f.set_pipelined(True)
+                view = memoryview(data)
+                for offset in range(0, len(view), chunk_size):
+                    f.write(view[offset:offset + chunk_size])
+                    engine._drain_acks(f, engine.settings.pipeline_depth)
+                # flush() ของ paramiko ไม่รอ ack ของ WRITE ต้องรอเองให้ครบ
+                # และตรวจสถานะทีละตัว ไม่งั้น WRITE ที่ล้ม (เช่น ดิสก์เต็ม) จะถูกเปลี่ยนชื่อทับไฟล์จริง
+                engine._drain_acks(f, 0)
+                f.chmod(mode)
+                self._fsync(f)
+                written = f.stat().st_size
+            if written != len(data):
+                raise IOError(f"size mismatch in save: wrote {written}, expected {len(data)}")
+            self._replace(tmp_path, path)
+        except BaseException:
+            try:
+                self.sftp.remove(tmp_path)
+            except Exception:
+                pass
+            raise
+
+    def _fsync(self, f: paramiko.SFTPFile):
+        if self._fsync_supported is False:
+            return
+        try:
+            # paramiko ยังไม่มี fsync ให้ จึงส่ง extended request เอง; ACK ของ WRITE ถูกรอครบใน _atomic_write แล้ว
+            self.sftp._request(paramiko.sftp.CMD_EXTENDED, "fsync@openssh.com", f.handle)
+            self._fsync_supported = True
+        except IOError:
+            if self._fsync_supported is None:
+                self._fsync_supported = False
+            else:
+                raise
+
+    def _replace(self, tmp_path: str, path: str):
+        try:
+            self.sftp.posix_rename(tmp_path, path)
+            return
+        except IOError:
+            pass
+        # server ไม่มี posix-rename: rename ธรรมดาของ SFTP v3 ทับไฟล์ที่มีอยู่ไม่ได้ จึงย้ายของเดิมหลบไว้ก่อน
+        backup_path = tmp_path + ".old"
+        try:
+            self.sftp.rename(path, backup_path)
+        except IOError:
+            backup_path = None
+        try:
+            self.sftp.rename(tmp_path, path)
+        except Exception:
+            if backup_path:
+                self.sftp.rename(backup_path, path)
+            raise
+        if backup_path:
+            self.sftp.remove(backup_path)
+
+    def _is_unchanged(self, path: str, data: bytes) -> bool:
+        """ไฟล์บน Pi มีเนื้อหาเดียวกับ data อยู่แล้วหรือไม่ (เทียบขนาดก่อน แล้วค่อยให้ Pi คำนวณ sha256)"""
+        try:
+            if self.sftp.stat(path).st_size != len(data):
+                return False
+            remote = RemoteChecksum(self.sftp.get_channel().get_transport(), path)
+            try:
+                return remote.result() == hashlib.sha256(data).hexdigest()
+            finally:
+                remote.close()
+        except Exception:
+            return False
+
     # ---------- Delete / Directory ops ----------
     def delete_file(self, path: str) -> Tuple[bool, str]:
         if not self.sftp:
@@ -186,13 +432,75 @@ class FileOperations:
         try:
             source = _posix_abs(source)
             destination = _posix_abs(destination)
-            ok, content = self.read_file(source)
-            if not ok:
-                return False, content
-            return self.write_file(destination, content)
+            if source == destination:
+                return False, "Source and destination are the same file"
+            source_stat = self.sftp.stat(source)
+            if stat.S_ISDIR(source_stat.st_mode):
+                return False, "Cannot copy a directory"
+            mode = stat.S_IMODE(source_stat.st_mode)
+
+            # คัดลอกบน Pi ก่อนเสมอ ข้อมูลไม่ต้องวิ่งผ่านเครือข่าย
+            if self._copy_with_extension(source, destination, mode):
+                return True, "File copied on server"
+            if self._copy_with_cp(source, destination):
+                return True, "File copied on server"
+            self.transfer_engine.copy_remote(self.sftp, source, destination, mode=mode, throttle=self._throttle)
+            return True, "File copied successfully"
         except Exception as e:
             return False, str(e)
 
+    def _copy_with_extension(self, source: str, destination: str, mode: int) -> bool:
+        """SFTP extension copy-data (OpenSSH 9.0+): server คัดลอกระหว่างสอง handle เอง"""
+        if self._copy_data_supported is False:
+            return False
+        with self.sftp.open(source, 'rb') as src:
+            if self._copy_data_supported is None:
+                self._copy_data_supported = self._probe_copy_data(src)
+                if not self._copy_data_supported:
+                    return False
+            # เปิดปลายทางหลังรู้แน่ว่า server รองรับแล้วเท่านั้น และตั้ง mode ก่อน ถ้าคัดลอกพังทางสำรองจะได้ไม่ต้องแก้ตาม
+            with self.sftp.open(destination, 'wb') as dst:
+                dst.chmod(mode)
+                # length 0 = คัดลอกจน EOF
+                status = self._extended_status("copy-data", src.handle, paramiko.sftp.int64(0),
+                                               paramiko.sftp.int64(0), dst.handle, paramiko.sftp.int64(0))
+        return status == paramiko.sftp.SFTP_OK
+
+    def _probe_copy_data(self, src: paramiko.SFTPFile) -> bool:
+        """
+        ถาม server ว่ารู้จัก copy-data ไหมโดยไม่แตะปลายทาง: สั่งคัดลอกเข้า handle อ่านอย่างเดียวของต้นทางเอง
+        server ที่รองรับจะปฏิเสธ (FAILURE/PERMISSION_DENIED) ส่วนที่ไม่รองรับตอบ OP_UNSUPPORTED
+        """
+        status = self._extended_status("copy-data", src.handle, paramiko.sftp.int64(0), paramiko.sftp.int64(1),
+                                       src.handle, paramiko.sftp.int64(0))
+        return status != paramiko.sftp.SFTP_OP_UNSUPPORTED
+
+    def _extended_status(self, name: str, *args) -> int:
+        """ส่ง extended request แล้วคืนรหัส status ดิบ (_request ของ paramiko แปลงทุก status เป็น IOError เหมือนกันหมด)"""
+        reply = _StatusReply()
+        num = self.sftp._async_request(reply, paramiko.sftp.CMD_EXTENDED, name, *args)
+        while reply.status is None:
+            # waitfor=None: อ่านทีละ packet แล้วส่งให้ reply._async_response
+            self.sftp._read_response()
+        if num != reply.num:
+            raise paramiko.SFTPError("Unexpected response")
+        return reply.status
+
+    def _copy_with_cp(self, source: str, destination: str) -> bool:
+        """cp บน Pi ผ่าน exec (--reflink=auto ใช้ CoW ได้บน btrfs/xfs, ext4 ก็แค่ copy ในเครื่อง)"""
+        transport = self.sftp.get_channel().get_transport()
+        quoted = f"-- {shlex.quote(source)} {shlex.quote(destination)}"
+        try:
+            # busybox cp ไม่รู้จัก --reflink จึงลองแบบธรรมดาต่อ
+            channel = open_exec_channel(transport, f"cp --reflink=auto {quoted} 2>/dev/null || cp {quoted}")
+        except paramiko.SSHException:
+            return False
+        try:
+            channel.shutdown_write()
+            return channel.recv_exit_status() == 0
+        finally:
+            channel.close()
+
     # ---------- Perms / Stat ----------
     def change_permissions(self, path: str, mode: int) -> Tuple[bool, str]:
         if not self.sftp:
@@ -210,18 +518,7 @@ class FileOperations:
         try:
             path = _posix_abs(path)
             stat_info = self.sftp.stat(path)
-            is_dir = stat.S_ISDIR(stat_info.st_mode)
-            permissions = self._get_permissions_str(stat_info.st_mode)
-            modified = datetime.fromtimestamp(stat_info.st_mtime)
-            return FileInfo(
-                name=posixpath.basename(path),             # ✅ basename แบบ POSIX
-                path=path,
-                size=getattr(stat_info, "st_size", 0),
-                is_dir=is_dir,
-                permissions=permissions,
-                modified_time=modified,
-                owner=str(getattr(stat_info, "st_uid", ""))
-            )
+            return FileInfo.from_attr(stat_info, posixpath.dirname(path), posixpath.basename(path))
         except Exception as e:
             print(f"Error getting file stat: {e}")
             return None
@@ -239,29 +536,66 @@ class FileOperations:
         return results
 
     # ---------- Transfer ----------
-    def upload_file(self, local_path: str, remote_path: str) -> Tuple[bool, str]:
+    def upload_file(self, local_path: str, remote_path: str, resume: bool = False,
+                    verify: Optional[bool] = None,
+                    on_progress: Optional[Callable[[TransferProgress], None]] = None) -> Tuple[bool, str]:
         if not self.sftp:
             return False, "Not connected"
+        if verify is None:
+            verify = self.transfer_engine.settings.verify
         try:
             remote_path = _posix_abs(remote_path)
-            self.sftp.put(local_path, remote_path)
-            try:
-                self.sftp.chmod(remote_path, 0o644)
-            except Exception:
-                pass
+            hasher = hashlib.sha256() if verify else None
+            progress = TransferProgress(callback=on_progress)
+            self.last_transfer = self.transfer_engine.upload(self.sftp, local_path, remote_path,
+                                                            mode=0o644, resume=resume, hasher=hasher,
+                                                            callback=progress.update,
+                                                            throttle=self._throttle)
+            progress.finish(self.last_transfer.phases)
+            if hasher is not None:
+                return True, self._verify_message("File uploaded successfully", remote_path, hasher.hexdigest())
             return True, "File uploaded successfully"
         except Exception as e:
             return False, str(e)
 
-    def download_file(self, remote_path: str, local_path: str) -> Tuple[bool, str]:
+    def download_file(self, remote_path: str, local_path: str, resume: bool = False,
+                      verify: Optional[bool] = None,
+                      on_progress: Optional[Callable[[TransferProgress], None]] = None) -> Tuple[bool, str]:
         if not self.sftp:
             return False, "Not connected"
+        if verify is None:
+            verify = self.transfer_engine.settings.verify
+        pending = None
         try:
             remote_path = _posix_abs(remote_path)
-            self.sftp.get(remote_path, local_path)
+            hasher = hashlib.sha256() if verify else None
+            if verify:
+                pending = RemoteChecksum(self.sftp.get_channel().get_transport(), remote_path)
+            progress = TransferProgress(callback=on_progress)
+            self.last_transfer = self.transfer_engine.download(self.sftp, remote_path, local_path,
+                                                              resume=resume, hasher=hasher,
+                                                              callback=progress.update,
+                                                              throttle=self._throttle)
+            progress.finish(self.last_transfer.phases)
+            if hasher is not None:
+                message = self._verify_message("File downloaded successfully", remote_path,
+                                               hasher.hexdigest(), pending)
+                pending = None
+                return True, message
             return True, "File downloaded successfully"
         except Exception as e:
             return False, str(e)
+        finally:
+            if pending is not None:
+                pending.close()
+
+    def _verify_message(self, message: str, remote_path: str, digest: str,
+                        pending: Optional[RemoteChecksum] = None) -> str:
+        # ไม่ตรงกันจะ raise ChecksumMismatch ให้ผู้เรียกคืน False
+        transport = self.sftp.get_channel().get_transport()
+        if compare_remote_digest(transport, remote_path, digest, pending):
+            return f"{message} (sha256 verified)"
+        return f"{message} (checksum not verified)"
 
     # ---------- Disk Usage ----------
     def get_disk_usage(self, path: str = "/") -> Dict[str, int]:
@@ -325,20 +659,6 @@ class FileOperations:
             return False, str(e)
 
     # ---------- Internal helpers ----------
-    def _get_permissions_str(self, mode: int) -> str:
-        perms = []
-        perms.append('d' if stat.S_ISDIR(mode) else '-')
-        perms.append('r' if mode & stat.S_IRUSR else '-')
-        perms.append('w' if mode & stat.S_IWUSR else '-')
-        perms.append('x' if mode & stat.S_IXUSR else '-')
-        perms.append('r' if mode & stat.S_IRGRP else '-')
-        perms.append('w' if mode & stat.S_IWGRP else '-')
-        perms.append('x' if mode & stat.S_IXGRP else '-')
-        perms.append('r' if mode & stat.S_IROTH else '-')
-        perms.append('w' if mode & stat.S_IWOTH else '-')
-        perms.append('x' if mode & stat.S_IXOTH else '-')
-        return ''.join(perms)
-
     def _remove_directory_recursive(self, path: str):
         path = _posix_abs(path)
         for item in self.sftp.listdir_attr(path):
@@ -355,17 +675,7 @@ class FileOperations:
             for item in self.sftp.listdir_attr(path):
                 item_path = _pjoin(path, item.filename)  # ✅ POSIX join
                 if pattern in item.filename.lower():
-                    is_dir = stat.S_ISDIR(item.st_mode)
-                    permissions = self._get_permissions_str(item.st_mode)
-                    modified = datetime.fromtimestamp(item.st_mtime)
-                    results.append(FileInfo(
-                        name=item.filename,
-                        path=item_path,
-                        size=getattr(item, "st_size", 0),
-                        is_dir=is_dir,
-                        permissions=permissions,
-                        modified_time=modified
-                    ))
+                    results.append(FileInfo.from_attr(item, path))
                 if stat.S_ISDIR(item.st_mode):
                     self._search_recursive(item_path, pattern, results)
         except Exception:
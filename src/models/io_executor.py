@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Set
+
+
+# คำสั่ง terminal ที่รันพร้อมกันได้ (แต่ละคำสั่งมี channel ของตัวเอง)
+COMMAND_WORKERS = 2
+
+
+class IOExecutor:
+    """
+    ชั้นรันงานเครือข่ายของ connection หนึ่งตัว คืน Future ให้ผู้เรียกเสมอ
+    - งานที่ใช้ SSH/SFTP session หลักวิ่งบน thread เดียวตามลำดับ
+      (SFTPClient ของ paramiko ใช้พร้อมกันหลาย thread ไม่ได้: response ของอีก thread อาจถูกอ่านทิ้ง)
+    - คำสั่ง terminal เปิด exec channel ของตัวเอง จึงแยกไปอีก lane ไม่ให้คำสั่งที่รันนานขวางการเปิดโฟลเดอร์
+    """
+
+    def __init__(self, command_workers: int = COMMAND_WORKERS):
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="remote-io",
+                                      initializer=self._mark_io_thread)
+        self._commands = ThreadPoolExecutor(max_workers=command_workers, thread_name_prefix="remote-cmd")
+        self._io_thread_id = None
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """รันบน I/O thread ของ session หลัก"""
+        return self._track(self._io.submit(fn, *args, **kwargs))
+
+    def submit_command(self, fn: Callable, *args, **kwargs) -> Future:
+        """รันงานที่ใช้ exec channel แยก (เช่น คำสั่ง terminal)"""
+        return self._track(self._commands.submit(fn, *args, **kwargs))
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """รันบน I/O thread แล้วรอผล (ถ้าอยู่บน I/O thread อยู่แล้วก็รันเลย กัน deadlock)"""
+        if self.in_io_thread():
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def is_busy(self) -> bool:
+        """มีงานที่ยังรอ/กำลังรันอยู่หรือไม่"""
+        with self._lock:
+            return bool(self._pending)
+
+    def in_io_thread(self) -> bool:
+        return threading.get_ident() == self._io_thread_id
+
+    def cancel_pending(self):
+        """ยกเลิกงานที่ยังไม่เริ่ม (งานที่กำลังรันอยู่ปล่อยให้จบเอง) เช่นตอนตัดการเชื่อมต่อ"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._io.shutdown(wait=False)
+        self._commands.shutdown(wait=False)
+
+    # ---------- Internal helpers ----------
+    def _mark_io_thread(self):
+        self._io_thread_id = threading.get_ident()
+
+    def _track(self, future: Future) -> Future:
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._untrack)
+        return future
+
+    def _untrack(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from models.file_operations import FileInfo
+
+
+class ListingView:
+    """
+    view-model ของ listing โฟลเดอร์ปัจจุบัน: เรียง/กรองในหน่วยความจำล้วน ไม่ยิงคำขอไป Pi
+    - ชื่อแบบ casefold คำนวณครั้งเดียวต่อ listing, ลำดับของแต่ละคีย์เรียงคำนวณครั้งแรกที่ถูกใช้แล้วเก็บไว้
+    - พิมพ์ค้นหาต่อจากคำเดิม กรองต่อจากผลรอบก่อนแทนการไล่ทั้งโฟลเดอร์ใหม่
+    """
+
+    def __init__(self):
+        self.entries: List[FileInfo] = []
+        self.sort_key = "name"
+        self.sort_reverse = False
+        self.pattern = ""
+        self._folded: List[str] = []
+        self._files_first: List[bool] = []
+        self._orders: Dict[str, List[int]] = {}
+        # (คำค้นที่ใช้, index ที่ผ่านตัวกรองเรียงตามลำดับเดิม)
+        self._matched: Tuple[str, Optional[List[int]]] = ("", None)
+        self._lock = threading.Lock()
+
+    def set_entries(self, entries: List[FileInfo]):
+        with self._lock:
+            self.entries = entries
+            self._folded = [e.name.casefold() for e in entries]
+            # False = โฟลเดอร์ (เรียงขึ้นก่อน)
+            self._files_first = [not e.is_dir for e in entries]
+            self._orders = {}
+            self._matched = ("", None)
+
+    def set_sort(self, key: str, reverse: bool = False):
+        with self._lock:
+            self.sort_key = key
+            self.sort_reverse = reverse
+
+    def set_filter(self, pattern: str):
+        with self._lock:
+            self.pattern = pattern.casefold()
+
+    def matches(self, entry: FileInfo) -> bool:
+        return not self.pattern or self.pattern in entry.name.casefold()
+
+    def rows(self) -> List[FileInfo]:
+        """รายการที่ผ่านตัวกรองตามลำดับที่เลือกอยู่"""
+        with self._lock:
+            order = self._order()
+            matched = self._filter()
+            if matched is None:
+                picked = order
+            else:
+                keep = bytearray(len(self.entries))
+                for i in matched:
+                    keep[i] = 1
+                picked = [i for i in order if keep[i]]
+            entries = self.entries
+            rows = [entries[i] for i in picked]
+        if self.sort_reverse:
+            rows.reverse()
+        return rows
+
+    # ---------- Internal helpers ----------
+    def _order(self) -> List[int]:
+        order = self._orders.get(self.sort_key)
+        if order is None:
+            if self.sort_key == "size":
+                keys = [e.size for e in self.entries]
+            elif self.sort_key == "modified":
+                keys = [e.mtime for e in self.entries]
+            else:
+                keys = self._folded
+            # เรียงตามคีย์ แล้วเรียงซ้ำแบบ stable ให้โฟลเดอร์ขึ้นก่อน (เร็วกว่า key แบบ tuple)
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            order.sort(key=self._files_first.__getitem__)
+            self._orders[self.sort_key] = order
+        return order
+
+    def _filter(self) -> Optional[List[int]]:
+        pattern = self.pattern
+        if not pattern:
+            return None
+        previous, matched = self._matched
+        if previous == pattern:
+            return matched
+        # คำค้นใหม่มีคำเดิมอยู่ในตัว → ผลลัพธ์เป็นส่วนหนึ่งของผลเดิมเสมอ
+        if matched is not None and previous and previous in pattern:
+            candidates = matched
+        else:
+            candidates = range(len(self.entries))
+        folded = self._folded
+        matched = [i for i in candidates if pattern in folded[i]]
+        self._matched = (pattern, matched)
+        return matched
@@ -0,0 +1,140 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional, Set
+
+
+# ค่าคงที่จาก <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# รวม event ที่มาถี่ ๆ (เช่น ไฟล์ที่กำลังดาวน์โหลดถูกเขียนต่อเนื่อง) เป็น delta เดียว (วินาที)
+LOCAL_WATCH_DEBOUNCE = 0.15
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class LocalWatcher:
+    """
+    เฝ้าโฟลเดอร์เดียวบนเครื่องเราด้วย inotify ของ Linux (ผ่าน ctypes ไม่ต้องลงแพ็กเกจเพิ่ม)
+    แจ้ง on_delta(path, ชื่อที่ถูกสร้าง/แก้ไข, ชื่อที่หายไป) จาก thread ของ watcher
+    ถ้าไม่มี inotify (ไม่ใช่ Linux) watch() จะไม่ทำอะไร ใช้ปุ่มรีเฟรชตามเดิม
+    on_delta(path, None, None) = event ล้นคิว ต้องสแกนใหม่ทั้งโฟลเดอร์
+    """
+
+    def __init__(self, on_delta: Callable[[str, Optional[Set[str]], Optional[Set[str]]], None]):
+        self.on_delta = on_delta
+        self.path: Optional[str] = None
+        self._libc = _load_libc()
+        self._fd = -1
+        self._wd = -1
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self._libc is not None
+
+    def watch(self, path: str):
+        if not self.available:
+            return
+        with self._lock:
+            if path == self.path:
+                return
+            if self._fd < 0:
+                self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if self._fd < 0:
+                    self._libc = None
+                    return
+            if self._wd >= 0:
+                self._libc.inotify_rm_watch(self._fd, self._wd)
+            self._wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            self.path = path if self._wd >= 0 else None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._wd >= 0:
+                self._libc.inotify_rm_watch(self._fd, self._wd)
+            self._wd = -1
+            self.path = None
+
+    # ---------- Internal helpers ----------
+    def _run(self):
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        flush_at = None
+        watched = None
+        while True:
+            timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            with self._lock:
+                wd, path = self._wd, self.path
+            if path != watched:
+                # ย้ายโฟลเดอร์แล้ว event ที่ค้างของโฟลเดอร์เก่าทิ้งได้เลย
+                changed, removed, flush_at, watched = set(), set(), None, path
+
+            if ready:
+                try:
+                    data = os.read(self._fd, 65536)
+                except BlockingIOError:
+                    data = b''
+                overflow = self._parse(data, wd, changed, removed)
+                if overflow and path:
+                    changed, removed, flush_at = set(), set(), None
+                    self.on_delta(path, None, None)
+                    continue
+                if flush_at is None and (changed or removed):
+                    flush_at = time.monotonic() + LOCAL_WATCH_DEBOUNCE
+
+            if flush_at is not None and time.monotonic() >= flush_at:
+                if path and (changed or removed):
+                    self.on_delta(path, changed, removed)
+                changed, removed, flush_at = set(), set(), None
+
+    @staticmethod
+    def _parse(data: bytes, wd: int, changed: Set[str], removed: Set[str]) -> bool:
+        offset = 0
+        overflow = False
+        while offset < len(data):
+            event_wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b'\0'))
+            offset += 16 + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif event_wd != wd or not name:
+                continue
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(name)
+                changed.discard(name)
+            else:
+                changed.add(name)
+                removed.discard(name)
+        return overflow
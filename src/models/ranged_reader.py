@@ -0,0 +1,171 @@
+import bisect
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import paramiko
+
+
+READ_BLOCK_SIZE = 64 * 1024
+# block ที่เก็บไว้ในหน่วยความจำสูงสุด (64 x 64KB = 4MB ต่อไฟล์ที่เปิดดู)
+CACHE_BLOCKS = 64
+# บรรทัดที่ยาวกว่านี้ (หรือไฟล์ binary ที่ไม่มี \n) ถูกตัดแสดงเป็นหลายบรรทัด
+MAX_LINE_BYTES = 16 * 1024
+
+
+class NotCached(Exception):
+    """ช่วงที่ขอยังไม่อยู่ใน cache (อ่านแบบ cached_only) ต้องไปอ่านจากเครือข่ายนอก Tk thread"""
+
+
+class LineIndex:
+    """
+    offset ของต้นบรรทัด นับต่อเนื่องจากต้นไฟล์
+    โตขึ้นทีละ block ตามที่ถูกอ่านผ่านไปตามลำดับ ไม่ต้องสแกนทั้งไฟล์ก่อน
+    """
+
+    def __init__(self):
+        self.offsets = array('Q', [0])
+        self.scanned = 0
+        self.complete = False
+
+    def feed(self, data: bytes, eof: bool = False):
+        base = self.scanned
+        pos = data.find(b'\n')
+        while pos != -1:
+            self.offsets.append(base + pos + 1)
+            pos = data.find(b'\n', pos + 1)
+        self.scanned += len(data)
+        self.complete = eof
+
+    def line_of(self, offset: int) -> Optional[int]:
+        """เลขบรรทัด (เริ่มที่ 0) ของ offset หรือ None ถ้ายังสแกนไปไม่ถึง"""
+        if offset > self.scanned:
+            return None
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+
+class RangedReader:
+    """
+    อ่านไฟล์บน Pi เป็นช่วง ๆ ผ่าน handle เดียวที่เปิดค้างไว้ พร้อม cache แบบ LRU ทีละ block
+    ใช้กับ viewer ที่ต้องการแค่หน้าต่างที่มองเห็น ไฟล์ใหญ่แค่ไหนก็เปิดได้ทันที
+    """
+
+    def __init__(self, sftp: paramiko.SFTPClient, path: str, block_size: int = READ_BLOCK_SIZE,
+                 interactive: Optional[Callable] = None, owns_sftp: bool = False):
+        self.path = path
+        self._sftp = sftp
+        self._owns_sftp = owns_sftp
+        self.block_size = block_size
+        self._interactive = interactive or nullcontext
+        self._handle = sftp.open(path, 'rb')
+        self.size = self._handle.stat().st_size
+        self.index = LineIndex()
+        self.index.complete = self.size == 0
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, offset: int, length: int, cached_only: bool = False) -> bytes:
+        offset = max(0, offset)
+        end = min(self.size, offset + length)
+        if end <= offset:
+            return b''
+        first = offset // self.block_size
+        last = (end - 1) // self.block_size
+        blocks = self._load(range(first, last + 1), cached_only)
+        data = b''.join(blocks[n] for n in range(first, last + 1))
+        start = first * self.block_size
+        return data[offset - start:end - start]
+
+    def prefetch(self, offset: int, length: int):
+        """ดึง block ช่วงนี้มาเก็บใน cache ล่วงหน้า"""
+        offset = max(0, offset)
+        end = min(self.size, offset + length)
+        if end > offset:
+            self._load(range(offset // self.block_size, (end - 1) // self.block_size + 1))
+
+    def read_lines(self, offset: int, count: int,
+                   cached_only: bool = False) -> Tuple[List[str], List[int], int]:
+        """
+        อ่านได้ไม่เกิน count บรรทัดตั้งแต่ offset (ต้องเป็นต้นบรรทัด) → (ข้อความ, offset ต้นบรรทัด, offset ถัดไป)
+        cached_only=True: ไม่แตะเครือข่าย ถ้าต้องใช้ block ที่ยังไม่มีจะ raise NotCached
+        """
+        lines: List[str] = []
+        starts: List[int] = []
+        buf = b''
+        buf_start = offset
+        while len(lines) < count and offset < self.size:
+            rel = offset - buf_start
+            newline = buf.find(b'\n', rel, rel + MAX_LINE_BYTES)
+            if newline == -1 and len(buf) - rel < MAX_LINE_BYTES and buf_start + len(buf) < self.size:
+                buf = buf[rel:] + self.read(buf_start + len(buf), self.block_size, cached_only)
+                buf_start = offset
+                continue
+            end = newline + 1 if newline != -1 else min(len(buf), rel + MAX_LINE_BYTES)
+            lines.append(buf[rel:end].rstrip(b'\r\n').decode('utf-8', errors='replace'))
+            starts.append(offset)
+            offset = buf_start + end
+        return lines, starts, offset
+
+    def line_start(self, offset: int, cached_only: bool = False) -> int:
+        """offset ต้นบรรทัดที่มี offset นี้อยู่"""
+        offset = min(max(0, offset), self.size)
+        if offset == 0:
+            return 0
+        low = max(0, offset - MAX_LINE_BYTES)
+        newline = self.read(low, offset - low, cached_only).rfind(b'\n')
+        return low + newline + 1 if newline != -1 else low
+
+    def line_start_before(self, offset: int, count: int, cached_only: bool = False) -> int:
+        """ถอยจากต้นบรรทัด offset ขึ้นไป count บรรทัด"""
+        for _ in range(count):
+            if offset <= 0:
+                break
+            offset = self.line_start(offset - 1, cached_only)
+        return offset
+
+    def close(self):
+        with self._lock:
+            self._blocks.clear()
+            self._handle.close()
+            if self._owns_sftp:
+                self._sftp.close()
+
+    # ---------- Internal helpers ----------
+    def _load(self, numbers: Iterable[int], cached_only: bool = False) -> Dict[int, bytes]:
+        with self._lock:
+            found: Dict[int, bytes] = {}
+            missing = []
+            for n in numbers:
+                block = self._blocks.get(n)
+                if block is None:
+                    missing.append(n)
+                else:
+                    self._blocks.move_to_end(n)
+                    found[n] = block
+
+            if missing and cached_only:
+                raise NotCached(missing[0])
+            if missing:
+                ranges = [(n * self.block_size, min(self.block_size, self.size - n * self.block_size))
+                          for n in missing]
+                with self._interactive():
+                    for n, data in zip(missing, self._handle.readv(ranges)):
+                        found[n] = data
+                        self._blocks[n] = data
+                while len(self._blocks) > CACHE_BLOCKS:
+                    self._blocks.popitem(last=False)
+
+            self._advance_index(found)
+            return found
+
+    def _advance_index(self, blocks: Dict[int, bytes]):
+        # ป้อน block ที่ต่อจากจุดที่สแกนถึงเข้า index (อ่านข้ามไปไกลจะยังไม่ถูกนับจนกว่าจะอ่านช่วงกลางครบ)
+        n = self.index.scanned // self.block_size
+        while not self.index.complete:
+            data = blocks.get(n) or self._blocks.get(n)
+            if data is None:
+                break
+            self.index.feed(data, eof=(n + 1) * self.block_size >= self.size)
+            n += 1
@@ -0,0 +1,131 @@
+import shlex
+import socket
+import threading
+import time
+from typing import Callable, Optional, Set
+
+import paramiko
+
+from models.ssh_connection import remote_command_exists
+
+
+INOTIFY_EVENTS = "create,delete,modify,attrib,close_write,moved_from,moved_to"
+# รวม event ที่มาติด ๆ กัน (เช่น modify ระหว่างเขียนไฟล์) เป็น delta เดียว (วินาที)
+EVENT_COALESCE = 0.2
+# poll สำรองเมื่อไม่มี inotifywait: ไม่เปลี่ยน → ห่างขึ้นทีละเท่าตัว, เปลี่ยน → กลับไปถี่สุด
+POLL_MIN_INTERVAL = 2.0
+POLL_MAX_INTERVAL = 30.0
+
+
+class RemoteWatcher:
+    """
+    ติดตามโฟลเดอร์เดียวบน Pi แล้วแจ้งการเปลี่ยนแปลง
+    - มี inotifywait: รัน `inotifywait -m` ค้างไว้บน exec channel เดียว ส่งต่อเป็น delta
+      on_delta(path, ชื่อที่ถูกสร้าง/แก้ไข, ชื่อที่หายไป)
+    - ไม่มี: poll แบบปรับช่วงเวลาเอง on_poll(path) คืน True เมื่อพบการเปลี่ยนแปลง
+    ย้ายโฟลเดอร์ด้วย watch() เมื่อไหร่ก็ได้ ตัวเก่าจะถูกหยุดเอง
+    """
+
+    def __init__(self, transport: paramiko.Transport,
+                 on_delta: Callable[[str, Set[str], Set[str]], None],
+                 on_poll: Callable[[str], bool],
+                 is_busy: Callable[[], bool]):
+        self.transport = transport
+        self.on_delta = on_delta
+        self.on_poll = on_poll
+        self.is_busy = is_busy
+        self.path: Optional[str] = None
+        self._stop: Optional[threading.Event] = None
+        self._has_inotify: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    def watch(self, path: str):
+        with self._lock:
+            if path == self.path and self._stop is not None:
+                return
+            self._stop_locked()
+            self.path = path
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, args=(path, self._stop), daemon=True).start()
+
+    def stop(self):
+        with self._lock:
+            self._stop_locked()
+            self.path = None
+
+    # ---------- Internal helpers ----------
+    def _stop_locked(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def _run(self, path: str, stop: threading.Event):
+        try:
+            if self._has_inotify is None:
+                self._has_inotify = remote_command_exists(self.transport, "inotifywait")
+            if self._has_inotify:
+                self._watch_inotify(path, stop)
+        except Exception as e:
+            print(f"Error watching directory: {e}")
+        # inotify ใช้ไม่ได้หรือหลุดกลางทาง → poll แทน
+        if not stop.is_set():
+            self._watch_polling(path, stop)
+
+    def _watch_inotify(self, path: str, stop: threading.Event):
+        channel = self.transport.open_session()
+        # ขอ pty ไว้ ปิด channel แล้ว inotifywait ได้ SIGHUP จบตามทันที ไม่ค้างบน Pi
+        channel.get_pty()
+        channel.exec_command(
+            f"exec inotifywait -m -q -e {INOTIFY_EVENTS} --format '%e/%f' -- {shlex.quote(path)}"
+        )
+        channel.settimeout(EVENT_COALESCE / 2)
+        buf = b''
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        flush_at = None
+        try:
+            while not stop.is_set():
+                try:
+                    data = channel.recv(32768)
+                    if not data:
+                        # inotifywait จบไปแล้ว ส่ง delta ที่รวมค้างไว้ก่อนค่อยออก
+                        if (changed or removed) and not stop.is_set():
+                            self.on_delta(path, changed, removed)
+                        return
+                    buf += data
+                except socket.timeout:
+                    pass
+
+                *lines, buf = buf.split(b'\n')
+                for line in lines:
+                    # ชื่อไฟล์มี "/" ไม่ได้ จึงใช้เป็นตัวคั่นระหว่างชื่อ event กับชื่อไฟล์
+                    events, _, name = line.rstrip(b'\r').decode('utf-8', errors='replace').partition('/')
+                    if not name:
+                        continue
+                    if 'DELETE' in events or 'MOVED_FROM' in events:
+                        removed.add(name)
+                        changed.discard(name)
+                    else:
+                        changed.add(name)
+                        removed.discard(name)
+                    if flush_at is None:
+                        flush_at = time.monotonic() + EVENT_COALESCE
+
+                if flush_at is not None and time.monotonic() >= flush_at and not stop.is_set():
+                    self.on_delta(path, changed, removed)
+                    changed, removed = set(), set()
+                    flush_at = None
+        finally:
+            channel.close()
+
+    def _watch_polling(self, path: str, stop: threading.Event):
+        interval = POLL_MIN_INTERVAL
+        while not stop.wait(interval):
+            if self.is_busy():
+                continue
+            try:
+                changed = self.on_poll(path)
+            except Exception as e:
+                print(f"Error polling directory: {e}")
+                changed = False
+            interval = POLL_MIN_INTERVAL if changed else min(interval * 2, POLL_MAX_INTERVAL)
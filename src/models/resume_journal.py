@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+class ResumeJournal:
+    """
+    บันทึกงานส่งไฟล์ที่ยังไม่เสร็จลง ~/.gui_os/transfers.json
+    เพื่อให้เปิดแอปใหม่แล้วส่งต่อจาก offset เดิมได้
+    """
+
+    def __init__(self, journal_file: str = "transfers.json"):
+        self.config_dir = Path.home() / ".gui_os"
+        self.journal_file = self.config_dir / journal_file
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+        self._dirty = False
+        self._last_save = 0.0
+
+    @staticmethod
+    def make_key(connection_key: str, direction: str, local_path: str, remote_path: str) -> str:
+        return "|".join([connection_key, direction, local_path, remote_path])
+
+    def add(self, connection_key: str, direction: str, local_path: str, remote_path: str,
+            is_dir: bool = False) -> bool:
+        """เพิ่มงานลง journal; คืน True ถ้ามีงานเดิมค้างอยู่แล้ว (ควร resume)"""
+        key = self.make_key(connection_key, direction, local_path, remote_path)
+        with self._lock:
+            existed = key in self._entries
+            self._entries[key] = {
+                "connection": connection_key,
+                "direction": direction,
+                "local_path": local_path,
+                "remote_path": remote_path,
+                "is_dir": is_dir,
+                "updated": time.time()
+            }
+            self._dirty = True
+        return existed
+
+    def remove(self, connection_key: str, direction: str, local_path: str, remote_path: str):
+        key = self.make_key(connection_key, direction, local_path, remote_path)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def get_pending(self, connection_key: str) -> List[Dict]:
+        with self._lock:
+            return [dict(e) for e in self._entries.values() if e.get("connection") == connection_key]
+
+    def save_if_due(self, min_interval: float = 1.0):
+        # คิวใหญ่ ๆ เปลี่ยนสถานะถี่มาก จึงเขียนไฟล์ไม่เกินทุก min_interval วินาที
+        if time.time() - self._last_save >= min_interval:
+            self.save()
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {"transfers": list(self._entries.values())}
+                self._dirty = False
+                self._last_save = time.time()
+
+            try:
+                self.config_dir.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.journal_file.with_suffix(".tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump(data, f, indent=2)
+                tmp_file.replace(self.journal_file)
+            except Exception as e:
+                print(f"Error saving transfer journal: {e}")
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.journal_file.exists():
+            return {}
+
+        try:
+            with open(self.journal_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+
+        entries = {}
+        for e in data.get("transfers", []):
+            try:
+                key = self.make_key(e["connection"], e["direction"], e["local_path"], e["remote_path"])
+            except KeyError:
+                continue
+            entries[key] = e
+        return entries
@@ -4,6 +4,9 @@ from typing import Optional, Tuple, Callable
 from pathlib import Path
 import time
 import posixpath
+from models.transfer_engine import TransferSettings, COMPRESSION_SSH
+from models.bandwidth import BandwidthLimiter
+from models.io_executor import IOExecutor
 
 
 def _clean_remote_path(p: Optional[str]) -> str:
@@ -23,13 +26,39 @@ def _clean_remote_path(p: Optional[str]) -> str:
     return p
 
 
+def open_exec_channel(transport: paramiko.Transport, command: str) -> paramiko.Channel:
+    """
+    เปิด channel ใหม่บน transport เดิมแล้วรันคำสั่ง สำหรับงานที่ต้องส่ง/รับข้อมูลแบบ stream
+    (execute_command อ่าน output หลังคำสั่งจบ จึงไม่เหมาะกับข้อมูลขนาดใหญ่)
+    """
+    channel = transport.open_session()
+    channel.exec_command(command)
+    return channel
+
+
+def remote_command_exists(transport: paramiko.Transport, name: str) -> bool:
+    channel = open_exec_channel(transport, f"command -v {name} >/dev/null 2>&1")
+    try:
+        return channel.recv_exit_status() == 0
+    finally:
+        channel.close()
+
+
 class SSHConnection:
     def __init__(self):
         self.client: Optional[paramiko.SSHClient] = None
-        self.sftp: Optional[paramiko.SFTPClient] = None
+        # session หลัก ใช้ได้เฉพาะบน I/O thread (ดู get_sftp)
+        self._sftp: Optional[paramiko.SFTPClient] = None
         self.connected = False
         self.current_path = "/"
         self.on_progress: Optional[Callable[[str], None]] = None
+        self.transfer_settings = TransferSettings()
+        self.bandwidth = BandwidthLimiter()
+        # งานทุกอย่างที่ใช้ session หลักต้องวิ่งผ่าน io (thread เดียว) เท่านั้น
+        self.io = IOExecutor()
+        self.host = ""
+        self.port = 22
+        self.username = ""
 
     def connect(
         self,
@@ -87,7 +116,8 @@ class SSHConnection:
                         port=port,
                         username=username,
                         pkey=key,
-                        timeout=15
+                        timeout=15,
+                        compress=self.transfer_settings.compression == COMPRESSION_SSH
                     )
                 except paramiko.ssh_exception.SSHException as e:
                     if "private key file is encrypted" in str(e).lower() or "passphrase" in str(e).lower():
@@ -104,18 +134,23 @@ class SSHConnection:
                     port=port,
                     username=username,
                     password=password,
-                    timeout=15
+                    timeout=15,
+                    compress=self.transfer_settings.compression == COMPRESSION_SSH
                 )
             else:
                 logger.error("No authentication method provided", "SSHConnection.connect")
                 return False, "No authentication method provided"
 
             time.sleep(0.5)
-            self.sftp = self.client.open_sftp()
+            self._sftp = self.client.open_sftp()
             self.connected = True
+            self.bandwidth.configure(self.transfer_settings.rate_limit, self.transfer_settings.job_rate_limit)
+            self.host = host
+            self.port = port
+            self.username = username
 
             # บาง server คืน None เมื่ออยู่ root → บังคับ normalize
-            cwd = self.sftp.getcwd()
+            cwd = self._sftp.getcwd()
             self.current_path = _clean_remote_path(cwd)
 
             self._report_progress("success")
@@ -231,8 +266,9 @@ class SSHConnection:
             self.on_progress(status, **kwargs)
 
     def disconnect(self):
-        if self.sftp:
-            self.sftp.close()
+        self.io.cancel_pending()
+        if self._sftp:
+            self._sftp.close()
         if self.client:
             self.client.close()
         self.connected = False
@@ -250,7 +286,10 @@ class SSHConnection:
 
         try:
             logger.debug(f"Executing command: {command}", "SSHConnection.execute_command")
-            stdin, stdout, stderr = self.client.exec_command(command)
+            # คำสั่งจาก terminal มาก่อนงานส่งไฟล์ เฉพาะตอนเปิด channel ส่งคำสั่ง
+            # ไม่ถือไว้ระหว่างรอคำสั่งจบ (apt upgrade, tail -f) ไม่งั้นงานส่งไฟล์จะช้าไปตลอดทั้งคำสั่ง
+            with self.bandwidth.interactive():
+                stdin, stdout, stderr = self.client.exec_command(command)
             exit_code = stdout.channel.recv_exit_status()
             stdout_text = stdout.read().decode()
             stderr_text = stderr.read().decode()
@@ -265,7 +304,27 @@ class SSHConnection:
             return "", str(e), 1
 
     def get_sftp(self) -> Optional[paramiko.SFTPClient]:
-        return self.sftp if self.is_connected() else None
+        """session หลัก ให้เฉพาะโค้ดที่รันบน I/O thread (SFTPClient ใช้ข้าม thread ไม่ได้)"""
+        if not self.io.in_io_thread():
+            raise RuntimeError("main SFTP session is only available on the I/O thread")
+        return self._sftp if self.is_connected() else None
+
+    def get_transport(self) -> Optional[paramiko.Transport]:
+        return self.client.get_transport() if self.is_connected() else None
+
+    def open_exec_channel(self, command: str) -> paramiko.Channel:
+        if not self.is_connected():
+            raise RuntimeError("SSH not connected")
+        return open_exec_channel(self.client.get_transport(), command)
+
+    def open_sftp_session(self) -> paramiko.SFTPClient:
+        """SFTP session แยกบน transport เดิม สำหรับงานเบื้องหลังที่ไม่ควรใช้ session หลักของ UI ร่วม"""
+        if not self.is_connected():
+            raise RuntimeError("SSH not connected")
+        return paramiko.SFTPClient.from_transport(self.client.get_transport())
+
+    def get_connection_key(self) -> str:
+        return f"{self.username}@{self.host}:{self.port}"
 
     def change_directory(self, path: str):
         """
@@ -275,22 +334,22 @@ class SSHConnection:
         - อัปเดต self.current_path แบบ normalize เสมอ
         - log เป้าหมายตอน fail เพื่อดีบัก Errno 2 ได้ง่าย
         """
-        if not self.sftp:
+        if not self._sftp:
             raise RuntimeError("SFTP not connected")
 
         from utils.logger import logger  # import ภายในเพื่อเลี่ยงปัญหาวงจรอิมพอร์ต
 
         target = _clean_remote_path(path)
         try:
-            self.sftp.chdir(target)
+            self._sftp.chdir(target)
         except Exception as e1:
             try:
-                canonical = self.sftp.normalize(target)
-                self.sftp.chdir(canonical)
+                canonical = self._sftp.normalize(target)
+                self._sftp.chdir(canonical)
                 target = canonical
             except Exception as e2:
                 try:
-                    cwd_before = self.sftp.getcwd()
+                    cwd_before = self._sftp.getcwd()
                 except Exception:
                     cwd_before = None
                 logger.error(
@@ -299,8 +358,12 @@ class SSHConnection:
                 )
                 raise
 
-        cwd = self.sftp.getcwd() or target
+        cwd = self._sftp.getcwd() or target
         self.current_path = _clean_remote_path(cwd)
 
+    def set_current_path(self, path: str):
+        """จำโฟลเดอร์ที่ browser เปิดสำเร็จล่าสุด (FileController นำทางเองโดยไม่ผ่าน change_directory)"""
+        self.current_path = _clean_remote_path(path)
+
     def get_current_path(self) -> str:
         return self.current_path or "/"
@@ -0,0 +1,394 @@
+import ctypes
+import ctypes.util
+import hashlib
+import mmap
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import paramiko
+
+from models.transfer_progress import format_rate
+
+
+# paramiko ตั้ง MAX_REQUEST_SIZE ไว้ 32KB แต่ OpenSSH sftp-server รับได้ถึง ~256KB ต่อ request
+DEFAULT_CHUNK_SIZE = 32768
+MIN_CHUNK_SIZE = 4096
+MAX_CHUNK_SIZE = 255 * 1024
+DEFAULT_PIPELINE_DEPTH = 64
+# ขนาดบล็อกท้ายไฟล์ที่ใช้ตรวจว่าส่วนที่ส่งไปแล้วตรงกันก่อน resume
+RESUME_CHECK_SIZE = 65536
+# ไฟล์ดาวน์โหลดที่ใหญ่กว่านี้จะจองพื้นที่บนดิสก์ล่วงหน้า (ลด fragmentation บน SD card)
+PREALLOCATE_MIN_SIZE = 64 * 1024 * 1024
+# จองพื้นที่โดยไม่ขยายขนาดไฟล์ ขนาดไฟล์จึงเท่ากับข้อมูลที่รับจริงเสมอ แม้โปรแกรมถูก kill กลางทาง
+FALLOC_FL_KEEP_SIZE = 0x01
+
+# นโยบายบีบอัด: auto = เลือกต่อไฟล์ตามอัตราบีบอัด/แบนด์วิดท์/CPU ของ Pi, ssh = เปิด compression ระดับ SSH ทั้ง connection
+COMPRESSION_AUTO = "auto"
+COMPRESSION_OFF = "off"
+COMPRESSION_SSH = "ssh"
+
+
+_fallocate = False
+
+
+def _libc_fallocate():
+    """fallocate(2) ของ Linux (รองรับ FALLOC_FL_KEEP_SIZE) ระบบอื่นคืน None"""
+    global _fallocate
+    if _fallocate is False:
+        _fallocate = None
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                _fallocate = libc.fallocate64 if hasattr(libc, "fallocate64") else libc.fallocate
+                _fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+                _fallocate.restype = ctypes.c_int
+            except (OSError, AttributeError):
+                _fallocate = None
+    return _fallocate
+
+
+class TransferSettings:
+    """ค่าปรับจูนการส่งไฟล์ต่อ connection profile"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+                 read_ahead: bool = True, compression: str = COMPRESSION_AUTO,
+                 verify: bool = False, rate_limit: int = 0, job_rate_limit: int = 0):
+        self.chunk_size = max(MIN_CHUNK_SIZE, min(int(chunk_size), MAX_CHUNK_SIZE))
+        self.pipeline_depth = max(1, int(pipeline_depth))
+        self.read_ahead = read_ahead
+        if compression not in (COMPRESSION_AUTO, COMPRESSION_OFF, COMPRESSION_SSH):
+            compression = COMPRESSION_AUTO
+        self.compression = compression
+        self.verify = verify
+        # byte/s, 0 = ไม่จำกัด
+        self.rate_limit = max(0, int(rate_limit))
+        self.job_rate_limit = max(0, int(job_rate_limit))
+
+    def to_dict(self) -> Dict:
+        return {
+            "chunk_size": self.chunk_size,
+            "pipeline_depth": self.pipeline_depth,
+            "read_ahead": self.read_ahead,
+            "compression": self.compression,
+            "verify": self.verify,
+            "rate_limit": self.rate_limit,
+            "job_rate_limit": self.job_rate_limit
+        }
+
+    @staticmethod
+    def from_dict(data: Optional[Dict]) -> 'TransferSettings':
+        data = data or {}
+        return TransferSettings(
+            chunk_size=data.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            pipeline_depth=data.get("pipeline_depth", DEFAULT_PIPELINE_DEPTH),
+            read_ahead=data.get("read_ahead", True),
+            compression=data.get("compression", COMPRESSION_AUTO),
+            verify=data.get("verify", False),
+            rate_limit=data.get("rate_limit", 0),
+            job_rate_limit=data.get("job_rate_limit", 0)
+        )
+
+
+class TransferStats:
+    def __init__(self, bytes_transferred: int = 0, elapsed: float = 0.0, resumed_from: int = 0,
+                 wire_bytes: Optional[int] = None, phases: Optional[Dict[str, float]] = None):
+        self.bytes_transferred = bytes_transferred
+        self.elapsed = elapsed
+        self.resumed_from = resumed_from
+        # จำนวนไบต์ที่วิ่งบนสายจริง (น้อยกว่า bytes_transferred เมื่อบีบอัด)
+        self.wire_bytes = bytes_transferred if wire_bytes is None else wire_bytes
+        # เวลาที่ใช้ในแต่ละช่วง (วินาที) เช่น open/transfer/chmod/close
+        self.phases: Dict[str, float] = phases or {}
+
+    @property
+    def bytes_per_sec(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_transferred / self.elapsed
+
+    def get_rate_str(self) -> str:
+        return format_rate(self.bytes_per_sec)
+
+
+class TransferEngine:
+    """
+    ส่งไฟล์ผ่าน SFTP แบบ pipelined:
+    - upload: ยิง WRITE ต่อเนื่องโดยไม่รอ ack ทีละก้อน แต่จำกัดค้างไว้ไม่เกิน pipeline_depth
+    - download: ยิง READ ล่วงหน้า (readv) ครั้งละไม่เกิน pipeline_depth request
+    - chmod ทำผ่าน handle ที่เปิดอยู่ (fsetstat) ไม่ต้อง resolve path ซ้ำ
+    - throttle(n) ถูกเรียกทุกก้อนก่อนส่ง/หลังรับ ใช้จำกัดแบนด์วิดท์
+    - ฝั่ง local: upload อ่านผ่าน mmap + memoryview (ไม่สร้าง bytes ใหม่ทุกก้อน),
+      download เขียนแบบไม่ผ่าน buffer ของ Python และจองพื้นที่ไฟล์ใหญ่ล่วงหน้า
+    """
+
+    def __init__(self, settings: Optional[TransferSettings] = None):
+        self.settings = settings or TransferSettings()
+
+    def upload(self, sftp: paramiko.SFTPClient, local_path: str, remote_path: str,
+               mode: Optional[int] = 0o644,
+               callback: Optional[Callable[[int, int], None]] = None,
+               resume: bool = False, hasher=None,
+               throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        chunk_size = self.settings.chunk_size
+        depth = self.settings.pipeline_depth
+        expected = os.path.getsize(local_path)
+        start = time.time()
+        phases: Dict[str, float] = {}
+        mark = time.perf_counter()
+
+        with open(local_path, 'rb') as src, self._open_remote_target(sftp, remote_path, resume) as dst:
+            offset = self._resume_offset(src, dst) if resume else 0
+            mark = self._phase(phases, "open", mark)
+            dst.MAX_REQUEST_SIZE = chunk_size
+            dst.set_pipelined(True)
+            if hasher is not None and offset:
+                self._hash_prefix(src, offset, hasher)
+            dst.seek(offset)
+
+            sent = offset
+            with self._map_local(src) as view:
+                # slice ของ memoryview ชี้เข้า page cache ตรง ๆ paramiko ใส่ลง packet ได้โดยไม่ copy เพิ่ม
+                while sent < len(view):
+                    data = view[sent:sent + chunk_size]
+                    if throttle:
+                        throttle(len(data))
+                    dst.write(data)
+                    if hasher is not None:
+                        hasher.update(data)
+                    sent += len(data)
+                    self._drain_acks(dst, depth)
+                    if callback:
+                        callback(sent, expected)
+                data = None
+
+            self._drain_acks(dst, 0)
+            mark = self._phase(phases, "transfer", mark)
+            if mode is not None:
+                try:
+                    dst.chmod(mode)
+                except Exception:
+                    pass
+                mark = self._phase(phases, "chmod", mark)
+        self._phase(phases, "close", mark)
+
+        if sent != expected:
+            raise IOError(f"size mismatch in upload: sent {sent}, expected {expected}")
+        return TransferStats(sent - offset, time.time() - start, resumed_from=offset, phases=phases)
+
+    def download(self, sftp: paramiko.SFTPClient, remote_path: str, local_path: str,
+                 callback: Optional[Callable[[int, int], None]] = None,
+                 resume: bool = False, hasher=None,
+                 throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        start = time.time()
+        phases: Dict[str, float] = {}
+        mark = time.perf_counter()
+
+        with sftp.open(remote_path, 'rb') as src:
+            src.MAX_REQUEST_SIZE = self.settings.chunk_size
+            file_size = src.stat().st_size
+
+            local_mode = 'r+b' if resume and os.path.isfile(local_path) else 'wb'
+            # buffering=0: เขียนจาก bytes ที่ paramiko ได้มาลงไฟล์ตรง ๆ ไม่ copy เข้า BufferedWriter ก่อน
+            with open(local_path, local_mode, buffering=0) as dst:
+                offset = self._resume_offset(src, dst, source_size=file_size) if resume else 0
+                if hasher is not None and offset:
+                    self._hash_prefix(dst, offset, hasher)
+                self._preallocate(dst, offset, file_size)
+                dst.seek(offset)
+                mark = self._phase(phases, "open", mark)
+
+                received = offset
+                for data in self._iter_remote_chunks(src, file_size, offset):
+                    if throttle:
+                        throttle(len(data))
+                    self._write_all(dst, data)
+                    if hasher is not None:
+                        hasher.update(data)
+                    received += len(data)
+                    if callback:
+                        callback(received, file_size)
+                mark = self._phase(phases, "transfer", mark)
+        self._phase(phases, "close", mark)
+
+        if received != file_size:
+            raise IOError(f"size mismatch in download: got {received}, expected {file_size}")
+        return TransferStats(received - offset, time.time() - start, resumed_from=offset, phases=phases)
+
+    def copy_remote(self, sftp: paramiko.SFTPClient, source: str, destination: str,
+                    mode: Optional[int] = None,
+                    throttle: Optional[Callable[[int], None]] = None) -> TransferStats:
+        """
+        คัดลอกไฟล์บน Pi → Pi แบบ stream เป็นก้อน (หน่วยความจำคงที่ไม่ว่าไฟล์ใหญ่แค่ไหน)
+        ข้อมูลวิ่งผ่านเครื่องเรา จึงใช้เป็นทางสุดท้ายเมื่อคัดลอกฝั่ง server ไม่ได้
+        """
+        depth = self.settings.pipeline_depth
+        start = time.time()
+        with sftp.open(source, 'rb') as src, sftp.open(destination, 'wb', bufsize=0) as dst:
+            src.MAX_REQUEST_SIZE = self.settings.chunk_size
+            dst.MAX_REQUEST_SIZE = self.settings.chunk_size
+            dst.set_pipelined(True)
+            file_size = src.stat().st_size
+
+            copied = 0
+            while copied < file_size:
+                # อ่านทั้ง window ให้ครบก่อนค่อยเขียน: READ กับ WRITE ค้างพร้อมกันบน SFTP session เดียวไม่ได้
+                # เพราะ readv ของ paramiko อ่าน ack ของ WRITE ทิ้งไประหว่างรอข้อมูล ทำให้ _drain_acks รอไม่จบ
+                window = []
+                offset = copied
+                while offset < file_size and len(window) < depth:
+                    length = min(self.settings.chunk_size, file_size - offset)
+                    window.append((offset, length))
+                    offset += length
+                chunks = list(src.readv(window))
+                for data in chunks:
+                    if throttle:
+                        throttle(len(data))
+                    dst.write(data)
+                    copied += len(data)
+                chunks = None
+                self._drain_acks(dst, 0)
+                if offset != copied:
+                    break
+            if mode is not None:
+                dst.chmod(mode)
+
+        if copied != file_size:
+            raise IOError(f"size mismatch in copy: copied {copied}, expected {file_size}")
+        return TransferStats(copied, time.time() - start)
+
+    # ---------- Internal helpers ----------
+    def _phase(self, phases: Dict[str, float], name: str, mark: float) -> float:
+        now = time.perf_counter()
+        phases[name] = now - mark
+        return now
+
+    @contextmanager
+    def _map_local(self, f):
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield memoryview(b"")
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mm.close()
+            except BufferError:
+                # ยังมี slice ค้างอยู่ใน traceback; ปล่อยให้ GC ปิดให้
+                pass
+
+    def _preallocate(self, f, offset: int, size: int) -> bool:
+        # ห้ามใช้ posix_fallocate: ไฟล์จะยาวเท่าต้นทางทันที ถ้าถูก kill ระหว่างทาง
+        # _resume_offset จะเห็นขนาดเต็มแล้วเชื่อว่าไฟล์ที่ท้ายเป็นศูนย์ (image/tar) ส่งครบแล้ว
+        fallocate = _libc_fallocate()
+        if size - offset < PREALLOCATE_MIN_SIZE or fallocate is None:
+            return False
+        return fallocate(f.fileno(), FALLOC_FL_KEEP_SIZE, offset, size - offset) == 0
+
+    def _write_all(self, f, data):
+        view = memoryview(data)
+        while view:
+            written = f.write(view)
+            view = view[written:]
+
+    def _open_remote_target(self, sftp: paramiko.SFTPClient, remote_path: str, resume: bool) -> paramiko.SFTPFile:
+        if resume:
+            try:
+                # r+ ไม่ truncate ไฟล์เดิม; ถ้ายังไม่มีไฟล์ค่อยสร้างใหม่ด้วย w
+                return sftp.open(remote_path, 'r+b', bufsize=0)
+            except IOError:
+                pass
+        return sftp.open(remote_path, 'wb', bufsize=0)
+
+    def _resume_offset(self, source, partial, source_size: Optional[int] = None) -> int:
+        """
+        คืน offset ที่ส่งต่อได้จากไฟล์ปลายทางที่ค้างไว้ (partial)
+        ใช้ได้เมื่อ partial ไม่ยาวกว่าต้นทาง และ hash ของบล็อกท้ายส่วนที่ส่งแล้วตรงกัน
+        ถ้าไม่ตรงให้เริ่มใหม่จาก 0
+        """
+        partial_size = self._handle_size(partial)
+        if partial_size <= 0:
+            return 0
+        if source_size is None:
+            source_size = self._handle_size(source)
+        if partial_size > source_size:
+            self._truncate(partial)
+            return 0
+
+        block = min(RESUME_CHECK_SIZE, partial_size)
+        tail_offset = partial_size - block
+        if hashlib.sha256(self._read_block(source, tail_offset, block)).digest() != \
+                hashlib.sha256(self._read_block(partial, tail_offset, block)).digest():
+            self._truncate(partial)
+            return 0
+        return partial_size
+
+    def _hash_prefix(self, local_file, length: int, hasher):
+        # ตอน resume ส่วนที่ส่งไปแล้วอยู่ในไฟล์ local เสมอ จึงอ่านจาก local เพื่อให้ hash ครบทั้งไฟล์
+        local_file.seek(0)
+        remaining = length
+        while remaining:
+            data = local_file.read(min(remaining, 1 << 20))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+
+    def _handle_size(self, handle) -> int:
+        if isinstance(handle, paramiko.SFTPFile):
+            return handle.stat().st_size
+        return os.fstat(handle.fileno()).st_size
+
+    def _read_block(self, handle, offset: int, length: int) -> bytes:
+        if isinstance(handle, paramiko.SFTPFile):
+            return b"".join(handle.readv([(offset, length)]))
+        handle.seek(offset)
+        return handle.read(length)
+
+    def _truncate(self, handle):
+        handle.seek(0)
+        handle.truncate(0)
+
+    def _iter_remote_chunks(self, handle: paramiko.SFTPFile, file_size: int, offset: int = 0):
+        """อ่านไฟล์รีโมตเป็นก้อน ๆ ตามลำดับ โดยมี READ ค้างอยู่ไม่เกิน pipeline_depth ต่อรอบ"""
+        chunk_size = self.settings.chunk_size
+        if not self.settings.read_ahead:
+            handle.seek(offset)
+            while offset < file_size:
+                data = handle.read(min(chunk_size, file_size - offset))
+                if not data:
+                    return
+                offset += len(data)
+                yield data
+            return
+
+        depth = self.settings.pipeline_depth
+        while offset < file_size:
+            window = []
+            while offset < file_size and len(window) < depth:
+                length = min(chunk_size, file_size - offset)
+                window.append((offset, length))
+                offset += length
+            for data in handle.readv(window):
+                if not data:
+                    return
+                yield data
+
+    def _drain_acks(self, handle: paramiko.SFTPFile, keep: int):
+        # paramiko เก็บ WRITE ที่ยังไม่ได้ ack ไว้ใน _reqs; รอ ack ตัวเก่าสุดจนเหลือไม่เกิน keep
+        reqs = getattr(handle, "_reqs", None)
+        if reqs is None:
+            return
+        while len(reqs) > keep:
+            t, msg = handle.sftp._read_response(reqs.popleft())
+            if t != paramiko.sftp.CMD_STATUS:
+                raise paramiko.SFTPError("Expected status")
@@ -0,0 +1,121 @@
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+
+# ส่ง callback ไม่ถี่กว่านี้ (วินาที) กัน event loop ของ Tk ท่วม
+REPORT_INTERVAL = 0.1
+# ช่วงเวลาขั้นต่ำระหว่างจุดวัดความเร็วทันที
+SAMPLE_INTERVAL = 0.05
+RATE_SMOOTHING = 0.2
+
+
+def format_rate(rate: float) -> str:
+    units = ['B/s', 'KB/s', 'MB/s', 'GB/s']
+    unit_index = 0
+
+    while rate >= 1024 and unit_index < len(units) - 1:
+        rate /= 1024
+        unit_index += 1
+
+    return f"{rate:.2f} {units[unit_index]}"
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class TransferProgress:
+    """
+    ติดตามความคืบหน้าของการส่งไฟล์หนึ่งงาน:
+    ไบต์ที่ส่งแล้ว, ความเร็วทันที, ความเร็วเฉลี่ยแบบ EWMA, ETA และเวลาของแต่ละช่วง (open/transfer/chmod)
+    callback ถูกเรียกไม่ถี่กว่า interval และถูกเรียกเสมอเมื่อ finish
+    """
+
+    def __init__(self, total_bytes: int = 0,
+                 callback: Optional[Callable[['TransferProgress'], None]] = None,
+                 interval: float = REPORT_INTERVAL):
+        self.total_bytes = total_bytes
+        self.bytes_done = 0
+        self.instant_rate = 0.0
+        self.smoothed_rate = 0.0
+        self.phases: Dict[str, float] = {}
+        self.finished = False
+        self.callback = callback
+        self.interval = interval
+
+        self.started = time.monotonic()
+        self._sample_time = self.started
+        self._sample_bytes = 0
+        self._last_report = 0.0
+
+    def update(self, bytes_done: int, total_bytes: Optional[int] = None):
+        now = time.monotonic()
+        if total_bytes is not None:
+            self.total_bytes = total_bytes
+        if bytes_done < self._sample_bytes:
+            # เปลี่ยนวิธีส่งกลางทาง (เช่น delta → ส่งทั้งไฟล์) นับใหม่จากจุดนี้
+            self._sample_bytes = bytes_done
+            self._sample_time = now
+        self.bytes_done = bytes_done
+
+        elapsed = now - self._sample_time
+        if elapsed >= SAMPLE_INTERVAL:
+            self.instant_rate = (bytes_done - self._sample_bytes) / elapsed
+            if self.smoothed_rate <= 0:
+                self.smoothed_rate = self.instant_rate
+            else:
+                self.smoothed_rate += RATE_SMOOTHING * (self.instant_rate - self.smoothed_rate)
+            self._sample_time = now
+            self._sample_bytes = bytes_done
+
+        if self.callback and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.callback(self)
+
+    def finish(self, phases: Optional[Dict[str, float]] = None):
+        if phases:
+            self.phases.update(phases)
+        self.finished = True
+        if self.callback:
+            self.callback(self)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def fraction(self) -> float:
+        if self.total_bytes <= 0:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.bytes_done / self.total_bytes)
+
+    @property
+    def eta(self) -> Optional[float]:
+        if self.finished:
+            return 0.0
+        if self.smoothed_rate <= 0 or self.total_bytes <= 0:
+            return None
+        return max(0, self.total_bytes - self.bytes_done) / self.smoothed_rate
+
+    def get_rate_str(self) -> str:
+        return format_rate(self.smoothed_rate)
+
+    def get_eta_str(self) -> str:
+        return format_eta(self.eta)
+
+
+def combine_progress(progresses: Iterable[TransferProgress]) -> TransferProgress:
+    """รวมหลายงานเป็นภาพรวมเดียว (ความเร็วรวม = ผลรวมของแต่ละงานที่ยังไม่จบ)"""
+    combined = TransferProgress()
+    for p in progresses:
+        combined.total_bytes += max(p.total_bytes, p.bytes_done)
+        combined.bytes_done += p.bytes_done
+        if not p.finished:
+            combined.instant_rate += p.instant_rate
+            combined.smoothed_rate += p.smoothed_rate
+    return combined
@@ -0,0 +1,517 @@
+import hashlib
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import paramiko
+
+from models.file_operations import _posix_abs
+from models.resume_journal import ResumeJournal
+from models.bandwidth import BandwidthLimiter, PRIORITY_NORMAL, classify_priority
+from models.checksum import ChecksumMismatch, RemoteChecksum, compare_remote_digest, remote_sha256_many
+from models.compression import CompressedTransfer, CompressionPolicy
+from models.delta_sync import DeltaUploader, DeltaUnavailable
+from models.directory_transfer import (BATCH_FILE_MAX_SIZE, BATCH_MAX_BYTES, BATCH_MAX_FILES,
+                                       BatchUploader, DirectoryProgress, DirectoryTransfer)
+from models.ssh_connection import remote_command_exists
+from models.transfer_progress import TransferProgress, combine_progress
+from models.transfer_engine import COMPRESSION_AUTO, TransferEngine, TransferSettings, TransferStats
+
+
+DEFAULT_WORKERS = 4
+# รองานไฟล์เล็กอื่นที่กำลังถูกส่งเข้าคิวตามมาสักครู่ ก่อนตัดสินว่าจะรวมเป็น tar หรือไม่
+BATCH_LINGER = 0.02
+# งานที่ใหญ่กว่านี้เขียน journal ลงดิสก์ทันทีที่เริ่ม (ไม่รอรอบ save_if_due) ถ้าแอปตายกลางทางจะได้ resume
+JOURNAL_FLUSH_MIN_SIZE = 1024 * 1024
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+class TransferJob:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    UPLOAD = "upload"
+    DOWNLOAD = "download"
+
+    def __init__(self, job_id: int, direction: str, local_path: str, remote_path: str):
+        self.job_id = job_id
+        self.direction = direction
+        self.local_path = local_path
+        self.remote_path = remote_path
+        self.state = TransferJob.QUEUED
+        self.bytes_done = 0
+        self.total_bytes = 0
+        self.error = ""
+        # งานสำเร็จแต่มีเรื่องควรรู้ (เช่นไฟล์บน Pi เปลี่ยนระหว่าง tar อ่าน)
+        self.warning = ""
+        self.stats: Optional[TransferStats] = None
+        self.cancel_requested = False
+        self.resume = False
+        self.delta = False
+        self.is_dir = False
+        self.compressed = False
+        self.checksum = ""
+        # True = ตรงกับ Pi, None = ไม่ได้ตรวจ/ตรวจไม่ได้
+        self.verified: Optional[bool] = None
+        self.files_done = 0
+        self.files_total = 0
+        self.priority = PRIORITY_NORMAL
+        self.progress = TransferProgress()
+        self.size_hint = 0
+        # False เมื่อปลายทางเป็นลิงก์ ต้องส่งผ่าน SFTP ทีละไฟล์ (tar จะแทนที่ตัวลิงก์)
+        self.batchable = True
+        self.round_id = 0
+
+    def is_finished(self) -> bool:
+        return self.state in (TransferJob.DONE, TransferJob.FAILED, TransferJob.CANCELLED)
+
+
+class TransferQueue:
+    """
+    คิวส่งไฟล์หลายไฟล์พร้อมกัน: แต่ละ worker เปิด SFTP channel ของตัวเอง
+    บน paramiko Transport เดียวกัน จึงไม่แย่ง SSHConnection.sftp กับหน้าจอหลัก
+    งานที่ยังไม่เสร็จถูกบันทึกใน ResumeJournal และส่งต่อจาก offset เดิมเมื่อส่งซ้ำ
+    คิวเรียงตาม (priority, ขนาด): งาน interactive มาก่อน และไฟล์เล็กแซงไฟล์ใหญ่
+    """
+
+    def __init__(self, transport: paramiko.Transport, workers: int = DEFAULT_WORKERS,
+                 settings: Optional[TransferSettings] = None,
+                 journal: Optional[ResumeJournal] = None, connection_key: str = "",
+                 limiter: Optional[BandwidthLimiter] = None):
+        self.transport = transport
+        self.workers = max(1, workers)
+        self.settings = settings or TransferSettings()
+        self.journal = journal
+        self.connection_key = connection_key
+        self.limiter = limiter or BandwidthLimiter()
+        self.on_job_update: Optional[Callable[[TransferJob], None]] = None
+        # เรียกจาก worker thread ไม่ถี่กว่า REPORT_INTERVAL ต่องาน (สำหรับผู้ใช้ที่ไม่มี UI)
+        self.on_job_progress: Optional[Callable[[TransferJob], None]] = None
+        self.compression: Optional[CompressionPolicy] = None
+        if self.settings.compression == COMPRESSION_AUTO:
+            self.compression = CompressionPolicy(transport)
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._jobs: Dict[int, TransferJob] = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._active_since: Optional[float] = None
+        self._round_id = 0
+        self._stopped = False
+        self._has_tar: Optional[bool] = None
+
+    # ---------- Submit / Cancel ----------
+    def submit_upload(self, local_path: str, remote_path: str, delta: bool = False,
+                      priority: Optional[int] = None) -> TransferJob:
+        is_dir = os.path.isdir(local_path)
+        size = 0 if is_dir else os.path.getsize(local_path)
+        return self._submit(TransferJob.UPLOAD, local_path, remote_path,
+                            delta=delta and not is_dir, is_dir=is_dir, size=size, priority=priority)
+
+    def submit_download(self, remote_path: str, local_path: str, is_dir: bool = False,
+                        size: int = 0, priority: Optional[int] = None) -> TransferJob:
+        return self._submit(TransferJob.DOWNLOAD, local_path, remote_path,
+                            is_dir=is_dir, size=size, priority=priority)
+
+    def cancel(self, job_id: int):
+        job = self._jobs.get(job_id)
+        if job and not job.is_finished():
+            job.cancel_requested = True
+            if job.state == TransferJob.QUEUED:
+                self._finish(job, TransferJob.CANCELLED)
+
+    def cancel_all(self):
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def stop(self):
+        # งานที่ยังค้างอยู่ไม่ถูกลบจาก journal → เชื่อมต่อใหม่แล้ว restore_pending ได้
+        self._stopped = True
+        for job in self.get_active_jobs():
+            job.cancel_requested = True
+        for _ in self._threads:
+            self._queue.put((-1, 0, next(self._seq), None))
+        self._threads.clear()
+        if self.journal:
+            self.journal.save()
+
+    def restore_pending(self) -> List[TransferJob]:
+        """ส่งงานที่ค้างจากรอบก่อน (ของ connection นี้) เข้าคิวอีกครั้งแบบ resume"""
+        if not self.journal:
+            return []
+        jobs = []
+        for entry in self.journal.get_pending(self.connection_key):
+            if entry["direction"] == TransferJob.UPLOAD and not os.path.exists(entry["local_path"]):
+                self.journal.remove(self.connection_key, entry["direction"],
+                                    entry["local_path"], entry["remote_path"])
+                continue
+            is_dir = entry.get("is_dir", False)
+            size = 0
+            if entry["direction"] == TransferJob.UPLOAD and not is_dir:
+                size = os.path.getsize(entry["local_path"])
+            jobs.append(self._submit(entry["direction"], entry["local_path"], entry["remote_path"],
+                                     is_dir=is_dir, size=size))
+        return jobs
+
+    # ---------- Status ----------
+    def get_jobs(self) -> List[TransferJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get_active_jobs(self) -> List[TransferJob]:
+        return [j for j in self.get_jobs() if not j.is_finished()]
+
+    def is_idle(self) -> bool:
+        return not self.get_active_jobs()
+
+    def get_throughput(self) -> TransferStats:
+        """อัตรารวมของทุก worker ตั้งแต่คิวเริ่มทำงานรอบปัจจุบัน"""
+        with self._lock:
+            if self._active_since is None:
+                return TransferStats()
+            done = sum(j.bytes_done for j in self._jobs.values() if j.round_id == self._round_id)
+            return TransferStats(done, time.time() - self._active_since)
+
+    def get_progress(self) -> TransferProgress:
+        """ภาพรวมความคืบหน้า/ความเร็ว/ETA ของทุกงานในรอบปัจจุบัน"""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.round_id == self._round_id]
+        return combine_progress(j.progress for j in jobs if j.state != TransferJob.CANCELLED)
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [k for k, j in self._jobs.items() if j.is_finished()]:
+                del self._jobs[job_id]
+
+    # ---------- Internal ----------
+    def _submit(self, direction: str, local_path: str, remote_path: str,
+                delta: bool = False, is_dir: bool = False, size: int = 0,
+                priority: Optional[int] = None) -> TransferJob:
+        if self._stopped:
+            raise RuntimeError("Transfer queue stopped")
+
+        job = TransferJob(next(self._ids), direction, local_path, _posix_abs(remote_path))
+        job.delta = delta
+        job.is_dir = is_dir
+        # ไม่รู้ขนาดโฟลเดอร์ล่วงหน้า → ให้ต่อท้ายไฟล์เดี่ยวใน priority เดียวกัน
+        job.size_hint = sys.maxsize if is_dir else size
+        job.priority = priority if priority is not None else classify_priority(size)
+        job.progress = TransferProgress(size, callback=lambda _: self._notify_progress(job))
+        with self._lock:
+            # คิวว่างอยู่ → เริ่มนับ throughput รอบใหม่
+            if self._active_since is None or all(j.is_finished() for j in self._jobs.values()):
+                self._active_since = time.time()
+                self._round_id += 1
+            job.round_id = self._round_id
+            self._jobs[job.job_id] = job
+        if self.journal:
+            job.resume = self.journal.add(self.connection_key, direction, job.local_path, job.remote_path,
+                                          is_dir=is_dir)
+            self.journal.save_if_due()
+        self._ensure_workers()
+        self._queue.put((job.priority, job.size_hint, next(self._seq), job))
+        self._notify(job)
+        return job
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._worker_loop, daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _worker_loop(self):
+        sftp: Optional[paramiko.SFTPClient] = None
+        engine = TransferEngine(self.settings)
+        try:
+            while True:
+                job = self._queue.get()[-1]
+                if job is None:
+                    break
+                if job.is_finished():
+                    continue
+                batch = self._collect_batch(job)
+                if len(batch) > 1:
+                    self._run_batch(batch)
+                    continue
+                try:
+                    if sftp is None:
+                        sftp = paramiko.SFTPClient.from_transport(self.transport)
+                    self._run_job(engine, sftp, job)
+                except TransferCancelled:
+                    self._finish(job, TransferJob.CANCELLED)
+                except Exception as e:
+                    job.error = str(e)
+                    self._finish(job, TransferJob.FAILED)
+                    # channel อาจตายไปแล้ว (EOF/ถูกปิด) งานถัดไปต้องเปิด session ใหม่ ไม่งั้นพังต่อกันทั้ง worker
+                    self._close_quietly(sftp)
+                    sftp = None
+        finally:
+            self._close_quietly(sftp)
+
+    @staticmethod
+    def _close_quietly(sftp: Optional[paramiko.SFTPClient]):
+        if sftp is not None:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+
+    # ---------- Small-file batching ----------
+    def _batchable(self, job: TransferJob) -> bool:
+        return (job.direction == TransferJob.UPLOAD and not job.is_dir and not job.delta
+                and job.batchable and not job.cancel_requested
+                and job.size_hint < BATCH_FILE_MAX_SIZE)
+
+    def _remote_has_tar(self) -> bool:
+        if self._has_tar is None:
+            try:
+                self._has_tar = remote_command_exists(self.transport, "tar")
+            except Exception:
+                self._has_tar = False
+        return self._has_tar
+
+    def _collect_batch(self, job: TransferJob) -> List[TransferJob]:
+        """
+        ดึงงาน upload ไฟล์เล็กที่รออยู่ในคิว (เรียงตามขนาดอยู่แล้ว) มารวมกับ job
+        หยุดเมื่อเจองานที่รวมไม่ได้ หรือชนเพดานจำนวนไฟล์/ขนาดรวม
+        """
+        if not self._batchable(job) or not self._remote_has_tar():
+            return [job]
+
+        batch = [job]
+        total = job.size_hint
+        while len(batch) < BATCH_MAX_FILES and total < BATCH_MAX_BYTES:
+            try:
+                if len(batch) == 1:
+                    item = self._queue.get(timeout=BATCH_LINGER)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            other = item[-1]
+            if other is not None and other.is_finished():
+                continue
+            if other is None or not self._batchable(other) or other.priority != job.priority:
+                self._queue.put(item)
+                break
+            batch.append(other)
+            total += other.size_hint
+        return batch
+
+    def _run_batch(self, batch: List[TransferJob]):
+        start = time.time()
+        for job in batch:
+            job.state = TransferJob.RUNNING
+            self._notify(job)
+
+        job_bucket = self.limiter.job_bucket()
+
+        def throttle(n: int):
+            self.limiter.throttle(n, job_bucket, batch[0].priority)
+
+        def on_file(index: int):
+            job = batch[index]
+            job.bytes_done = job.total_bytes = job.size_hint
+            job.progress.update(job.size_hint, job.size_hint)
+            if job.cancel_requested:
+                raise TransferCancelled()
+
+        hashers = [hashlib.sha256() for _ in batch] if self.settings.verify else None
+        try:
+            errors = BatchUploader(self.transport, throttle).upload(
+                [(job.local_path, job.remote_path) for job in batch], callback=on_file, hashers=hashers
+            )
+        except TransferCancelled:
+            # stream ถูกตัดกลางทาง: งานที่ไม่ได้สั่งยกเลิกกลับเข้าคิวไปส่งใหม่
+            for job in batch:
+                if job.cancel_requested or self._stopped:
+                    self._finish(job, TransferJob.CANCELLED)
+                else:
+                    self._requeue(job)
+            return
+        except Exception as e:
+            for job in batch:
+                job.error = str(e)
+                self._finish(job, TransferJob.FAILED)
+            return
+
+        elapsed = time.time() - start
+        digests = {}
+        if hashers:
+            digests = remote_sha256_many(self.transport, [job.remote_path for i, job in enumerate(batch)
+                                                          if errors[i] == ""])
+        for index, job in enumerate(batch):
+            if errors[index] is None:
+                job.batchable = False
+                if self._stopped:
+                    self._finish(job, TransferJob.CANCELLED)
+                else:
+                    self._requeue(job)
+                continue
+            if errors[index]:
+                job.error = errors[index]
+                self._finish(job, TransferJob.FAILED)
+                continue
+            job.stats = TransferStats(job.size_hint, elapsed, phases={"transfer": elapsed})
+            if hashers:
+                job.checksum = hashers[index].hexdigest()
+                remote_digest = digests.get(job.remote_path)
+                job.verified = None if remote_digest is None else remote_digest == job.checksum
+                if job.verified is False:
+                    job.error = "checksum mismatch"
+                    self._finish(job, TransferJob.FAILED)
+                    continue
+            self._finish(job, TransferJob.DONE)
+
+    def _requeue(self, job: TransferJob):
+        job.state = TransferJob.QUEUED
+        job.bytes_done = 0
+        self._queue.put((job.priority, job.size_hint, next(self._seq), job))
+
+    def _run_job(self, engine: TransferEngine, sftp: paramiko.SFTPClient, job: TransferJob):
+        job.state = TransferJob.RUNNING
+        self._notify(job)
+        if self.journal and job.size_hint >= JOURNAL_FLUSH_MIN_SIZE:
+            self.journal.save()
+
+        def on_chunk(transferred: int, total: int):
+            job.bytes_done = transferred
+            job.total_bytes = total
+            job.progress.update(transferred, total)
+            if job.cancel_requested:
+                raise TransferCancelled()
+
+        job_bucket = self.limiter.job_bucket()
+
+        def throttle(n: int):
+            self.limiter.throttle(n, job_bucket, job.priority)
+
+        if job.is_dir:
+            self._run_directory_job(sftp, job, throttle)
+            return
+
+        verify = self.settings.verify
+        if job.direction == TransferJob.UPLOAD and job.delta:
+            try:
+                hasher = hashlib.sha256() if verify else None
+                job.stats = DeltaUploader(self.transport).upload(job.local_path, job.remote_path,
+                                                                 callback=on_chunk, hasher=hasher,
+                                                                 throttle=throttle)
+                if hasher is not None:
+                    # ฝั่ง Pi ตรวจ sha256 ก่อน rename ทับแล้ว ไม่ต้องอ่านไฟล์ซ้ำ
+                    job.checksum = hasher.hexdigest()
+                    job.verified = True
+                self._finish(job, TransferJob.DONE)
+                return
+            except DeltaUnavailable:
+                job.bytes_done = 0
+
+        # ดาวน์โหลด: ให้ Pi hash ไฟล์ขนานไปกับการส่ง
+        pending = None
+        if verify and job.direction == TransferJob.DOWNLOAD:
+            pending = RemoteChecksum(self.transport, job.remote_path)
+        try:
+            hasher = hashlib.sha256() if verify else None
+            # resume ต้องเขียนต่อจาก offset เดิมผ่าน SFTP จึงไม่ผ่าน gzip pipe
+            if not (self.compression and not job.resume and self._run_compressed(sftp, job, on_chunk, hasher, throttle)):
+                hasher = hashlib.sha256() if verify else None
+                if job.direction == TransferJob.UPLOAD:
+                    job.stats = engine.upload(sftp, job.local_path, job.remote_path, callback=on_chunk,
+                                              resume=job.resume, hasher=hasher, throttle=throttle)
+                else:
+                    job.stats = engine.download(sftp, job.remote_path, job.local_path, callback=on_chunk,
+                                                resume=job.resume, hasher=hasher, throttle=throttle)
+            if self.compression:
+                self.compression.record_transfer(job.stats)
+            if hasher is not None:
+                self._verify(job, hasher.hexdigest(), pending)
+                pending = None
+        finally:
+            if pending is not None:
+                pending.close()
+        self._finish(job, TransferJob.DONE)
+
+    def _verify(self, job: TransferJob, digest: str, pending: Optional[RemoteChecksum]):
+        job.checksum = digest
+        try:
+            job.verified = compare_remote_digest(self.transport, job.remote_path, digest, pending)
+        except ChecksumMismatch:
+            job.verified = False
+            # ไม่ให้รอบหน้า resume ต่อจากไฟล์ที่เสียอยู่แล้ว
+            if self.journal:
+                self.journal.remove(self.connection_key, job.direction, job.local_path, job.remote_path)
+            raise
+
+    def _run_compressed(self, sftp: paramiko.SFTPClient, job: TransferJob, on_chunk,
+                        hasher=None, throttle=None) -> bool:
+        """ส่งผ่าน gzip pipe ถ้านโยบายเห็นว่าคุ้ม; คืน False ให้ไปใช้ TransferEngine ตามปกติ"""
+        compressed = CompressedTransfer(self.transport, self.settings.chunk_size)
+        try:
+            if job.direction == TransferJob.UPLOAD:
+                size = os.path.getsize(job.local_path)
+                if not self.compression.should_compress_upload(job.local_path, size):
+                    return False
+                job.stats = compressed.upload(job.local_path, job.remote_path, callback=on_chunk,
+                                              hasher=hasher, throttle=throttle)
+            else:
+                size = sftp.stat(job.remote_path).st_size
+                if not self.compression.should_compress_download(job.remote_path, size):
+                    return False
+                job.stats = compressed.download(job.remote_path, job.local_path, size,
+                                                callback=on_chunk, hasher=hasher, throttle=throttle)
+        except (IOError, paramiko.SSHException):
+            job.bytes_done = 0
+            return False
+        job.compressed = True
+        return True
+
+    def _run_directory_job(self, sftp: paramiko.SFTPClient, job: TransferJob, throttle):
+        # โฟลเดอร์ทั้งก้อนส่งซ้ำได้เลย (tar เขียนทับไฟล์เดิม) จึงไม่มีการ resume ราย offset
+        def on_progress(progress: DirectoryProgress):
+            job.bytes_done = progress.bytes_done
+            job.total_bytes = progress.bytes_total
+            job.files_done = progress.files_done
+            job.files_total = progress.files_total
+            job.progress.update(progress.bytes_done, progress.bytes_total)
+            if job.cancel_requested:
+                raise TransferCancelled()
+
+        directory = DirectoryTransfer(self.transport, self.settings, throttle=throttle)
+        if job.direction == TransferJob.UPLOAD:
+            job.stats = directory.upload_directory(sftp, job.local_path, job.remote_path, callback=on_progress)
+        else:
+            job.stats = directory.download_directory(sftp, job.remote_path, job.local_path, callback=on_progress)
+        job.warning = "\n".join(directory.warnings)
+        self._finish(job, TransferJob.DONE)
+
+    def _finish(self, job: TransferJob, state: str):
+        job.state = state
+        job.progress.finish(job.stats.phases if job.stats else None)
+        if self.journal and not self._stopped:
+            if state in (TransferJob.DONE, TransferJob.CANCELLED):
+                self.journal.remove(self.connection_key, job.direction, job.local_path, job.remote_path)
+            if self.is_idle():
+                self.journal.save()
+            else:
+                self.journal.save_if_due()
+        self._notify(job)
+
+    def _notify_progress(self, job: TransferJob):
+        if self.on_job_progress:
+            self.on_job_progress(job)
+
+    def _notify(self, job: TransferJob):
+        if self.on_job_update:
+            self.on_job_update(job)
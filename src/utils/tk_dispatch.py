@@ -0,0 +1,68 @@
+import queue
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+# ระยะห่างระหว่างรอบดึงคิว (ms) และเวลาสูงสุดต่อรอบ ไม่ให้ callback จำนวนมากแย่งเวลาวาดจอ
+DRAIN_INTERVAL_MS = 10
+MAX_DRAIN_SECONDS = 0.03
+
+
+class TkDispatcher:
+    """
+    ส่ง callback จาก thread อื่นกลับมารันบน Tk main thread ผ่านคิวเดียว
+    (Tk เรียกข้าม thread ไม่ได้) คิวถูกดึงด้วย after() ของหน้าต่างหลัก
+    """
+
+    def __init__(self, root, interval_ms: int = DRAIN_INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._running = False
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+
+    def post(self, fn: Callable, *args):
+        """เรียกได้จากทุก thread"""
+        self._queue.put((fn, args))
+
+    def deliver(self, future: Future, on_done: Optional[Callable] = None,
+                on_error: Optional[Callable[[BaseException], None]] = None):
+        """เมื่อ future เสร็จ ส่งผลไปให้ on_done / on_error บน Tk thread (future ที่ถูกยกเลิกจะเงียบไป)"""
+        def done(f: Future):
+            if not f.cancelled():
+                self.post(self._resolve, f, on_done, on_error)
+        future.add_done_callback(done)
+
+    # ---------- Internal helpers ----------
+    def _resolve(self, future: Future, on_done: Optional[Callable],
+                 on_error: Optional[Callable[[BaseException], None]]):
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"Error in background operation: {error}")
+        elif on_done:
+            on_done(future.result())
+
+    def _drain(self):
+        deadline = time.perf_counter() + MAX_DRAIN_SECONDS
+        while time.perf_counter() < deadline:
+            try:
+                fn, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
+        if self._running:
+            self.root.after(self.interval_ms, self._drain)
@@ -14,6 +14,7 @@ class ConnectionDialog(ctk.CTkToplevel):
         self.on_connect: Optional[Callable] = None
         self.on_save: Optional[Callable] = None
         self.password_visible = False
+        self.transfer_settings = None
 
         self._setup_ui()
         self.grab_set()
@@ -204,6 +205,7 @@ class ConnectionDialog(ctk.CTkToplevel):
                     self.key_entry.delete(0, "end")
                     self.key_entry.insert(0, config.identity_file)
                 self.protocol_combo.set(config.protocol)
+                self.transfer_settings = config.transfer_settings
 
     def _on_connect_click(self):
         try:
@@ -219,6 +221,7 @@ class ConnectionDialog(ctk.CTkToplevel):
             "password": self.password_entry.get() or None,
             "identity_file": self.key_entry.get() or None,
             "protocol": self.protocol_combo.get(),
+            "transfer_settings": self.transfer_settings,
             "save": self.save_check.get()
         }
 
@@ -1,14 +1,15 @@
 import customtkinter as ctk
-from typing import List, Callable, Optional
+from typing import Dict, List, Callable, Optional
 from models.file_operations import FileInfo
 from views.file_icons import get_file_icon
-import tkinter as tk
+from views.virtual_list import VirtualList
 
 # --- ค่าคงที่เพื่อให้คอลัมน์ "ตรงกันทุกแถว" ---
 NAME_COL_WEIGHT = 3
 SIZE_COL_WIDTH  = 120   # px
 PERM_COL_WIDTH  = 140   # px
 MOD_COL_WIDTH   = 180   # px
+SCROLLBAR_WIDTH = 16    # px
 
 ARROW_UP = " ▲"
 ARROW_DOWN = " ▼"
@@ -22,9 +23,10 @@ class FileBrowser(ctk.CTkFrame):
         self.on_file_double_click: Optional[Callable[[FileInfo], None]] = None
         self.on_context_menu: Optional[Callable[[FileInfo, int, int], None]] = None
         self.on_sort: Optional[Callable[[str], None]] = None  # กดหัวคอลัมน์เพื่อ sort
+        self.on_file_hover: Optional[Callable[[FileInfo], None]] = None
 
-        self._rows_widgets: List[ctk.CTkLabel] = []  # เก็บ widget ทุกชิ้นของทุกแถว เพื่อง่ายต่อการล้าง
         self._header_buttons: Dict[str, ctk.CTkButton] = {}  # เก็บปุ่มหัวคอลัมน์
+        self.files: List[FileInfo] = []
         self._setup_ui()
 
     def _setup_ui(self):
@@ -47,6 +49,8 @@ class FileBrowser(ctk.CTkFrame):
         header_frame.grid_columnconfigure(1, weight=0, minsize=SIZE_COL_WIDTH)
         header_frame.grid_columnconfigure(2, weight=0, minsize=PERM_COL_WIDTH)
         header_frame.grid_columnconfigure(3, weight=0, minsize=MOD_COL_WIDTH)
+        # เว้นที่ให้ scrollbar ของตาราง คอลัมน์จะได้ตรงกับ header
+        header_frame.grid_columnconfigure(4, weight=0, minsize=SCROLLBAR_WIDTH)
 
         self._header_buttons["name"] = ctk.CTkButton(
             header_frame, text="ชื่อไฟล์", fg_color="transparent", hover_color="gray25",
@@ -72,57 +76,33 @@ class FileBrowser(ctk.CTkFrame):
         )
         self._header_buttons["modified"].grid(row=0, column=3, padx=10, sticky="w")
 
-        # Body (Scrollable)
-        self.scrollable_frame = ctk.CTkScrollableFrame(self)
-        self.scrollable_frame.grid(row=2, column=0, sticky="nsew", padx=5, pady=(0, 5))
-        # คอนฟิกคอลัมน์ของ “ข้อมูลทุกแถว” ให้เท่ากับ header
-        self.scrollable_frame.grid_columnconfigure(0, weight=NAME_COL_WEIGHT)
-        self.scrollable_frame.grid_columnconfigure(1, weight=0, minsize=SIZE_COL_WIDTH)
-        self.scrollable_frame.grid_columnconfigure(2, weight=0, minsize=PERM_COL_WIDTH)
-        self.scrollable_frame.grid_columnconfigure(3, weight=0, minsize=MOD_COL_WIDTH)
+        # Body: วาดเฉพาะแถวที่มองเห็น (โฟลเดอร์หลายพันไฟล์ก็ไม่สร้าง widget ตามจำนวนไฟล์)
+        self.file_list = VirtualList(self, columns=[
+            (0, "w"),
+            (SIZE_COL_WIDTH, "e"),
+            (PERM_COL_WIDTH, "w"),
+            (MOD_COL_WIDTH, "w"),
+        ])
+        self.file_list.grid(row=2, column=0, sticky="nsew", padx=5, pady=(0, 5))
+        self.file_list.on_select = self._emit_select
+        self.file_list.on_double_click = self._emit_double
+        self.file_list.on_context_menu = self._emit_context
+        self.file_list.on_hover = self._emit_hover
+        # ชื่อไม่ซ้ำกันในโฟลเดอร์เดียว listing ใหม่จาก watcher จึงเลือกแถวเดิมไว้ได้
+        self.file_list.item_key = lambda f: f.name
 
     # ---------------- Public API ----------------
-    def set_files(self, files: List[FileInfo]):
-        # ล้างแถวเก่า
-        for w in self._rows_widgets:
-            w.destroy()
-        self._rows_widgets.clear()
-
-        # วาง “1 แถว = 4 label” ลงใน scrollable_frame โดยตรง
-        for r, f in enumerate(files):
-            icon = get_file_icon(f.name, f.is_dir)
-            name_text = f"{icon} {f.name}"
-            size_text = f.get_size_str()
-            perm_text = f.permissions
-            mod_text  = f.modified_time.strftime("%Y-%m-%d %H:%M") if hasattr(f, "modified_time") else ""
-
-            # ชื่อไฟล์ (col 0)
-            name_lbl = ctk.CTkLabel(self.scrollable_frame, text=name_text, anchor="w")
-            name_lbl.grid(row=r, column=0, padx=10, pady=5, sticky="w")
-            self._bind_row_events(name_lbl, f)
-
-            # ขนาด (col 1, ชิดขวา + width คงที่)
-            size_lbl = ctk.CTkLabel(self.scrollable_frame, text=size_text, anchor="e", width=SIZE_COL_WIDTH)
-            size_lbl.grid(row=r, column=1, padx=10, pady=5, sticky="e")
-            self._bind_row_events(size_lbl, f)
-
-            # สิทธิ์ (col 2)
-            perm_lbl = ctk.CTkLabel(self.scrollable_frame, text=perm_text, anchor="w", width=PERM_COL_WIDTH)
-            perm_lbl.grid(row=r, column=2, padx=10, pady=5, sticky="w")
-            self._bind_row_events(perm_lbl, f)
-
-            # แก้ไขล่าสุด (col 3)
-            mod_lbl = ctk.CTkLabel(self.scrollable_frame, text=mod_text, anchor="w", width=MOD_COL_WIDTH)
-            mod_lbl.grid(row=r, column=3, padx=10, pady=5, sticky="w")
-            self._bind_row_events(mod_lbl, f)
-
-            # เก็บไว้สำหรับลบตอน refresh
-            self._rows_widgets.extend([name_lbl, size_lbl, perm_lbl, mod_lbl])
+    def set_files(self, files: List[FileInfo], keep_position: bool = False):
+        self.files = list(files)
+        self.file_list.set_items(self.files, self._row_text, keep_position)
+
+    def append_files(self, files: List[FileInfo]):
+        """ต่อท้ายรายการที่แสดงอยู่ (listing ที่ทยอยมาเป็นชุด)"""
+        self.files.extend(files)
+        self.file_list.refresh()
 
     def clear(self):
-        for w in self._rows_widgets:
-            w.destroy()
-        self._rows_widgets.clear()
+        self.file_list.clear()
 
         # -------- ลูกศรบอกทิศทางเรียง --------
     def update_sort_indicator(self, key: str, reverse: bool):
@@ -142,11 +122,12 @@ class FileBrowser(ctk.CTkFrame):
             "modified": "แก้ไขล่าสุด",
         }.get(key, key)
 
-    # ---------------- Event helpers ----------------
-    def _bind_row_events(self, widget: ctk.CTkLabel, file_info: FileInfo):
-        widget.bind("<Button-1>", lambda e: self._emit_select(file_info))
-        widget.bind("<Double-Button-1>", lambda e: self._emit_double(file_info))
-        widget.bind("<Button-3>", lambda e: self._emit_context(file_info, e))
+    # ---------------- Row helpers ----------------
+    @staticmethod
+    def _row_text(f: FileInfo):
+        icon = get_file_icon(f.name, f.is_dir)
+        mod_text = f.modified_time.strftime("%Y-%m-%d %H:%M") if hasattr(f, "modified_time") else ""
+        return f"{icon} {f.name}", f.get_size_str(), f.permissions, mod_text
 
     def _emit_select(self, f: FileInfo):
         if self.on_file_select:
@@ -156,6 +137,10 @@ class FileBrowser(ctk.CTkFrame):
         if self.on_file_double_click:
             self.on_file_double_click(f)
 
-    def _emit_context(self, f: FileInfo, event: tk.Event):
+    def _emit_context(self, f: FileInfo, x_root: int, y_root: int):
         if self.on_context_menu:
-            self.on_context_menu(f, event.x_root, event.y_root)
+            self.on_context_menu(f, x_root, y_root)
+
+    def _emit_hover(self, f: FileInfo):
+        if self.on_file_hover:
+            self.on_file_hover(f)
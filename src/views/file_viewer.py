@@ -0,0 +1,240 @@
+from typing import Optional
+
+import customtkinter as ctk
+
+from models.io_executor import IOExecutor
+from models.ranged_reader import NotCached, RangedReader
+from utils.tk_dispatch import TkDispatcher
+
+
+WHEEL_LINES = 3
+# ดึงล่วงหน้าเหนือ/ใต้หน้าที่แสดงอยู่กี่หน้าจอ
+PREFETCH_SCREENS = 4
+
+
+class FileViewer(ctk.CTkToplevel):
+    """
+    หน้าต่างดูไฟล์แบบอ่านอย่างเดียว วาดเฉพาะบรรทัดที่มองเห็นจาก RangedReader
+    เลื่อนด้วย scrollbar (ตามตำแหน่งไบต์ในไฟล์), ล้อเมาส์ หรือ ลูกศร/PageUp/PageDown/Home/End
+    """
+
+    def __init__(self, parent, reader: RangedReader, title: str, io: IOExecutor, dispatcher: TkDispatcher):
+        super().__init__(parent)
+
+        self.title(title)
+        self.geometry("800x600")
+
+        self.reader = reader
+        self.io = io
+        self.dispatcher = dispatcher
+        self.top_offset = 0
+        self.bottom_offset = 0
+        self.visible_lines = 1
+        self._seek_fraction = None
+        self._scroll_lines = 0
+        self._end_top = None
+        self._render_job = None
+        self._loading = False
+        self._prefetching = False
+        self._closed = False
+
+        self._setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._schedule_render()
+
+    def _setup_ui(self):
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        text_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        text_frame.pack(fill="both", expand=True)
+
+        self.font = ctk.CTkFont(family="Consolas", size=12)
+        self.scrollbar = ctk.CTkScrollbar(text_frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.textbox = ctk.CTkTextbox(
+            text_frame,
+            font=self.font,
+            wrap="none",
+            activate_scrollbars=False
+        )
+        self.textbox.pack(side="left", fill="both", expand=True)
+        self.textbox.configure(state="disabled")
+
+        bottom_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        bottom_frame.pack(fill="x", pady=(10, 0))
+
+        self.position_label = ctk.CTkLabel(bottom_frame, text="", anchor="w")
+        self.position_label.pack(side="left")
+
+        ctk.CTkButton(
+            bottom_frame,
+            text="ปิด",
+            command=self._on_close,
+            width=100,
+            height=35
+        ).pack(side="right")
+
+        self.textbox.bind("<Configure>", lambda e: self._schedule_render())
+        self.textbox.bind("<MouseWheel>", self._on_wheel)
+        self.textbox.bind("<Button-4>", lambda e: self._scroll(-WHEEL_LINES))
+        self.textbox.bind("<Button-5>", lambda e: self._scroll(WHEEL_LINES))
+        keys = {
+            "<Up>": lambda: self._scroll(-1),
+            "<Down>": lambda: self._scroll(1),
+            "<Prior>": lambda: self._scroll(-max(1, self.visible_lines - 1)),
+            "<Next>": lambda: self._scroll(max(1, self.visible_lines - 1)),
+            "<Home>": lambda: self._jump(0.0),
+            "<End>": lambda: self._jump(1.0),
+        }
+        for key, handler in keys.items():
+            self.textbox.bind(key, lambda e, h=handler: h())
+            self.bind(key, lambda e, h=handler: h())
+
+    # ---------- Rendering ----------
+    def _schedule_render(self):
+        if self._render_job is None and not self._closed:
+            self._render_job = self.after_idle(self._render)
+
+    def _render(self):
+        self._render_job = None
+        if self._closed or self._loading:
+            # ระหว่างรอเครือข่าย การเลื่อนที่เข้ามาจะถูกสะสมไว้ แล้ววาดต่อเมื่อช่วงเดิมมาถึง
+            return
+
+        line_height = self.font.metrics("linespace") or 16
+        visible = max(1, self.textbox.winfo_height() // line_height)
+        if visible != self.visible_lines:
+            self.visible_lines = visible
+            self._end_top = None
+
+        request = (self.top_offset, self._seek_fraction, self._scroll_lines, visible, self._end_top)
+        self._seek_fraction = None
+        self._scroll_lines = 0
+
+        # block ที่อยู่ใน cache แล้ววาดได้ทันที ที่เหลือไปอ่านบน I/O thread ไม่ให้ Tk ค้างรอเครือข่าย
+        try:
+            self._show_page(self._locate(*request, cached_only=True))
+            return
+        except NotCached:
+            pass
+
+        self._loading = True
+        self.position_label.configure(text="กำลังโหลด...")
+        if request[1] is not None or not self.textbox.get("1.0", "end").strip():
+            self._set_text("กำลังโหลด...")
+        self.dispatcher.deliver(self.io.submit(self._locate, *request),
+                                self._on_page_loaded, self._on_load_failed)
+
+    def _locate(self, top: int, seek: Optional[float], lines: int, visible: int,
+                end_top: Optional[int], cached_only: bool = False):
+        """คำนวณบรรทัดบนสุดใหม่จากการเลื่อน แล้วอ่านหน้านั้น (เรียกได้จากทุก thread)"""
+        reader = self.reader
+
+        def last_page_top() -> int:
+            nonlocal end_top
+            if end_top is None:
+                last_line = reader.line_start(reader.size, cached_only)
+                end_top = reader.line_start_before(last_line, visible - 1, cached_only)
+            return end_top
+
+        if seek is not None:
+            top = min(reader.line_start(int(seek * reader.size), cached_only), last_page_top())
+        if lines > 0:
+            _, _, next_offset = reader.read_lines(top, lines, cached_only)
+            top = max(top, min(next_offset, last_page_top()))
+        elif lines < 0:
+            top = reader.line_start_before(top, -lines, cached_only)
+
+        page, _, bottom = reader.read_lines(top, visible, cached_only)
+        return top, bottom, page, visible, end_top
+
+    def _on_page_loaded(self, page):
+        self._loading = False
+        if self._closed:
+            return
+        self._show_page(page)
+        if self._seek_fraction is not None or self._scroll_lines:
+            self._schedule_render()
+
+    def _on_load_failed(self, error: BaseException):
+        self._loading = False
+        if not self._closed:
+            self._set_text(f"อ่านไฟล์ไม่สำเร็จ: {error}")
+            self.position_label.configure(text="")
+
+    def _show_page(self, page):
+        self.top_offset, self.bottom_offset, lines, visible, end_top = page
+        if visible == self.visible_lines:
+            self._end_top = end_top
+        self._set_text("\n".join(lines))
+        self._update_position()
+
+        # วาดหน้าจอให้เสร็จก่อน ค่อยดึงช่วงรอบ ๆ มาเก็บไว้ ให้เลื่อนต่อได้โดยไม่ต้องรอเครือข่าย
+        if not self._prefetching:
+            self._prefetching = True
+            self.dispatcher.deliver(self.io.submit(self._prefetch, self.top_offset, self.bottom_offset),
+                                    self._on_prefetched, self._on_prefetched)
+
+    def _set_text(self, text: str):
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", text)
+        self.textbox.configure(state="disabled")
+
+    def _update_position(self):
+        size = self.reader.size
+        if size:
+            self.scrollbar.set(self.top_offset / size, self.bottom_offset / size)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        line = self.reader.index.line_of(self.top_offset)
+        where = f"บรรทัด {line + 1:,}" if line is not None else f"{self.top_offset / max(size, 1):.0%}"
+        self.position_label.configure(text=f"{where}  ·  {self.bottom_offset:,} / {size:,} bytes")
+
+    def _prefetch(self, top: int, bottom: int):
+        # รันบน I/O thread
+        if self._closed:
+            return
+        span = max(bottom - top, self.reader.block_size) * PREFETCH_SCREENS
+        self.reader.prefetch(bottom, span)
+        self.reader.prefetch(top - span, span)
+
+    def _on_prefetched(self, _result=None):
+        self._prefetching = False
+
+    # ---------- Scrolling ----------
+    def _scroll(self, lines: int):
+        self._scroll_lines += lines
+        self._schedule_render()
+        return "break"
+
+    def _jump(self, fraction: float):
+        self._seek_fraction = fraction
+        self._scroll_lines = 0
+        self._schedule_render()
+        return "break"
+
+    def _on_wheel(self, event):
+        return self._scroll(-WHEEL_LINES if event.delta > 0 else WHEEL_LINES)
+
+    def _on_scrollbar(self, *args):
+        if args and args[0] == "moveto":
+            # ลาก scrollbar ถี่ ๆ รวมเป็นการวาดครั้งเดียวต่อรอบ event loop
+            self._jump(min(max(float(args[1]), 0.0), 1.0))
+        elif args and args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= max(1, self.visible_lines - 1)
+            self._scroll(step)
+
+    def _on_close(self):
+        self._closed = True
+        if self._render_job is not None:
+            self.after_cancel(self._render_job)
+            self._render_job = None
+        # ปิด handle ต่อท้ายงานอ่านที่ค้างอยู่บน I/O thread
+        self.dispatcher.deliver(self.io.submit(self.reader.close))
+        self.destroy()
@@ -7,6 +7,7 @@ class Language:
         "new_file": "📄 ไฟล์ใหม่",
         "new_folder": "📁 โฟลเดอร์ใหม่",
         "upload": "📤 อัปโหลด",
+        "live_watch": "👁️ ติดตามแบบสด",
         "download": "📥 ดาวน์โหลด",
         "appearance": "รูปแบบ:",
         "language": "ภาษา:",
@@ -110,6 +111,7 @@ class Language:
         "new_file": "📄 New File",
         "new_folder": "📁 New Folder",
         "upload": "📤 Upload",
+        "live_watch": "👁️ Live watch",
         "download": "📥 Download",
         "appearance": "Appearance:",
         "language": "Language:",
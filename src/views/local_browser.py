@@ -1,23 +1,60 @@
 import customtkinter as ctk
+import bisect
 import os
-from typing import Callable, Optional, List
+import stat
+from typing import Callable, Optional, List, Set
 from datetime import datetime
 from pathlib import Path
-import tkinter as tk
+from models.local_watcher import LocalWatcher
+from utils.tk_dispatch import TkDispatcher
 from views.file_icons import get_file_icon
+from views.virtual_list import VirtualList
+
+SIZE_COL_WIDTH = 120   # px
+MOD_COL_WIDTH = 160    # px
+SCROLLBAR_WIDTH = 16   # px
+# อ่าน scandir ทีละหน้าแล้วคืนเวลาให้ event loop โฟลเดอร์ใหญ่จะเริ่มแสดงได้ทันที
+PAGE_SIZE = 500
+
+
+def _sort_key(f: 'LocalFileInfo'):
+    # โฟลเดอร์ก่อน แล้วตามชื่อ (ชื่อจริงต่อท้ายให้ key ไม่ซ้ำกันแม้ต่างแค่ตัวพิมพ์)
+    return not f.is_dir, f.name.lower(), f.name
+
+
 class LocalFileInfo:
-    def __init__(self, path: str):
-        self.path = path
-        self.name = os.path.basename(path)
-        self.is_dir = os.path.isdir(path)
+    """
+    รายการไฟล์ฝั่งเครื่องเรา เก็บเฉพาะค่าดิบ (ไม่มี __dict__)
+    วันที่แก้ไขแปลงเป็น datetime เมื่อถูกขอเท่านั้น
+    """
+    __slots__ = ("path", "name", "is_dir", "size", "mtime")
 
+    def __init__(self, path: str, name: str, is_dir: bool, size: int = 0, mtime: float = 0.0):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def from_entry(cls, entry: os.DirEntry) -> 'LocalFileInfo':
+        # is_dir() ใช้ d_type จาก readdir และ stat() ถูก cache ไว้ใน DirEntry ไม่ต้อง syscall ซ้ำ
         try:
-            stat = os.stat(path)
-            self.size = stat.st_size if not self.is_dir else 0
-            self.modified_time = datetime.fromtimestamp(stat.st_mtime)
-        except:
-            self.size = 0
-            self.modified_time = datetime.now()
+            is_dir = entry.is_dir()
+            st = entry.stat()
+            return cls(entry.path, entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+        except OSError:
+            return cls(entry.path, entry.name, False)
+
+    @classmethod
+    def from_path(cls, path: str) -> 'LocalFileInfo':
+        st = os.stat(path)
+        is_dir = stat.S_ISDIR(st.st_mode)
+        return cls(path, os.path.basename(path), is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+
+    @property
+    def modified_time(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime) if self.mtime else datetime.now()
 
     def get_size_str(self) -> str:
         if self.is_dir:
@@ -35,7 +72,7 @@ class LocalFileInfo:
 
 
 class LocalBrowser(ctk.CTkFrame):
-    def __init__(self, master, **kwargs):
+    def __init__(self, master, dispatcher: Optional[TkDispatcher] = None, **kwargs):
         super().__init__(master, **kwargs)
 
         self.current_path = str(Path.home())
@@ -43,12 +80,18 @@ class LocalBrowser(ctk.CTkFrame):
         self.on_file_double_click: Optional[Callable] = None
         self.on_drop: Optional[Callable] = None
 
+        # เฝ้าโฟลเดอร์ปัจจุบัน ไฟล์ที่ดาวน์โหลดมาลง/ถูกลบจะโผล่ทันทีโดยไม่ต้องสแกนใหม่
+        self.dispatcher = dispatcher
+        self.watcher = LocalWatcher(
+            lambda path, changed, removed: dispatcher.post(self._apply_delta, path, changed, removed)
+        ) if dispatcher is not None else None
+
         self._setup_ui()
         self.refresh()
 
     def _setup_ui(self):
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(2, weight=1)
+        self.grid_rowconfigure(3, weight=1)
 
         title_frame = ctk.CTkFrame(self, height=40, fg_color="transparent")
         title_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
@@ -85,9 +128,10 @@ class LocalBrowser(ctk.CTkFrame):
 
         header_frame = ctk.CTkFrame(self, height=30)
         header_frame.grid(row=2, column=0, sticky="ew", padx=5, pady=(0, 5))
-        header_frame.grid_columnconfigure(0, weight=3)
-        header_frame.grid_columnconfigure(1, weight=1)
-        header_frame.grid_columnconfigure(2, weight=2)
+        header_frame.grid_columnconfigure(0, weight=1)
+        header_frame.grid_columnconfigure(1, weight=0, minsize=SIZE_COL_WIDTH)
+        header_frame.grid_columnconfigure(2, weight=0, minsize=MOD_COL_WIDTH)
+        header_frame.grid_columnconfigure(3, weight=0, minsize=SCROLLBAR_WIDTH)
 
         ctk.CTkLabel(
             header_frame,
@@ -107,11 +151,23 @@ class LocalBrowser(ctk.CTkFrame):
             font=ctk.CTkFont(weight="bold")
         ).grid(row=0, column=2, padx=10, sticky="w")
 
-        self.scrollable_frame = ctk.CTkScrollableFrame(self)
-        self.scrollable_frame.grid(row=3, column=0, sticky="nsew", padx=5, pady=(0, 5))
-        self.scrollable_frame.grid_columnconfigure(0, weight=1)
-
-        self.file_items = []
+        self.file_list = VirtualList(self, columns=[
+            (0, "w"),
+            (SIZE_COL_WIDTH, "w"),
+            (MOD_COL_WIDTH, "w"),
+        ])
+        self.file_list.grid(row=3, column=0, sticky="nsew", padx=5, pady=(0, 5))
+        self.file_list.on_select = self._on_item_click
+        self.file_list.on_double_click = self._on_item_double_click
+        self.file_list.item_key = lambda f: f.path
+
+        self.files: List[LocalFileInfo] = []
+        self._sort_keys = []
+        self._scan = None
+        self._scan_job = None
+        # delta จาก watcher ที่มาระหว่างสแกน (รายการยังไม่เรียง) เก็บไว้ใช้ตอนสแกนจบ
+        self._pending_changed: Set[str] = set()
+        self._pending_removed: Set[str] = set()
 
     def _go_up(self):
         parent = os.path.dirname(self.current_path)
@@ -125,39 +181,116 @@ class LocalBrowser(ctk.CTkFrame):
             self.current_path = path
             self.refresh()
 
+    @property
+    def is_watching(self) -> bool:
+        return self.watcher is not None and self.watcher.path == self.current_path
+
+    def destroy(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+        super().destroy()
+
     def refresh(self):
-        for item in self.file_items:
-            item.destroy()
-        self.file_items.clear()
+        self._stop_scan()
+        if self.watcher is not None:
+            self.watcher.watch(self.current_path)
 
         self.path_entry.delete(0, "end")
         self.path_entry.insert(0, self.current_path)
 
+        self.files = []
+        self._sort_keys = []
+        self._pending_changed, self._pending_removed = set(), set()
+        self.file_list.set_items(self.files, self._row_text)
+
         try:
-            entries = os.listdir(self.current_path)
-            files = []
-
-            for entry in entries:
-                try:
-                    full_path = os.path.join(self.current_path, entry)
-                    file_info = LocalFileInfo(full_path)
-                    files.append(file_info)
-                except:
-                    continue
-
-            files.sort(key=lambda x: (not x.is_dir, x.name.lower()))
-
-            for file_info in files:
-                item = LocalFileItem(
-                    self.scrollable_frame,
-                    file_info,
-                    on_click=lambda f=file_info: self._on_item_click(f),
-                    on_double_click=lambda f=file_info: self._on_item_double_click(f)
-                )
-                item.pack(fill="x", pady=2)
-                self.file_items.append(item)
+            self._scan = os.scandir(self.current_path)
         except Exception as e:
             print(f"Error listing directory: {e}")
+            return
+        self._load_page()
+
+    def _load_page(self):
+        """อ่านต่ออีกหนึ่งหน้าต่อท้ายตามลำดับที่ scandir ให้มา แล้วนัดหน้าถัดไป (เรียงครั้งเดียวตอนจบ)"""
+        self._scan_job = None
+        try:
+            for _ in range(PAGE_SIZE):
+                entry = next(self._scan, None)
+                if entry is None:
+                    self._finish_scan()
+                    return
+                self.files.append(LocalFileInfo.from_entry(entry))
+            self._scan_job = self.after(1, self._load_page)
+        except Exception as e:
+            print(f"Error listing directory: {e}")
+            self._finish_scan()
+            return
+        self.file_list.refresh()
+
+    def _finish_scan(self):
+        # แทรกกลาง list ทีละรายการเป็น O(n²) ในโฟลเดอร์ใหญ่ จึงเรียงรวดเดียวตอนอ่านครบ
+        self._stop_scan()
+        self.files.sort(key=_sort_key)
+        self._sort_keys = [_sort_key(f) for f in self.files]
+        changed, removed = self._pending_changed, self._pending_removed
+        self._pending_changed, self._pending_removed = set(), set()
+        if changed or removed:
+            self._apply_delta(self.current_path, changed, removed)
+        else:
+            self.file_list.refresh()
+
+    def _stop_scan(self):
+        if self._scan_job is not None:
+            self.after_cancel(self._scan_job)
+            self._scan_job = None
+        if self._scan is not None:
+            self._scan.close()
+            self._scan = None
+
+    # ---------- Watch deltas ----------
+    def _apply_delta(self, path: str, changed: Optional[Set[str]], removed: Optional[Set[str]]):
+        if path != self.current_path:
+            return
+        if changed is None:
+            # event ล้นคิว ไม่รู้ว่าอะไรเปลี่ยนบ้าง → สแกนใหม่
+            self.refresh()
+            return
+        if self._scan is not None:
+            self._pending_changed = (self._pending_changed - removed) | changed
+            self._pending_removed = (self._pending_removed - changed) | removed
+            return
+        for name in removed | changed:
+            self._remove(name)
+        for name in changed:
+            try:
+                self._insert(LocalFileInfo.from_path(os.path.join(path, name)))
+            except OSError:
+                # ถูกลบ/ย้ายไปแล้วก่อนเราทัน stat
+                pass
+        self.file_list.refresh()
+
+    def _insert(self, file_info: LocalFileInfo):
+        """แทรกตามลำดับ (โฟลเดอร์ก่อน แล้วตามชื่อ) ถ้ามีชื่อนี้อยู่แล้วให้แทนที่ของเดิม"""
+        key = _sort_key(file_info)
+        index = bisect.bisect_left(self._sort_keys, key)
+        if index < len(self._sort_keys) and self._sort_keys[index] == key:
+            self.files[index] = file_info
+        else:
+            self._sort_keys.insert(index, key)
+            self.files.insert(index, file_info)
+
+    def _remove(self, name: str):
+        for is_file in (False, True):
+            key = (is_file, name.lower(), name)
+            index = bisect.bisect_left(self._sort_keys, key)
+            if index < len(self._sort_keys) and self._sort_keys[index] == key:
+                del self._sort_keys[index]
+                del self.files[index]
+
+    @staticmethod
+    def _row_text(f: LocalFileInfo):
+        icon = get_file_icon(f.name, f.is_dir)
+        return f"{icon} {f.name}", f.get_size_str(), f.modified_time.strftime("%Y-%m-%d %H:%M")
 
     def _on_item_click(self, file_info):
         if self.on_file_select:
@@ -172,47 +305,3 @@ class LocalBrowser(ctk.CTkFrame):
 
     def get_selected_files(self) -> List[str]:
         return []
-
-
-class LocalFileItem(ctk.CTkFrame):
-    def __init__(self, master, file_info: LocalFileInfo, on_click=None, on_double_click=None, **kwargs):
-        super().__init__(master, **kwargs)
-
-        self.file_info = file_info
-        self.on_click = on_click
-        self.on_double_click = on_double_click
-
-        self.grid_columnconfigure(0, weight=3)
-        self.grid_columnconfigure(1, weight=1)
-        self.grid_columnconfigure(2, weight=2)
-
-        icon = get_file_icon(file_info.name, file_info.is_dir)
-        name_text = f"{icon} {file_info.name}"
-
-        self.name_label = ctk.CTkLabel(self, text=name_text, anchor="w")
-        self.name_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
-
-        self.size_label = ctk.CTkLabel(self, text=file_info.get_size_str(), anchor="w")
-        self.size_label.grid(row=0, column=1, padx=10, pady=5, sticky="w")
-
-        self.modified_label = ctk.CTkLabel(
-            self,
-            text=file_info.modified_time.strftime("%Y-%m-%d %H:%M"),
-            anchor="w"
-        )
-        self.modified_label.grid(row=0, column=2, padx=10, pady=5, sticky="w")
-
-        self.bind("<Button-1>", self._handle_click)
-        self.bind("<Double-Button-1>", self._handle_double_click)
-
-        for child in self.winfo_children():
-            child.bind("<Button-1>", self._handle_click)
-            child.bind("<Double-Button-1>", self._handle_double_click)
-
-    def _handle_click(self, event):
-        if self.on_click:
-            self.on_click()
-
-    def _handle_double_click(self, event):
-        if self.on_double_click:
-            self.on_double_click()
@@ -10,7 +10,16 @@ from views.local_browser import LocalBrowser
 from views.terminal_view import TerminalView
 from views.connection_dialog import ConnectionDialog
 from views.passphrase_dialog import PassphraseDialog
+from views.file_viewer import FileViewer
 from controllers.main_controller import MainController
+from models.transfer_queue import TransferJob
+from utils.tk_dispatch import TkDispatcher
+
+
+# ไฟล์ที่ใหญ่กว่านี้เปิดได้แค่ใน viewer (editor ต้องโหลดทั้งไฟล์ลง textbox)
+EDITOR_MAX_SIZE = 2 * 1024 * 1024
+# ชี้เมาส์ค้างที่โฟลเดอร์นานเท่านี้ (ms) ถึงเริ่มดึง listing ล่วงหน้า
+HOVER_PREFETCH_DELAY_MS = 300
 
 
 
@@ -24,11 +33,22 @@ class MainView(ctk.CTk):
         self._sort_state = {"name": False, "size": False, "modified": False}
 
         self.controller = MainController()
+        # งานเครือข่ายทั้งหมดวิ่งบน I/O thread ของ connection แล้วส่งผลกลับผ่าน dispatcher
+        self.io = self.controller.get_connection_controller().get_connection().io
+        self.dispatcher = TkDispatcher(self)
+        self.dispatcher.start()
+        self.navigation_future = None
+        self.streaming_seq = None
+        # แถวทั้งหมด (ยังไม่กรอง) ที่สตรีมมาแล้วของ streaming_seq ไว้กรองใหม่ถ้าผู้ใช้พิมพ์ค้นหาระหว่างโหลด
+        self.streaming_rows = []
+        self.hover_job = None
         self.selected_local_file = None
         self.selected_remote_file = None
         self.connection_start_time = None
         self.connection_timer_running = False
         self.disk_usage_retry_count = 0
+        self.transfer_poll_running = False
+        self.listing_poll_running = False
 
         self._setup_ui()
         self._bind_controllers()
@@ -118,6 +138,17 @@ class MainView(ctk.CTk):
         )
         self.connection_timer_label.pack(side="left", padx=20, pady=5)
 
+        self.transfer_status_label = ctk.CTkLabel(
+            status_frame,
+            text="",
+            anchor="w"
+        )
+        self.transfer_status_label.pack(side="left", padx=10, pady=5)
+
+        # แสดงเฉพาะตอนมีงานส่งไฟล์
+        self.transfer_progress_bar = ctk.CTkProgressBar(status_frame, width=160)
+        self.transfer_progress_bar.set(0)
+
         self.disk_usage_label = ctk.CTkLabel(
             status_frame,
             text="",
@@ -131,7 +162,7 @@ class MainView(ctk.CTk):
         file_tab.grid_columnconfigure(1, weight=1)
         file_tab.grid_rowconfigure(0, weight=1)
 
-        self.local_browser = LocalBrowser(file_tab)
+        self.local_browser = LocalBrowser(file_tab, dispatcher=self.dispatcher)
         self.local_browser.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
 
         self.remote_browser = FileBrowser(file_tab, title="🌐 เซิร์ฟเวอร์ (Remote)")
@@ -165,7 +196,18 @@ class MainView(ctk.CTk):
             state="disabled"
         )
         self.download_btn.pack(pady=10)
-        
+
+        self.cancel_transfer_btn = ctk.CTkButton(
+            transfer_frame,
+            text="⏹\nยกเลิก",
+            width=60,
+            height=60,
+            fg_color="gray40",
+            hover_color="gray30",
+            command=self._cancel_transfers,
+            state="disabled"
+        )
+        self.cancel_transfer_btn.pack(pady=10)
 
     def _setup_terminal_tab(self):
         terminal_tab = self.tabview.tab("💻 Terminal")
@@ -181,21 +223,44 @@ class MainView(ctk.CTk):
         self.sidebar.on_connect = self._handle_connect
         self.sidebar.on_load_config = self._handle_load_config
         self.sidebar.on_disconnect = self._handle_disconnect
-        self.sidebar.on_refresh = self._handle_refresh
+        self.sidebar.on_refresh = self._handle_manual_refresh
         self.sidebar.on_upload = self._handle_upload
         self.sidebar.on_new_file = self._handle_new_file
         self.sidebar.on_new_folder = self._handle_new_folder
         self.sidebar.on_appearance_change = self._handle_appearance_change
         self.sidebar.on_language_change = self._handle_language_change
+        self.sidebar.on_watch_toggle = self._handle_watch_toggle
 
         self.remote_browser.on_file_select = self._handle_remote_file_select
         self.remote_browser.on_file_double_click = self._handle_remote_file_double_click
         self.remote_browser.on_context_menu = self._handle_context_menu
+        self.remote_browser.on_file_hover = self._handle_remote_file_hover
 
         self.local_browser.on_file_select = self._handle_local_file_select
 
         file_controller = self.controller.get_file_controller()
-        file_controller.on_directory_change = self._on_directory_changed
+        # ถูกเรียกจาก I/O thread
+        file_controller.on_directory_change = lambda path: self.dispatcher.post(self._on_directory_changed, path)
+        file_controller.on_listing_update = lambda path: self.dispatcher.post(self._on_remote_listing_update, path)
+
+    def _run_remote(self, operation, on_done=None, on_error=None):
+        """รัน operation บน I/O thread แล้วส่งผล (หรือ exception) กลับมาที่ Tk thread"""
+        future = self.io.submit(operation)
+        self.dispatcher.deliver(future, on_done, on_error or self._show_remote_error)
+        return future
+
+    def _show_remote_error(self, error: BaseException):
+        messagebox.showerror("ข้อผิดพลาด", str(error))
+
+    def _report_result(self, result, success_text: str, on_success=None):
+        success, message = result
+        if success:
+            messagebox.showinfo("สำเร็จ", success_text)
+            if on_success:
+                on_success()
+            self._handle_refresh()
+        else:
+            messagebox.showerror("ข้อผิดพลาด", message)
 
     def _handle_connect(self):
         conn_controller = self.controller.get_connection_controller()
@@ -254,6 +319,7 @@ class MainView(ctk.CTk):
                     "password": config.password,
                     "identity_file": config.identity_file,
                     "protocol": config.protocol,
+                    "transfer_settings": config.transfer_settings,
                     "save": False
                 }
                 self._process_connection(result)
@@ -298,21 +364,30 @@ class MainView(ctk.CTk):
             font=ctk.CTkFont(size=13, weight="bold")
         ).pack(side="right", padx=(10, 0))
 
-    def _process_connection(self, result):
+    def _process_connection(self, result, passphrase=None):
         if not result:
             return
 
         conn_controller = self.controller.get_connection_controller()
-
-        success, message = conn_controller.connect(
-            host=result["host"],
-            port=result["port"],
-            username=result["username"],
-            password=result["password"],
-            identity_file=result["identity_file"],
-            protocol=result["protocol"]
+        # เชื่อมต่อ (และเตรียม FileController ผ่าน on_connection_change) บน I/O thread หน้าจอไม่ค้างระหว่างรอ Pi
+        self.status_label.configure(text=f"กำลังเชื่อมต่อ: {result['host']}")
+        self._run_remote(
+            lambda: conn_controller.connect(
+                host=result["host"],
+                port=result["port"],
+                username=result["username"],
+                password=result["password"],
+                identity_file=result["identity_file"],
+                protocol=result["protocol"],
+                passphrase=passphrase,
+                transfer_settings=result.get("transfer_settings")
+            ),
+            lambda outcome: self._on_connected(result, *outcome)
         )
 
+    def _on_connected(self, result, success, message):
+        conn_controller = self.controller.get_connection_controller()
+
         if message == "PASSPHRASE_REQUIRED":
             passphrase_texts = {
                 "title": "🔐 ต้องการ Passphrase",
@@ -331,21 +406,14 @@ class MainView(ctk.CTk):
 
             passphrase = passphrase_dialog.get_passphrase()
             if passphrase is None:
+                self.status_label.configure(text="ไม่ได้เชื่อมต่อ")
                 return
 
-            success, message = conn_controller.connect(
-                host=result["host"],
-                port=result["port"],
-                username=result["username"],
-                password=result["password"],
-                identity_file=result["identity_file"],
-                protocol=result["protocol"],
-                passphrase=passphrase
-            )
+            self._process_connection(result, passphrase)
+            return
 
         if success:
             file_controller = self.controller.get_file_controller()
-            file_controller.initialize()
 
             self.connection_start_time = time.time()
             self.connection_timer_running = True
@@ -364,12 +432,17 @@ class MainView(ctk.CTk):
                     username=result["username"],
                     password=result["password"],
                     identity_file=result["identity_file"],
-                    protocol=result["protocol"]
+                    protocol=result["protocol"],
+                    transfer_settings=result.get("transfer_settings")
                 )
 
             self._update_disk_usage()
             self.terminal.write_welcome(result["host"], result["username"])
+
+            if file_controller.resume_pending_transfers():
+                self._start_transfer_poll()
         else:
+            self.status_label.configure(text="ไม่ได้เชื่อมต่อ")
             messagebox.showerror("ข้อผิดพลาดในการเชื่อมต่อ", message)
 
     def _handle_disconnect(self):
@@ -378,7 +451,9 @@ class MainView(ctk.CTk):
         self.connection_timer_label.configure(text="")
         self.disk_usage_retry_count = 0
 
-        self.controller.get_connection_controller().disconnect()
+        # ปิด session บน I/O thread ต่อท้ายงานที่กำลังรันอยู่ ไม่ปิดทับกลางคำขอ SFTP
+        self.io.cancel_pending()
+        self._run_remote(self.controller.get_connection_controller().disconnect)
         self.status_label.configure(text="ตัดการเชื่อมต่อแล้ว")
         self.sidebar.set_connected(False)
         self._enable_navigation(False)
@@ -388,13 +463,48 @@ class MainView(ctk.CTk):
         self.terminal.clear_output()
         self.upload_btn.configure(state="disabled")
         self.download_btn.configure(state="disabled")
+        self.cancel_transfer_btn.configure(state="disabled")
+        self.transfer_status_label.configure(text="")
+        self.transfer_progress_bar.pack_forget()
 
     def _handle_refresh(self):
         file_controller = self.controller.get_file_controller()
-        files = file_controller.list_current_directory()
-        self.remote_browser.set_files(files)
+        self._run_remote(file_controller.list_current_directory, self._show_listing)
+
+    def _show_listing(self, files, keep_position: bool = False):
+        file_controller = self.controller.get_file_controller()
+        self.remote_browser.set_files(files, keep_position)
         self.path_entry.delete(0, "end")
         self.path_entry.insert(0, file_controller.current_path)
+        if file_controller.is_revalidating() and not self.listing_poll_running:
+            self.listing_poll_running = True
+            self.after(200, self._poll_listing_update)
+
+    def _handle_manual_refresh(self):
+        # ปุ่มรีเฟรชต้องได้ของจริงจาก Pi เสมอ ไม่ใช้ cache
+        self.controller.get_file_controller().invalidate_current_directory()
+        self._handle_refresh()
+
+    def _handle_watch_toggle(self, enabled: bool):
+        self.controller.get_file_controller().set_watch(enabled)
+
+    def _on_remote_listing_update(self, path: str):
+        # โฟลเดอร์ที่ติดตามอยู่เปลี่ยน: cache ถูกแก้แล้ว วาดใหม่จาก cache โดยคงตำแหน่งเลื่อนไว้
+        file_controller = self.controller.get_file_controller()
+        if path == file_controller.current_path:
+            self._run_remote(file_controller.list_current_directory,
+                             lambda files: self._show_listing(files, keep_position=True))
+
+    def _poll_listing_update(self):
+        # listing ที่แสดงจาก cache ถูกตรวจใหม่เบื้องหลัง ถ้าเปลี่ยนไปก็วาดใหม่
+        file_controller = self.controller.get_file_controller()
+        if file_controller.take_listing_update():
+            self.listing_poll_running = False
+            self._handle_refresh()
+        elif file_controller.is_revalidating():
+            self.after(200, self._poll_listing_update)
+        else:
+            self.listing_poll_running = False
 
     def _handle_local_file_select(self, file_info):
         self.selected_local_file = file_info
@@ -405,11 +515,67 @@ class MainView(ctk.CTk):
         self.selected_remote_file = file_info
         if self.controller.get_connection_controller().is_connected():
             self.download_btn.configure(state="normal")
+        if file_info.is_dir:
+            self.controller.get_file_controller().prefetch_directory(file_info.path)
+
+    def _handle_remote_file_hover(self, file_info):
+        # ชี้ค้างไว้สักครู่ถึงนับว่าสนใจ (แค่ลากเมาส์ผ่านไม่ต้องดึง)
+        if self.hover_job is not None:
+            self.after_cancel(self.hover_job)
+            self.hover_job = None
+        if file_info.is_dir:
+            self.hover_job = self.after(HOVER_PREFETCH_DELAY_MS, self._prefetch_hovered, file_info.path)
+
+    def _prefetch_hovered(self, path: str):
+        self.hover_job = None
+        self.controller.get_file_controller().prefetch_directory(path)
 
     def _handle_remote_file_double_click(self, file_info):
         if file_info.is_dir:
             file_controller = self.controller.get_file_controller()
-            file_controller.change_directory(file_info.path)
+            self._navigate(lambda: file_controller.change_directory(file_info.path))
+
+    def _navigate(self, action):
+        """
+        action เปลี่ยนโฟลเดอร์ฝั่ง client แล้วคืนเลขลำดับการนำทาง (None = ไม่ได้ย้าย)
+        การโหลดที่ยังไม่เริ่มของการนำทางก่อนหน้าถูกยกเลิก ผลที่มาช้ากว่าเป้าหมายล่าสุดถูกทิ้ง
+        """
+        file_controller = self.controller.get_file_controller()
+        seq = action()
+        if seq is None:
+            return
+
+        if self.navigation_future is not None:
+            self.navigation_future.cancel()
+        self.navigation_future = self._run_remote(
+            lambda: file_controller.load_directory(
+                seq, lambda batch: self.dispatcher.post(self._append_navigation, seq, batch)),
+            lambda files: self._show_navigation(seq, files),
+            lambda error: self._navigation_failed(seq, error)
+        )
+
+    def _append_navigation(self, seq: int, batch):
+        # โฟลเดอร์ใหญ่: แสดงชุดแรกทันที ชุดต่อ ๆ ไปต่อท้าย จนได้ listing ที่เรียงแล้วมาแทน
+        file_controller = self.controller.get_file_controller()
+        if not file_controller.is_latest_navigation(seq):
+            return
+        if self.streaming_seq != seq:
+            self.streaming_seq = seq
+            self.streaming_rows = list(batch)
+            self.remote_browser.set_files(file_controller.filter_rows(batch))
+        else:
+            self.streaming_rows.extend(batch)
+            self.remote_browser.append_files(file_controller.filter_rows(batch))
+
+    def _show_navigation(self, seq: int, files):
+        if files is not None and self.controller.get_file_controller().is_latest_navigation(seq):
+            self.streaming_rows = []
+            self._show_listing(files, keep_position=self.streaming_seq == seq)
+
+    def _navigation_failed(self, seq: int, error: BaseException):
+        self._show_remote_error(error)
+        # controller ย้อนกลับไปโฟลเดอร์เดิมแล้ว แสดง listing ของโฟลเดอร์นั้นแทนของที่สตรีมมาค้างไว้
+        if self.controller.get_file_controller().is_latest_navigation(seq):
             self._handle_refresh()
 
     def _handle_context_menu(self, file_info, x, y):
@@ -450,44 +616,41 @@ class MainView(ctk.CTk):
         menu.focus_set()
 
     def _handle_back(self):
-        file_controller = self.controller.get_file_controller()
-        if file_controller.go_back():
-            self._handle_refresh()
+        self._navigate(self.controller.get_file_controller().go_back)
 
     def _handle_forward(self):
-        file_controller = self.controller.get_file_controller()
-        if file_controller.go_forward():
-            self._handle_refresh()
+        self._navigate(self.controller.get_file_controller().go_forward)
 
     def _handle_up(self):
-        file_controller = self.controller.get_file_controller()
-        file_controller.go_to_parent()
-        self._handle_refresh()
+        self._navigate(self.controller.get_file_controller().go_to_parent)
 
     def _handle_path_enter(self, event):
         path = self.path_entry.get()
         file_controller = self.controller.get_file_controller()
-        file_controller.change_directory(path)
-        self._handle_refresh()
+        self._navigate(lambda: file_controller.change_directory(path))
 
     def _handle_search(self, event):
+        # กรองจาก listing ที่โหลดไว้แล้วทุกครั้งที่พิมพ์ ไม่ต้อง list ใหม่
         search_text = self.search_entry.get()
+        self.controller.get_file_controller().set_filter(search_text)
+        self._show_current_rows()
+
+    def _show_current_rows(self):
         file_controller = self.controller.get_file_controller()
-        file_controller.set_filter(search_text)
-        self._handle_refresh()
+        if not file_controller.is_navigation_pending():
+            self.remote_browser.set_files(file_controller.current_rows())
+        elif self.streaming_seq is not None and file_controller.is_latest_navigation(self.streaming_seq):
+            # โฟลเดอร์ใหม่กำลังสตรีม: กรองแถวที่มาถึงแล้ว ส่วนการเรียงรอ listing เต็ม
+            self.remote_browser.set_files(file_controller.filter_rows(self.streaming_rows))
+        # นอกนั้น listing ที่ถืออยู่ยังเป็นของโฟลเดอร์เก่า ตัวกรอง/การเรียงใหม่มีผลตอนโหลดเสร็จ
 
     def _handle_upload(self):
-        filename = filedialog.askopenfilename(title="เลือกไฟล์เพื่ออัปโหลด")
-        if filename:
+        filenames = filedialog.askopenfilenames(title="เลือกไฟล์เพื่ออัปโหลด")
+        if filenames:
             file_controller = self.controller.get_file_controller()
-            basename = os.path.basename(filename)
-            success, message = file_controller.upload_file(filename, basename)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "อัปโหลดไฟล์สำเร็จ")
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            for filename in filenames:
+                file_controller.queue_upload(filename, os.path.basename(filename))
+            self._start_transfer_poll()
     
     def _handle_delete(self):
         file_controller = self.controller.get_file_controller()
@@ -508,36 +671,96 @@ class MainView(ctk.CTk):
             messagebox.showerror("ข้อผิดพลาด", message)
 
     def _quick_upload(self):
-        if not self.selected_local_file or self.selected_local_file.is_dir:
-            messagebox.showwarning("คำเตือน", "กรุณาเลือกไฟล์เพื่ออัปโหลด")
+        if not self.selected_local_file:
+            messagebox.showwarning("คำเตือน", "กรุณาเลือกไฟล์หรือโฟลเดอร์เพื่ออัปโหลด")
             return
 
         file_controller = self.controller.get_file_controller()
         basename = os.path.basename(self.selected_local_file.path)
-        success, message = file_controller.upload_file(self.selected_local_file.path, basename)
-
-        if success:
-            messagebox.showinfo("สำเร็จ", f"อัปโหลด {basename} สำเร็จ")
-            self._handle_refresh()
-        else:
-            messagebox.showerror("ข้อผิดพลาด", message)
+        file_controller.queue_upload(self.selected_local_file.path, basename)
+        self._start_transfer_poll()
 
     def _quick_download(self):
-        if not self.selected_remote_file or self.selected_remote_file.is_dir:
-            messagebox.showwarning("คำเตือน", "กรุณาเลือกไฟล์เพื่อดาวน์โหลด")
+        if not self.selected_remote_file:
+            messagebox.showwarning("คำเตือน", "กรุณาเลือกไฟล์หรือโฟลเดอร์เพื่อดาวน์โหลด")
             return
 
         local_path = self.local_browser.current_path
         save_path = os.path.join(local_path, self.selected_remote_file.name)
 
         file_controller = self.controller.get_file_controller()
-        success, message = file_controller.download_file(self.selected_remote_file.path, save_path)
+        file_controller.queue_download(self.selected_remote_file.path, save_path,
+                                       is_dir=self.selected_remote_file.is_dir,
+                                       size=self.selected_remote_file.size)
+        self._start_transfer_poll()
+
+    def _cancel_transfers(self):
+        self.controller.get_file_controller().cancel_transfers()
+
+    def _start_transfer_poll(self):
+        self.cancel_transfer_btn.configure(state="normal")
+        if not self.transfer_progress_bar.winfo_ismapped():
+            self.transfer_progress_bar.pack(side="left", padx=10, pady=5, before=self.transfer_status_label)
+        if not self.transfer_poll_running:
+            self.transfer_poll_running = True
+            self._poll_transfers()
+
+    def _poll_transfers(self):
+        transfer_queue = self.controller.get_file_controller().transfer_queue
+        if transfer_queue is None:
+            self.transfer_poll_running = False
+            self.transfer_status_label.configure(text="")
+            self.transfer_progress_bar.pack_forget()
+            self.cancel_transfer_btn.configure(state="disabled")
+            return
 
-        if success:
-            messagebox.showinfo("สำเร็จ", f"ดาวน์โหลด {self.selected_remote_file.name} สำเร็จ")
+        jobs = transfer_queue.get_jobs()
+        finished = [j for j in jobs if j.is_finished()]
+        rate = transfer_queue.get_throughput().get_rate_str()
+
+        if len(finished) < len(jobs):
+            progress = transfer_queue.get_progress()
+            self.transfer_progress_bar.set(progress.fraction)
+            status = (f"📦 กำลังส่งไฟล์ {len(finished)}/{len(jobs)} • {progress.get_rate_str()}"
+                      f" • เหลือ {progress.get_eta_str()}")
+            dir_jobs = [j for j in jobs if j.is_dir and j.state == TransferJob.RUNNING]
+            if dir_jobs:
+                files_done = sum(j.files_done for j in dir_jobs)
+                files_total = sum(j.files_total for j in dir_jobs)
+                status += f" • โฟลเดอร์ {files_done}/{files_total} ไฟล์"
+            self.transfer_status_label.configure(text=status)
+            self.after(300, self._poll_transfers)
+            return
+
+        self.transfer_poll_running = False
+        self.cancel_transfer_btn.configure(state="disabled")
+        self.transfer_progress_bar.pack_forget()
+        transfer_queue.clear_finished()
+
+        done = [j for j in jobs if j.state == TransferJob.DONE]
+        failed = [j for j in jobs if j.state == TransferJob.FAILED]
+        status = f"📦 ส่งไฟล์สำเร็จ {len(done)}/{len(jobs)} • {rate}"
+        verified = [j for j in done if j.verified]
+        if verified:
+            status += f" • ✔ sha256 {len(verified)}"
+        self.transfer_status_label.configure(text=status)
+
+        if any(j.direction == TransferJob.UPLOAD for j in done):
+            self._handle_refresh()
+        # ถ้าเฝ้าโฟลเดอร์อยู่ ไฟล์ที่ดาวน์โหลดลงมาจะโผล่เองแล้ว ไม่ต้องสแกนใหม่
+        if any(j.direction == TransferJob.DOWNLOAD for j in done) and not self.local_browser.is_watching:
             self.local_browser.refresh()
-        else:
-            messagebox.showerror("ข้อผิดพลาด", message)
+        if failed:
+            details = "\n".join(
+                f"{os.path.basename(j.local_path)}: {j.error}" for j in failed[:10]
+            )
+            messagebox.showerror("ข้อผิดพลาด", f"ส่งไฟล์ไม่สำเร็จ {len(failed)} ไฟล์\n\n{details}")
+        warned = [j for j in done if j.warning]
+        if warned:
+            details = "\n".join(
+                f"{os.path.basename(j.local_path)}: {j.warning}" for j in warned[:10]
+            )
+            messagebox.showwarning("คำเตือน", f"ส่งเสร็จแต่มีคำเตือน {len(warned)} รายการ\n\n{details}")
 
     def _handle_new_file(self):
         dialog = ctk.CTkInputDialog(text="ชื่อไฟล์:", title="สร้างไฟล์ใหม่")
@@ -545,13 +768,8 @@ class MainView(ctk.CTk):
 
         if filename:
             file_controller = self.controller.get_file_controller()
-            success, message = file_controller.create_file(filename)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "สร้างไฟล์สำเร็จ")
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            self._run_remote(lambda: file_controller.create_file(filename),
+                             lambda result: self._report_result(result, "สร้างไฟล์สำเร็จ"))
 
     def _handle_new_folder(self):
         dialog = ctk.CTkInputDialog(text="ชื่อโฟลเดอร์:", title="สร้างโฟลเดอร์ใหม่")
@@ -559,29 +777,25 @@ class MainView(ctk.CTk):
 
         if dirname:
             file_controller = self.controller.get_file_controller()
-            success, message = file_controller.create_directory(dirname)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "สร้างโฟลเดอร์สำเร็จ")
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            self._run_remote(lambda: file_controller.create_directory(dirname),
+                             lambda result: self._report_result(result, "สร้างโฟลเดอร์สำเร็จ"))
 
     def _download_file(self, file_info, callback):
         callback()
-        save_path = filedialog.asksaveasfilename(
-            initialfile=file_info.name,
-            title="บันทึกไฟล์เป็น"
-        )
+        if file_info.is_dir:
+            target_dir = filedialog.askdirectory(title="เลือกโฟลเดอร์ปลายทาง")
+            save_path = os.path.join(target_dir, file_info.name) if target_dir else ""
+        else:
+            save_path = filedialog.asksaveasfilename(
+                initialfile=file_info.name,
+                title="บันทึกไฟล์เป็น"
+            )
 
         if save_path:
             file_controller = self.controller.get_file_controller()
-            success, message = file_controller.download_file(file_info.path, save_path)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "ดาวน์โหลดไฟล์สำเร็จ")
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            file_controller.queue_download(file_info.path, save_path, is_dir=file_info.is_dir,
+                                           size=file_info.size)
+            self._start_transfer_poll()
 
     def _rename_file(self, file_info, callback):
         callback()
@@ -593,72 +807,50 @@ class MainView(ctk.CTk):
 
         if new_name:
             file_controller = self.controller.get_file_controller()
-            success, message = file_controller.rename(file_info.name, new_name)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "เปลี่ยนชื่อสำเร็จ")
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            self._run_remote(lambda: file_controller.rename(file_info.name, new_name),
+                             lambda result: self._report_result(result, "เปลี่ยนชื่อสำเร็จ"))
 
     def _delete_file(self, file_info, callback):
         callback()
         if messagebox.askyesno("ยืนยันการลบ", f"ลบ '{file_info.name}' หรือไม่?"):
             file_controller = self.controller.get_file_controller()
-
-            if file_info.is_dir:
-                success, message = file_controller.delete_directory(file_info.path)
-            else:
-                success, message = file_controller.delete_file(file_info.path)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "ลบสำเร็จ")
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            delete = file_controller.delete_directory if file_info.is_dir else file_controller.delete_file
+            self._run_remote(lambda: delete(file_info.path),
+                             lambda result: self._report_result(result, "ลบสำเร็จ"))
 
     def _view_file(self, file_info, callback):
         callback()
         file_controller = self.controller.get_file_controller()
-        success, content = file_controller.read_file(file_info.path)
+        self._run_remote(lambda: file_controller.open_reader(file_info.path),
+                         lambda result: self._open_viewer(file_info, *result))
 
+    def _open_viewer(self, file_info, success, reader):
         if not success:
-            messagebox.showerror("ข้อผิดพลาด", content)
+            messagebox.showerror("ข้อผิดพลาด", reader)
             return
 
-        dialog = ctk.CTkToplevel(self)
-        dialog.title(f"ดูเนื้อหา: {file_info.name}")
-        dialog.geometry("800x600")
-
-        main_frame = ctk.CTkFrame(dialog)
-        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        textbox = ctk.CTkTextbox(
-            main_frame,
-            font=ctk.CTkFont(family="Consolas", size=12),
-            wrap="none"
-        )
-        textbox.pack(fill="both", expand=True)
-        textbox.insert("1.0", content)
-        textbox.configure(state="disabled")
-
-        ctk.CTkButton(
-            main_frame,
-            text="ปิด",
-            command=dialog.destroy,
-            width=100,
-            height=35
-        ).pack(pady=(10, 0))
+        FileViewer(self, reader, f"ดูเนื้อหา: {file_info.name}", self.io, self.dispatcher)
 
     def _edit_file(self, file_info, callback):
         callback()
+        if file_info.size > EDITOR_MAX_SIZE:
+            if messagebox.askyesno(
+                "ไฟล์ใหญ่",
+                f"ไฟล์มีขนาด {file_info.get_size_str()} ใหญ่เกินกว่าจะแก้ไขได้\nเปิดดูแบบอ่านอย่างเดียวแทนหรือไม่?"
+            ):
+                self._view_file(file_info, lambda: None)
+            return
+
         file_controller = self.controller.get_file_controller()
-        success, content = file_controller.read_file(file_info.path)
+        self._run_remote(lambda: file_controller.read_file(file_info.path),
+                         lambda result: self._open_editor(file_info, *result))
 
+    def _open_editor(self, file_info, success, content):
         if not success:
             messagebox.showerror("ข้อผิดพลาด", content)
             return
 
+        file_controller = self.controller.get_file_controller()
         dialog = ctk.CTkToplevel(self)
         dialog.title(f"แก้ไข: {file_info.name}")
         dialog.geometry("800x600")
@@ -679,14 +871,8 @@ class MainView(ctk.CTk):
 
         def save_content():
             new_content = textbox.get("1.0", "end-1c")
-            success, message = file_controller.write_file(file_info.path, new_content)
-
-            if success:
-                messagebox.showinfo("สำเร็จ", "บันทึกไฟล์สำเร็จ")
-                dialog.destroy()
-                self._handle_refresh()
-            else:
-                messagebox.showerror("ข้อผิดพลาด", message)
+            self._run_remote(lambda: file_controller.write_file(file_info.path, new_content),
+                             lambda result: self._report_result(result, "บันทึกไฟล์สำเร็จ", dialog.destroy))
 
         ctk.CTkButton(
             button_frame,
@@ -723,8 +909,12 @@ class MainView(ctk.CTk):
             return
 
         ssh_conn = self.controller.get_connection_controller().get_connection()
-        stdout, stderr, exit_code = ssh_conn.execute_command(command)
+        # คำสั่งรันบน channel ของตัวเองใน lane แยก ผลลัพธ์กลับมาเขียนลง terminal บน Tk thread
+        future = self.io.submit_command(ssh_conn.execute_command, command)
+        self.dispatcher.deliver(future, lambda result: self._show_command_result(*result),
+                                lambda error: self.terminal.append_output(f"\nError: {error}\n", "error"))
 
+    def _show_command_result(self, stdout: str, stderr: str, exit_code: int):
         if stdout:
             self.terminal.append_output(stdout, "output")
         if stderr:
@@ -758,10 +948,12 @@ class MainView(ctk.CTk):
         self.up_btn.configure(state=state)
 
     def _update_disk_usage(self):
-        try:
-            file_controller = self.controller.get_file_controller()
-            usage = file_controller.get_disk_usage()
+        file_controller = self.controller.get_file_controller()
+        self._run_remote(file_controller.get_disk_usage, self._show_disk_usage,
+                         lambda error: self.disk_usage_label.configure(text=""))
 
+    def _show_disk_usage(self, usage):
+        try:
             if usage["total"] == 0:
                 if self.disk_usage_retry_count < 3:
                     self.disk_usage_label.configure(text="กำลังโหลดข้อมูลดิสก์...")
@@ -807,7 +999,7 @@ class MainView(ctk.CTk):
         fc = self.controller.get_file_controller()
         fc.set_sort(key, reverse)            # มีอยู่แล้วใน FileController
         self.remote_browser.update_sort_indicator(key, reverse)
-        self._handle_refresh()
+        self._show_current_rows()
         fc = self.controller.get_file_controller()
         self.remote_browser.update_sort_indicator(getattr(fc, "sort_key", "name"),
                                                 getattr(fc, "sort_reverse", False))
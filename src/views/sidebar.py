@@ -15,6 +15,7 @@ class Sidebar(ctk.CTkFrame):
         self.on_delete: Optional[Callable] = None
         self.on_appearance_change: Optional[Callable] = None
         self.on_language_change: Optional[Callable] = None
+        self.on_watch_toggle: Optional[Callable[[bool], None]] = None
 
         self._setup_ui()
 
@@ -103,12 +104,21 @@ class Sidebar(ctk.CTkFrame):
         )
         self.upload_btn.grid(row=9, column=0, padx=20, pady=10)
 
+        # ติดตามการเปลี่ยนแปลงบน Pi แบบสด (เปิดเองเมื่อต้องการ)
+        self.watch_switch = ctk.CTkSwitch(
+            self,
+            text="👁️ ติดตามแบบสด",
+            command=self._handle_watch_toggle,
+            state="disabled"
+        )
+        self.watch_switch.grid(row=10, column=0, padx=20, pady=10)
+
         self.language_label = ctk.CTkLabel(
             self,
             text="ภาษา:",
             anchor="w"
         )
-        self.language_label.grid(row=10, column=0, padx=20, pady=(10, 0))
+        self.language_label.grid(row=11, column=0, padx=20, pady=(10, 0))
 
         self.language_menu = ctk.CTkOptionMenu(
             self,
@@ -116,14 +126,14 @@ class Sidebar(ctk.CTkFrame):
             command=self._handle_language_change
         )
         self.language_menu.set("ไทย 🇹🇭")
-        self.language_menu.grid(row=11, column=0, padx=20, pady=(10, 10))
+        self.language_menu.grid(row=12, column=0, padx=20, pady=(10, 10))
 
         self.appearance_label = ctk.CTkLabel(
             self,
             text="รูปแบบ:",
             anchor="w"
         )
-        self.appearance_label.grid(row=12, column=0, padx=20, pady=(10, 0))
+        self.appearance_label.grid(row=13, column=0, padx=20, pady=(10, 0))
 
         self.appearance_menu = ctk.CTkOptionMenu(
             self,
@@ -131,7 +141,7 @@ class Sidebar(ctk.CTkFrame):
             command=self._handle_appearance_change
         )
         self.appearance_menu.set("มืด")
-        self.appearance_menu.grid(row=13, column=0, padx=20, pady=(10, 20))
+        self.appearance_menu.grid(row=14, column=0, padx=20, pady=(10, 20))
 
     def set_connected(self, connected: bool):
         if connected:
@@ -141,6 +151,7 @@ class Sidebar(ctk.CTkFrame):
             self.new_file_btn.configure(state="normal")
             self.new_folder_btn.configure(state="normal")
             self.upload_btn.configure(state="normal")
+            self.watch_switch.configure(state="normal")
         else:
             self.connect_btn.configure(state="normal")
             self.disconnect_btn.configure(state="disabled")
@@ -148,6 +159,7 @@ class Sidebar(ctk.CTkFrame):
             self.new_file_btn.configure(state="disabled")
             self.new_folder_btn.configure(state="disabled")
             self.upload_btn.configure(state="disabled")
+            self.watch_switch.configure(state="disabled")
 
     def _handle_connect(self):
         if self.on_connect:
@@ -185,6 +197,10 @@ class Sidebar(ctk.CTkFrame):
         if self.on_delete:
             self.on_delete()
 
+    def _handle_watch_toggle(self):
+        if self.on_watch_toggle:
+            self.on_watch_toggle(bool(self.watch_switch.get()))
+
     def _handle_language_change(self, lang: str):
         if self.on_language_change:
             self.on_language_change(lang)
@@ -209,6 +225,7 @@ class Sidebar(ctk.CTkFrame):
         self.new_file_btn.configure(text=texts.get("new_file", "📄 ไฟล์ใหม่"))
         self.new_folder_btn.configure(text=texts.get("new_folder", "📁 โฟลเดอร์ใหม่"))
         self.upload_btn.configure(text=texts.get("upload", "📤 อัปโหลด"))
+        self.watch_switch.configure(text=texts.get("live_watch", "👁️ ติดตามแบบสด"))
         self.language_label.configure(text=texts.get("language", "ภาษา:"))
         self.appearance_label.configure(text=texts.get("appearance", "รูปแบบ:"))
 
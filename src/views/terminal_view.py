@@ -1,6 +1,5 @@
 import customtkinter as ctk
 from typing import Optional, Callable
-import threading
 
 
 class TerminalView(ctk.CTkFrame):
@@ -94,10 +93,7 @@ class TerminalView(ctk.CTkFrame):
         self.append_output(f"{prompt}{command}\n", "command")
         self.command_entry.delete(0, "end")
 
-        if self.on_command:
-            threading.Thread(target=self._execute_command, args=(command,), daemon=True).start()
-
-    def _execute_command(self, command):
+        # on_command ส่งคำสั่งเข้า I/O executor เอง ไม่บล็อก Tk thread
         if self.on_command:
             self.on_command(command)
 
@@ -0,0 +1,238 @@
+import customtkinter as ctk
+import tkinter as tk
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+ROW_HEIGHT = 28
+WHEEL_ROWS = 3
+CELL_PADX = 10
+
+# (ความกว้าง px หรือ 0 = ยืดเต็มพื้นที่ที่เหลือ, anchor "w"/"e")
+Column = Tuple[int, str]
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    ตารางแบบ virtual: วาดเฉพาะแถวที่มองเห็นลงบน canvas เดียว
+    - item บน canvas มีเป็นชุด (pool) ตามความสูงหน้าต่าง เลื่อนแล้วแค่เปลี่ยนข้อความ
+    - event ของทุกแถวผ่าน binding ชุดเดียวบน canvas แล้วคำนวณแถวจากพิกัด y
+    ต้นทุนการวาดจึงขึ้นกับจำนวนแถวที่เห็น ไม่ขึ้นกับจำนวนรายการ
+    """
+
+    def __init__(self, master, columns: List[Column], row_height: int = ROW_HEIGHT, **kwargs):
+        super().__init__(master, **kwargs)
+
+        self.columns = columns
+        self.row_height = row_height
+        self.on_select: Optional[Callable[[object], None]] = None
+        self.on_double_click: Optional[Callable[[object], None]] = None
+        self.on_context_menu: Optional[Callable[[object, int, int], None]] = None
+        self.on_hover: Optional[Callable[[object], None]] = None
+        # ใช้จับคู่แถวที่เลือกไว้หลังรายการถูกแทน/แทรก (รายการใหม่อาจเป็นคนละ object กับของเดิม)
+        self.item_key: Callable[[object], object] = lambda item: item
+
+        self._items: Sequence = []
+        self._render_row: Callable[[object], Sequence[str]] = lambda item: ()
+        self._top = 0
+        self._selected: Optional[int] = None
+        self._selected_key = None
+        # แต่ละ slot = (สี่เหลี่ยมพื้นหลัง, ข้อความทีละคอลัมน์)
+        self._pool: List[Tuple[int, List[int]]] = []
+        self._render_job = None
+        self._hovered: Optional[int] = None
+
+        self.font = ctk.CTkFont()
+        self.canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self._apply_colors()
+
+        self.canvas.bind("<Configure>", lambda e: self._schedule_render())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<Button-3>", self._on_right_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", lambda e: setattr(self, "_hovered", None))
+        self.canvas.bind("<MouseWheel>", lambda e: self._scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.canvas.bind("<Button-4>", lambda e: self._scroll(-WHEEL_ROWS))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll(WHEEL_ROWS))
+
+    # ---------- Public API ----------
+    def set_items(self, items: Sequence, render_row: Callable[[object], Sequence[str]],
+                  keep_position: bool = False):
+        """render_row แปลงรายการเป็นข้อความทีละคอลัมน์ (ถูกเรียกเฉพาะแถวที่มองเห็น)"""
+        self._items = items
+        self._render_row = render_row
+        if keep_position:
+            self._relocate_selection()
+        else:
+            self._top = 0
+            self._select(None)
+        self._schedule_render()
+
+    def clear(self):
+        self.set_items([], self._render_row)
+
+    def refresh(self):
+        """วาดใหม่หลังรายการเดิมถูกเพิ่ม/แก้ในที่ (คงตำแหน่งเลื่อนและแถวที่เลือกไว้)"""
+        self._relocate_selection()
+        self._schedule_render()
+
+    # ---------- Selection ----------
+    def _select(self, index: Optional[int]):
+        self._selected = index
+        self._selected_key = None if index is None else self.item_key(self._items[index])
+
+    def _relocate_selection(self):
+        # แถวที่เลือกอาจเลื่อนไปเพราะมีรายการแทรก/ถูกลบด้านบน ตามหาจาก key (ไม่เจอ = ถูกลบไปแล้ว)
+        if self._selected_key is None:
+            return
+        key = self.item_key
+        index = self._selected
+        if index is not None and index < len(self._items) and key(self._items[index]) == self._selected_key:
+            return
+        self._selected = next((i for i, item in enumerate(self._items) if key(item) == self._selected_key), None)
+        if self._selected is None:
+            self._selected_key = None
+
+    # ---------- Rendering ----------
+    def _schedule_render(self):
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _render(self):
+        self._render_job = None
+        width = self.canvas.winfo_width()
+        slots = self._visible_rows() + 1
+        self._top = max(0, min(self._top, len(self._items) - self._visible_rows()))
+        self._ensure_pool(slots)
+
+        layout = self._column_layout(width)
+        for slot, (rect, texts) in enumerate(self._pool):
+            index = self._top + slot
+            if slot >= slots or index >= len(self._items):
+                self.canvas.itemconfigure(rect, state="hidden")
+                for text in texts:
+                    self.canvas.itemconfigure(text, state="hidden")
+                continue
+
+            y = slot * self.row_height
+            self.canvas.coords(rect, 0, y, width, y + self.row_height)
+            self.canvas.itemconfigure(rect, state="normal" if index == self._selected else "hidden")
+            values = self._render_row(self._items[index])
+            for text, value, (x, span, anchor) in zip(texts, values, layout):
+                self.canvas.coords(text, x, y + self.row_height // 2)
+                self.canvas.itemconfigure(text, text=self._fit(value, span), anchor=anchor, state="normal")
+
+        self._update_scrollbar()
+
+    def _ensure_pool(self, slots: int):
+        while len(self._pool) < slots:
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, width=0, fill=self._select_color, state="hidden")
+            texts = [self.canvas.create_text(0, 0, font=self.font, fill=self._text_color, state="hidden")
+                     for _ in self.columns]
+            self._pool.append((rect, texts))
+
+    def _column_layout(self, width: int) -> List[Tuple[int, int, str]]:
+        """ตำแหน่งข้อความ (x, ความกว้างที่ใช้ได้, anchor) ของแต่ละคอลัมน์ ให้ตรงกับ header ที่ใช้ grid"""
+        fixed = sum(w for w, _ in self.columns if w)
+        stretch = max(0, width - fixed)
+        layout = []
+        left = 0
+        for col_width, anchor in self.columns:
+            span = col_width or stretch
+            x = left + span - CELL_PADX if anchor == "e" else left + CELL_PADX
+            layout.append((x, max(0, span - 2 * CELL_PADX), anchor))
+            left += span
+        return layout
+
+    def _fit(self, text: str, span: int) -> str:
+        # ตัดข้อความที่ยาวเกินคอลัมน์ (วัดเฉพาะแถวที่มองเห็น)
+        if not text or self.font.measure(text) <= span:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.font.measure(text[:mid] + "…") <= span:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low] + "…"
+
+    def _update_scrollbar(self):
+        total = len(self._items)
+        if total:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible_rows()) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _apply_colors(self):
+        theme = ctk.ThemeManager.theme
+        self._text_color = self._apply_appearance_mode(theme["CTkLabel"]["text_color"])
+        self._select_color = self._apply_appearance_mode(theme["CTkButton"]["fg_color"])
+        self.canvas.configure(bg=self._apply_appearance_mode(self._fg_color))
+        for rect, texts in self._pool:
+            self.canvas.itemconfigure(rect, fill=self._select_color)
+            for text in texts:
+                self.canvas.itemconfigure(text, fill=self._text_color)
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        self._apply_colors()
+
+    # ---------- Scrolling ----------
+    def _scroll(self, rows: int):
+        self._top += rows
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args and args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self._items))
+            self._schedule_render()
+        elif args and args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= max(1, self._visible_rows() - 1)
+            self._scroll(step)
+
+    # ---------- Events (binding เดียวต่อชนิด event) ----------
+    def _index_at(self, y: int) -> Optional[int]:
+        index = self._top + y // self.row_height
+        return index if 0 <= index < len(self._items) else None
+
+    def _on_click(self, event):
+        index = self._index_at(event.y)
+        if index is None:
+            return
+        self._select(index)
+        self._render()
+        if self.on_select:
+            self.on_select(self._items[index])
+
+    def _on_double_click(self, event):
+        index = self._index_at(event.y)
+        if index is not None and self.on_double_click:
+            self.on_double_click(self._items[index])
+
+    def _on_right_click(self, event):
+        index = self._index_at(event.y)
+        if index is None:
+            return
+        self._select(index)
+        self._render()
+        if self.on_context_menu:
+            self.on_context_menu(self._items[index], event.x_root, event.y_root)
+
+    def _on_motion(self, event):
+        # แจ้งเฉพาะตอนเปลี่ยนแถว ไม่ใช่ทุกพิกเซลที่เมาส์ขยับ
+        index = self._index_at(event.y)
+        if index == self._hovered:
+            return
+        self._hovered = index
+        if index is not None and self.on_hover:
+            self.on_hover(self._items[index])
@@ -0,0 +1,23 @@
+import os
+import sys
+
+# โค้ดอยู่ใน src/ และ import กันแบบ models.xxx (เหมือนตอนรันจาก main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+
+from sshd import LoopbackSSH
+
+
+@pytest.fixture
+def sshd():
+    server = LoopbackSSH()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def sftp(sshd):
+    client = sshd.open_sftp()
+    yield client
+    client.close()
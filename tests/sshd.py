@@ -0,0 +1,206 @@
+"""
+SSH server จำลองในโปรเซสเดียวกันสำหรับเทสต์ (ต่อกันผ่าน socketpair ไม่เปิดพอร์ต)
+- SFTP อ่าน/เขียนไฟล์จริงบนเครื่อง (เทสต์ใช้ใต้ tmp_path) ผ่าน SFTPServer ของ paramiko
+  ไม่มี extension ของ OpenSSH อย่าง copy-data/fsync จึงใช้ทดสอบทางสำรองได้
+- exec channel รันคำสั่งด้วย bash บนเครื่อง (tar, sha256sum, python3 แทนของบน Pi)
+"""
+import os
+import socket
+import subprocess
+import threading
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface, SFTP_OK
+
+_host_key = None
+
+
+def _errno(e: OSError):
+    return SFTPServer.convert_errno(e.errno)
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return _errno(e)
+
+    def chattr(self, attr):
+        try:
+            SFTPServer.set_file_attr(self.filename, attr)
+            return SFTP_OK
+        except OSError as e:
+            return _errno(e)
+
+
+class _LocalFS(SFTPServerInterface):
+    def list_folder(self, path):
+        try:
+            entries = []
+            for name in os.listdir(path):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return _errno(e)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return _errno(e)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return _errno(e)
+
+    def open(self, path, flags, attr):
+        try:
+            mode = getattr(attr, 'st_mode', None) or 0o666
+            fd = os.open(path, flags, mode)
+        except OSError as e:
+            return _errno(e)
+        if flags & os.O_WRONLY:
+            fmode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            fmode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            fmode = 'rb'
+        handle = _Handle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, fmode)
+        return handle
+
+    def remove(self, path):
+        return self._call(os.remove, path)
+
+    def rename(self, old, new):
+        # SFTP rename แบบดั้งเดิมไม่เขียนทับ (เหมือน OpenSSH)
+        if os.path.lexists(new):
+            return SFTPServer.convert_errno(17)
+        return self._call(os.rename, old, new)
+
+    def posix_rename(self, old, new):
+        return self._call(os.rename, old, new)
+
+    def mkdir(self, path, attr):
+        return self._call(os.mkdir, path)
+
+    def rmdir(self, path):
+        return self._call(os.rmdir, path)
+
+    def chattr(self, path, attr):
+        try:
+            SFTPServer.set_file_attr(path, attr)
+            return SFTP_OK
+        except OSError as e:
+            return _errno(e)
+
+    def readlink(self, path):
+        try:
+            return os.readlink(path)
+        except OSError as e:
+            return _errno(e)
+
+    def symlink(self, target, path):
+        return self._call(os.symlink, target, path)
+
+    def canonicalize(self, path):
+        return os.path.normpath(path if path.startswith('/') else os.path.join(os.getcwd(), path))
+
+    @staticmethod
+    def _call(fn, *args):
+        try:
+            fn(*args)
+            return SFTP_OK
+        except OSError as e:
+            return _errno(e)
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, sshd: "LoopbackSSH"):
+        self.sshd = sshd
+
+    def get_allowed_auths(self, username):
+        return 'none'
+
+    def check_auth_none(self, username):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        command = command.decode()
+        self.sshd.commands.append(command)
+        threading.Thread(target=self._run, args=(channel, command), daemon=True).start()
+        return True
+
+    @staticmethod
+    def _run(channel, command):
+        proc = subprocess.Popen(['bash', '-c', command], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def feed():
+            try:
+                for data in iter(lambda: channel.recv(65536), b''):
+                    proc.stdin.write(data)
+            except (OSError, EOFError):
+                pass
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+        def errors():
+            for data in iter(lambda: proc.stderr.read1(65536), b''):
+                channel.sendall_stderr(data)
+
+        threading.Thread(target=feed, daemon=True).start()
+        err_thread = threading.Thread(target=errors, daemon=True)
+        err_thread.start()
+        try:
+            for data in iter(lambda: proc.stdout.read1(65536), b''):
+                channel.sendall(data)
+            err_thread.join()
+            channel.send_exit_status(proc.wait())
+        except (OSError, EOFError):
+            proc.kill()
+        finally:
+            channel.close()
+
+
+class LoopbackSSH:
+    def __init__(self):
+        global _host_key
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(1024)
+        self.commands = []
+        client_sock, server_sock = socket.socketpair()
+        self._server = paramiko.Transport(server_sock)
+        self._server.add_server_key(_host_key)
+        self._server.set_subsystem_handler('sftp', SFTPServer, _LocalFS)
+        # ให้ event ไป start_server จะไม่รอ handshake (ฝั่ง client ยังไม่เริ่ม)
+        self._server.start_server(event=threading.Event(), server=_Server(self))
+        self.transport = paramiko.Transport(client_sock)
+        self.transport.start_client()
+        self.transport.auth_none('pi')
+
+    def set_window_size(self, size: int):
+        """window ของ channel ที่เปิดหลังจากนี้ทั้งสองฝั่ง (ไว้ทดสอบกรณี window เต็ม)"""
+        self.transport.default_window_size = size
+        self._server.default_window_size = size
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        return paramiko.SFTPClient.from_transport(self.transport)
+
+    def close(self):
+        self.transport.close()
+        self._server.close()
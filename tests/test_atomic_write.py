@@ -0,0 +1,101 @@
+import os
+import stat
+
+import pytest
+
+from models.file_operations import SKIP_UNCHANGED_MIN_SIZE, FileOperations
+
+
+@pytest.fixture
+def ops(sftp):
+    return FileOperations(sftp)
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.lstat(path).st_mode)
+
+
+def leftovers(tmp_path):
+    return [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+
+def test_write_replaces_content_and_keeps_the_mode(ops, tmp_path):
+    target = tmp_path / "config.txt"
+    target.write_text("old")
+    os.chmod(target, 0o600)
+
+    assert ops.write_file(str(target), "new content") == (True, "File written successfully")
+    assert target.read_text() == "new content"
+    assert mode_of(target) == 0o600
+    assert leftovers(tmp_path) == []
+
+
+def test_create_uses_default_mode(ops, tmp_path):
+    assert ops.create_file(str(tmp_path / "new.txt"), "x")[0]
+    assert mode_of(tmp_path / "new.txt") == 0o644
+
+
+def test_write_through_a_symlink_keeps_the_link(ops, tmp_path):
+    (tmp_path / "real").write_text("old")
+    os.chmod(tmp_path / "real", 0o640)
+    os.symlink("real", tmp_path / "link1")
+    os.symlink(str(tmp_path / "link1"), tmp_path / "link2")
+
+    assert ops.write_file(str(tmp_path / "link2"), "new")[0]
+    assert os.path.islink(tmp_path / "link2") and os.path.islink(tmp_path / "link1")
+    assert (tmp_path / "real").read_text() == "new"
+    assert mode_of(tmp_path / "real") == 0o640
+
+
+def test_symlink_loop_is_an_error_not_a_replaced_link(ops, tmp_path):
+    os.symlink("b", tmp_path / "a")
+    os.symlink("a", tmp_path / "b")
+
+    success, message = ops.write_file(str(tmp_path / "a"), "new")
+    assert not success and "symbolic links" in message
+    assert os.readlink(tmp_path / "a") == "b"
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_write_leaves_the_original_file(ops, tmp_path, monkeypatch):
+    target = tmp_path / "data.bin"
+    target.write_bytes(b"original")
+    drain = ops.transfer_engine._drain_acks
+
+    def disk_full(handle, keep):
+        drain(handle, keep)
+        if keep == 0:
+            raise IOError("No space left on device")
+
+    monkeypatch.setattr(ops.transfer_engine, "_drain_acks", disk_full)
+    assert ops.write_file(str(target), "x" * 100000) == (False, "No space left on device")
+    assert target.read_bytes() == b"original"
+    assert leftovers(tmp_path) == []
+
+
+def test_plain_rename_fallback_replaces_the_file(ops, sftp, tmp_path, monkeypatch):
+    target = tmp_path / "data.txt"
+    target.write_text("old")
+
+    def unsupported(old, new):
+        raise IOError("Operation unsupported")
+
+    monkeypatch.setattr(sftp, "posix_rename", unsupported)
+    assert ops.write_file(str(target), "new")[0]
+    assert target.read_text() == "new"
+    assert leftovers(tmp_path) == []
+
+
+def test_unchanged_check_only_runs_for_large_files(ops, sshd, tmp_path):
+    small = tmp_path / "small.txt"
+    small.write_text("same")
+    assert ops.write_file(str(small), "same") == (True, "File written successfully")
+    assert sshd.commands == []
+
+    content = "y" * SKIP_UNCHANGED_MIN_SIZE
+    large = tmp_path / "large.txt"
+    large.write_text(content)
+    before = os.stat(large).st_ino
+    assert ops.write_file(str(large), content) == (True, "File unchanged")
+    assert os.stat(large).st_ino == before
+    assert len(sshd.commands) == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import models.bandwidth as bandwidth
+from models.bandwidth import (BULK_SIZE, PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_NORMAL,
+                              BandwidthLimiter, TokenBucket, classify_priority)
+
+
+def test_unlimited_bucket_never_sleeps(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda s: (_ for _ in ()).throw(AssertionError("slept")))
+    bucket = TokenBucket(0)
+    for _ in range(1000):
+        bucket.consume(1 << 20)
+
+
+def test_bucket_sleeps_off_debt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    bucket = TokenBucket(1000)
+    # burst = 0.25 วินาทีของ rate ใช้ได้ทันที
+    bucket.consume(250)
+    assert sleeps == []
+    bucket.consume(500)
+    assert len(sleeps) == 1 and 0.45 < sleeps[0] <= 0.5
+
+
+def test_set_rate_resets_to_full_burst(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    bucket = TokenBucket(1000)
+    bucket.consume(5000)
+    bucket.set_rate(4000)
+    sleeps.clear()
+    bucket.consume(1000)
+    assert sleeps == []
+
+
+def test_classify_priority():
+    assert classify_priority(0) == PRIORITY_NORMAL
+    assert classify_priority(BULK_SIZE - 1) == PRIORITY_NORMAL
+    assert classify_priority(BULK_SIZE) == PRIORITY_BULK
+
+
+def test_bulk_waits_for_short_interactive_section():
+    limiter = BandwidthLimiter()
+    done = threading.Event()
+    with limiter.interactive():
+        worker = threading.Thread(target=lambda: (limiter.throttle(1, priority=PRIORITY_BULK), done.set()))
+        worker.start()
+        assert not done.wait(0.2)
+    assert done.wait(1.0)
+    worker.join()
+
+
+def test_interactive_priority_is_never_held_back():
+    limiter = BandwidthLimiter()
+    with limiter.interactive():
+        start = time.monotonic()
+        limiter.throttle(1, priority=PRIORITY_INTERACTIVE)
+        assert time.monotonic() - start < 0.1
+
+
+def test_long_interactive_section_stops_preempting(monkeypatch):
+    monkeypatch.setattr(bandwidth, "MAX_PREEMPT_SPAN", 0.2)
+    limiter = BandwidthLimiter()
+    with limiter.interactive():
+        time.sleep(0.25)
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.throttle(1)
+        assert time.monotonic() - start < 0.1
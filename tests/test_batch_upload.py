@@ -0,0 +1,73 @@
+import hashlib
+import os
+import threading
+import time
+
+from models.checksum import remote_sha256_many
+from models.directory_transfer import BatchUploader
+from models.transfer_engine import COMPRESSION_OFF, TransferSettings
+from models.transfer_queue import TransferJob, TransferQueue
+
+
+def wait_for(jobs, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not all(j.is_finished() for j in jobs):
+        assert time.monotonic() < deadline, [j.state for j in jobs]
+        time.sleep(0.01)
+
+
+def test_sha256_of_many_paths_goes_through_stdin(sshd, tmp_path):
+    odd = ["plain.txt", "back\\slash.txt", "new\nline.txt", "space  two.txt"]
+    for name in odd:
+        (tmp_path / name).write_bytes(name.encode())
+    # รวมกันยาวเกิน ARG_MAX ของคำสั่งเดียว (ไฟล์ที่ไม่มีอยู่ถูกข้ามไป)
+    missing = [str(tmp_path / ("m" * 200) / f"{n:06d}") for n in range(12000)]
+
+    digests = remote_sha256_many(sshd.transport, missing + [str(tmp_path / name) for name in odd])
+    assert digests == {str(tmp_path / name): hashlib.sha256(name.encode()).hexdigest() for name in odd}
+    assert remote_sha256_many(sshd.transport, []) == {}
+
+
+def test_batch_leaves_link_targets_to_sftp(sshd, tmp_path):
+    (tmp_path / "local").mkdir()
+    (tmp_path / "remote").mkdir()
+    (tmp_path / "remote" / "real").write_text("old")
+    os.symlink("real", tmp_path / "remote" / "soft")
+    (tmp_path / "remote" / "shared").write_text("old")
+    os.link(tmp_path / "remote" / "shared", tmp_path / "remote" / "hard")
+    items = []
+    for name in ("plain", "soft", "hard"):
+        (tmp_path / "local" / name).write_text(f"new {name}")
+        items.append((str(tmp_path / "local" / name), str(tmp_path / "remote" / name)))
+
+    assert BatchUploader(sshd.transport).upload(items) == ["", None, None]
+    assert (tmp_path / "remote" / "plain").read_text() == "new plain"
+    assert os.path.islink(tmp_path / "remote" / "soft")
+    assert os.stat(tmp_path / "remote" / "hard").st_nlink == 2
+
+
+def test_queue_sends_link_targets_one_by_one(sshd, tmp_path, monkeypatch):
+    # worker หยิบงานแรกแล้วรอจนงานทั้งสามเข้าคิวครบ ก่อนตัดสินว่าจะรวมเป็น tar
+    ready = threading.Event()
+    has_tar = TransferQueue._remote_has_tar
+    monkeypatch.setattr(TransferQueue, "_remote_has_tar", lambda self: ready.wait() and has_tar(self))
+    (tmp_path / "local").mkdir()
+    (tmp_path / "remote").mkdir()
+    (tmp_path / "remote" / "real").write_text("old")
+    os.symlink("real", tmp_path / "remote" / "soft")
+    queue = TransferQueue(sshd.transport, workers=1, settings=TransferSettings(compression=COMPRESSION_OFF, verify=True))
+    jobs = []
+    for name in ("a", "b", "soft"):
+        (tmp_path / "local" / name).write_text(f"new {name}")
+        jobs.append(queue.submit_upload(str(tmp_path / "local" / name), str(tmp_path / "remote" / name)))
+    ready.set()
+    wait_for(jobs)
+    queue.stop()
+
+    assert [j.state for j in jobs] == [TransferJob.DONE] * 3
+    assert all(j.verified for j in jobs)
+    assert sum(c.startswith("umask 022 && tar -x") for c in sshd.commands) == 1
+    assert not jobs[2].batchable
+    assert os.path.islink(tmp_path / "remote" / "soft")
+    assert (tmp_path / "remote" / "real").read_text() == "new soft"
+    assert (tmp_path / "remote" / "a").read_text() == "new a"
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+
+from models.checksum import ChecksumMismatch, RemoteChecksum, compare_remote_digest
+from models.file_operations import FileOperations
+from models.transfer_engine import RESUME_CHECK_SIZE, TransferEngine
+
+
+def sha256_of(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_remote_checksum_runs_on_the_pi(sshd, tmp_path):
+    (tmp_path / "a b.txt").write_bytes(os.urandom(5000))
+    remote = RemoteChecksum(sshd.transport, str(tmp_path / "a b.txt"))
+    try:
+        assert remote.result() == sha256_of(tmp_path / "a b.txt")
+    finally:
+        remote.close()
+
+    missing = RemoteChecksum(sshd.transport, str(tmp_path / "missing"))
+    assert missing.result() is None
+    missing.close()
+
+
+def test_python_fallback_without_sha256sum(sshd, tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for tool in ("bash", "python3"):
+        os.symlink(shutil.which(tool), bin_dir / tool)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    (tmp_path / "data").write_bytes(os.urandom(3 * 1024 * 1024))
+    assert compare_remote_digest(sshd.transport, str(tmp_path / "data"), sha256_of(tmp_path / "data"))
+
+
+def test_compare_remote_digest(sshd, tmp_path):
+    (tmp_path / "data").write_bytes(b"hello")
+    assert compare_remote_digest(sshd.transport, str(tmp_path / "data"), sha256_of(tmp_path / "data")) is True
+    with pytest.raises(ChecksumMismatch):
+        compare_remote_digest(sshd.transport, str(tmp_path / "data"), hashlib.sha256(b"other").hexdigest())
+    # ตรวจฝั่ง Pi ไม่ได้ ไม่ถือว่าไม่ตรง
+    assert compare_remote_digest(sshd.transport, str(tmp_path / "missing"), "0" * 64) is None
+
+
+def test_engine_hashes_the_whole_file_in_the_same_pass(sftp, tmp_path):
+    data = os.urandom(2 * RESUME_CHECK_SIZE + 17)
+    (tmp_path / "src").write_bytes(data)
+    hasher = hashlib.sha256()
+    TransferEngine().upload(sftp, str(tmp_path / "src"), str(tmp_path / "remote"), hasher=hasher)
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+    # resume: ส่วนที่มีอยู่แล้วต้องถูกนับรวมใน digest ด้วย
+    (tmp_path / "local").write_bytes(data[:RESUME_CHECK_SIZE + 1])
+    hasher = hashlib.sha256()
+    TransferEngine().download(sftp, str(tmp_path / "remote"), str(tmp_path / "local"), resume=True, hasher=hasher)
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_file_operations_verify_transfers(sftp, tmp_path):
+    (tmp_path / "src").write_bytes(os.urandom(100 * 1024))
+    ops = FileOperations(sftp)
+    assert ops.upload_file(str(tmp_path / "src"), str(tmp_path / "remote"), verify=True) == \
+        (True, "File uploaded successfully (sha256 verified)")
+    assert ops.download_file(str(tmp_path / "remote"), str(tmp_path / "back"), verify=True) == \
+        (True, "File downloaded successfully (sha256 verified)")
+    assert ops.upload_file(str(tmp_path / "src"), str(tmp_path / "plain"), verify=False) == \
+        (True, "File uploaded successfully")
+
+
+def test_corrupted_upload_is_reported(sftp, tmp_path, monkeypatch):
+    (tmp_path / "src").write_bytes(os.urandom(100 * 1024))
+    ops = FileOperations(sftp)
+    upload = ops.transfer_engine.upload
+
+    def corrupting_upload(sftp, local_path, remote_path, **kwargs):
+        stats = upload(sftp, local_path, remote_path, **kwargs)
+        with open(remote_path, "r+b") as f:
+            f.write(b"X")
+        return stats
+
+    monkeypatch.setattr(ops.transfer_engine, "upload", corrupting_upload)
+    success, message = ops.upload_file(str(tmp_path / "src"), str(tmp_path / "remote"), verify=True)
+    assert not success and message.startswith("checksum mismatch")
@@ -0,0 +1,85 @@
+import os
+import stat
+
+import pytest
+
+from models.compression import BANDWIDTH_SMOOTHING, COMPRESS_MIN_SIZE, CompressedTransfer, CompressionPolicy
+from models.transfer_engine import TransferStats
+
+
+def text_data(size):
+    line = b"2026-10-18 08:00:00 INFO sensor=temperature value=21.5 unit=C\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+@pytest.fixture
+def policy(sshd):
+    return CompressionPolicy(sshd.transport)
+
+
+def test_compressed_round_trip(sshd, tmp_path):
+    data = text_data(1024 * 1024 + 3)
+    (tmp_path / "src.log").write_bytes(data)
+    transfer = CompressedTransfer(sshd.transport)
+    progress = []
+
+    stats = transfer.upload(str(tmp_path / "src.log"), str(tmp_path / "remote.log"), mode=0o600,
+                            callback=lambda done, total: progress.append(done))
+    assert (tmp_path / "remote.log").read_bytes() == data
+    assert stat.S_IMODE(os.stat(tmp_path / "remote.log").st_mode) == 0o600
+    assert stats.bytes_transferred == len(data)
+    assert stats.wire_bytes < len(data) // 10
+    assert progress[-1] == len(data)
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".")] == []
+
+    stats = transfer.download(str(tmp_path / "remote.log"), str(tmp_path / "back.log"), len(data))
+    assert (tmp_path / "back.log").read_bytes() == data
+    assert stats.wire_bytes < len(data) // 10
+
+
+def test_compressed_download_of_a_missing_file_fails(sshd, tmp_path):
+    with pytest.raises(IOError):
+        CompressedTransfer(sshd.transport).download(str(tmp_path / "missing"), str(tmp_path / "x"), 10)
+
+
+def test_small_and_already_compressed_files_are_sent_as_is(policy, sshd, tmp_path):
+    (tmp_path / "small.log").write_bytes(text_data(COMPRESS_MIN_SIZE - 1))
+    (tmp_path / "big.zip").write_bytes(text_data(COMPRESS_MIN_SIZE * 2))
+    assert not policy.should_compress_upload(str(tmp_path / "small.log"), COMPRESS_MIN_SIZE - 1)
+    assert not policy.should_compress_upload(str(tmp_path / "big.zip"), COMPRESS_MIN_SIZE * 2)
+    # ตัดสินได้โดยไม่ต้องถาม Pi
+    assert sshd.commands == []
+
+
+def test_upload_decision_follows_the_sampled_ratio(policy, tmp_path):
+    size = COMPRESS_MIN_SIZE * 4
+    (tmp_path / "text.log").write_bytes(text_data(size))
+    (tmp_path / "random.bin").write_bytes(os.urandom(size))
+    assert policy.should_compress_upload(str(tmp_path / "text.log"), size)
+    assert not policy.should_compress_upload(str(tmp_path / "random.bin"), size)
+
+
+def test_download_decision_probes_the_pi(policy, sshd, tmp_path):
+    size = COMPRESS_MIN_SIZE * 4
+    (tmp_path / "text.log").write_bytes(text_data(size))
+    (tmp_path / "random.bin").write_bytes(os.urandom(size))
+    assert policy.should_compress_download(str(tmp_path / "text.log"), size)
+    assert not policy.should_compress_download(str(tmp_path / "random.bin"), size)
+    assert any("gzip -1" in command for command in sshd.commands)
+    assert policy.remote_gzip_rate > 0
+
+
+def test_fast_link_makes_cpu_the_bottleneck(policy):
+    # ข้อมูลเล็กลงครึ่งหนึ่ง แต่ CPU บีบได้ช้ากว่าสายส่งดิบ → ไม่คุ้ม
+    policy.link_bandwidth = 100e6
+    assert not policy._worth_it(0.5, cpu_rate=20e6)
+    policy.link_bandwidth = 1e6
+    assert policy._worth_it(0.5, cpu_rate=20e6)
+
+
+def test_link_bandwidth_is_smoothed_from_finished_transfers(policy):
+    policy.record_transfer(TransferStats(COMPRESS_MIN_SIZE - 1, 0.001))
+    assert policy.link_bandwidth is None
+    policy.record_transfer(TransferStats(10_000_000, 1.0))
+    policy.record_transfer(TransferStats(20_000_000, 1.0))
+    assert policy.link_bandwidth == pytest.approx(10e6 + BANDWIDTH_SMOOTHING * 10e6)
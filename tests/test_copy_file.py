@@ -0,0 +1,70 @@
+import os
+import stat
+
+import paramiko
+import pytest
+
+from models.file_operations import FileOperations
+
+
+@pytest.fixture
+def ops(sftp):
+    return FileOperations(sftp)
+
+
+def make_source(tmp_path, mode=0o640):
+    path = tmp_path / "src"
+    path.write_bytes(os.urandom(100 * 1024))
+    os.chmod(path, mode)
+    return path
+
+
+def test_unsupported_copy_data_is_probed_without_touching_the_destination(ops, tmp_path, monkeypatch):
+    source = make_source(tmp_path)
+    seen = []
+    # ตอนถอยไปใช้ cp ปลายทางต้องยังไม่ถูกสร้าง (cp จะได้ตั้ง mode ตามต้นทางเอง)
+    monkeypatch.setattr(ops, "_copy_with_cp",
+                        lambda s, d: seen.append(os.path.exists(d)) or FileOperations._copy_with_cp(ops, s, d))
+
+    assert ops.copy_file(str(source), str(tmp_path / "dst")) == (True, "File copied on server")
+    assert seen == [False]
+    assert ops._copy_data_supported is False
+    assert (tmp_path / "dst").read_bytes() == source.read_bytes()
+    assert stat.S_IMODE(os.stat(tmp_path / "dst").st_mode) == 0o640
+
+
+def test_probe_result_is_cached(ops, tmp_path, monkeypatch):
+    source = make_source(tmp_path)
+    calls = []
+    extended = ops._extended_status
+    monkeypatch.setattr(ops, "_extended_status", lambda name, *args: calls.append(name) or extended(name, *args))
+
+    ops.copy_file(str(source), str(tmp_path / "a"))
+    ops.copy_file(str(source), str(tmp_path / "b"))
+    assert calls == ["copy-data"]
+
+
+def test_failed_copy_data_falls_back_with_the_source_mode(ops, tmp_path, monkeypatch):
+    source = make_source(tmp_path, mode=0o600)
+    # server รู้จัก copy-data (probe ถูกปฏิเสธแบบปกติ) แต่คัดลอกจริงล้ม เช่นดิสก์เต็ม
+    monkeypatch.setattr(ops, "_extended_status", lambda name, *args: paramiko.sftp.SFTP_FAILURE)
+
+    assert ops.copy_file(str(source), str(tmp_path / "dst"))[0]
+    assert ops._copy_data_supported is True
+    assert (tmp_path / "dst").read_bytes() == source.read_bytes()
+    assert stat.S_IMODE(os.stat(tmp_path / "dst").st_mode) == 0o600
+
+
+def test_copy_goes_through_the_client_when_cp_fails(ops, tmp_path, monkeypatch):
+    source = make_source(tmp_path, mode=0o604)
+    monkeypatch.setattr(ops, "_copy_with_cp", lambda s, d: False)
+
+    assert ops.copy_file(str(source), str(tmp_path / "dst")) == (True, "File copied successfully")
+    assert (tmp_path / "dst").read_bytes() == source.read_bytes()
+    assert stat.S_IMODE(os.stat(tmp_path / "dst").st_mode) == 0o604
+
+
+def test_copy_rejects_directories_and_self_copies(ops, tmp_path):
+    source = make_source(tmp_path)
+    assert ops.copy_file(str(source), str(source)) == (False, "Source and destination are the same file")
+    assert ops.copy_file(str(tmp_path), str(tmp_path / "x")) == (False, "Cannot copy a directory")
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import random
+import zlib
+
+import pytest
+
+from models import delta_sync
+from models.delta_sync import DeltaUnavailable, DeltaUploader, build_delta_plan, choose_block_size
+
+
+def signatures_of(data: bytes, block_size: int):
+    # แบบเดียวกับ REMOTE_SIGNATURE_SCRIPT: เฉพาะบล็อกเต็ม
+    signatures = {}
+    for index in range(len(data) // block_size):
+        block = data[index * block_size:(index + 1) * block_size]
+        signatures.setdefault(zlib.adler32(block) & 0xffffffff, {}).setdefault(hashlib.md5(block).digest(), index)
+    return signatures
+
+
+def apply_plan(old: bytes, new: bytes, plan, block_size: int) -> bytes:
+    # แบบเดียวกับ REMOTE_APPLY_SCRIPT
+    out = bytearray()
+    for op, a, b in plan:
+        if op == 'C':
+            out += old[a * block_size:(a + b) * block_size]
+        else:
+            out += new[a:b]
+    return bytes(out)
+
+
+def plan_for(old: bytes, new: bytes, block_size: int = 2048, max_literal: int = 1 << 30):
+    return build_delta_plan(new, len(new), block_size, signatures_of(old, block_size), max_literal)
+
+
+@pytest.fixture
+def old():
+    return random.Random(1).randbytes(200 * 1024)
+
+
+def test_identical_file_is_all_copies(old):
+    plan = plan_for(old, old)
+    assert plan == [('C', 0, len(old) // 2048)]
+    assert apply_plan(old, old, plan, 2048) == old
+
+
+@pytest.mark.parametrize("edit", ["insert", "delete", "overwrite", "append", "prepend"])
+def test_round_trip_after_edit(old, edit):
+    middle = len(old) // 2
+    if edit == "insert":
+        new = old[:middle] + b"inserted bytes" + old[middle:]
+    elif edit == "delete":
+        new = old[:middle] + old[middle + 5000:]
+    elif edit == "overwrite":
+        new = old[:middle] + os.urandom(100) + old[middle + 100:]
+    elif edit == "append":
+        new = old + b"tail" * 100
+    else:
+        new = b"head" * 3 + old
+
+    plan = plan_for(old, new)
+    assert apply_plan(old, new, plan, 2048) == new
+    literal = sum(b - a for op, a, b in plan if op == 'L')
+    assert literal < 3 * 2048 + 5000
+
+
+def test_file_shorter_than_a_block_is_one_literal(old):
+    new = b"short"
+    assert plan_for(old, new) == [('L', 0, len(new))]
+
+
+def test_too_many_changes_raises(old):
+    new = random.Random(2).randbytes(len(old))
+    with pytest.raises(DeltaUnavailable):
+        plan_for(old, new, max_literal=10 * 1024)
+
+
+def test_choose_block_size_is_bounded_multiple_of_1k():
+    assert choose_block_size(0) == 2048
+    assert choose_block_size(100 * 1024 * 1024) == 10 * 1024
+    assert choose_block_size(1 << 40) == 65536
+    for size in (1 << 20, 5 << 20, 1 << 30):
+        assert choose_block_size(size) % 1024 == 0
+
+
+# ---------- ผ่าน exec channel จริง (loopback) ----------
+def delta_files(tmp_path):
+    old = os.urandom(2 * 1024 * 1024)
+    new = bytearray(old)
+    new[1000:1100] = os.urandom(100)
+    (tmp_path / "remote").write_bytes(old)
+    (tmp_path / "local").write_bytes(bytes(new))
+    return bytes(new)
+
+
+def test_delta_upload_rebuilds_the_file_and_keeps_its_mode(sshd, tmp_path):
+    new = delta_files(tmp_path)
+    os.chmod(tmp_path / "remote", 0o600)
+    stats = DeltaUploader(sshd.transport).upload(str(tmp_path / "local"), str(tmp_path / "remote"))
+    assert (tmp_path / "remote").read_bytes() == new
+    assert os.stat(tmp_path / "remote").st_mode & 0o777 == 0o600
+    assert stats.bytes_transferred < len(new) // 10
+
+
+def test_delta_upload_leaves_links_to_a_full_upload(sshd, tmp_path):
+    delta_files(tmp_path)
+    os.rename(tmp_path / "remote", tmp_path / "real")
+    os.symlink(tmp_path / "real", tmp_path / "remote")
+    with pytest.raises(DeltaUnavailable):
+        DeltaUploader(sshd.transport).upload(str(tmp_path / "local"), str(tmp_path / "remote"))
+    assert os.path.islink(tmp_path / "remote")
+
+    os.remove(tmp_path / "remote")
+    os.link(tmp_path / "real", tmp_path / "remote")
+    with pytest.raises(DeltaUnavailable):
+        DeltaUploader(sshd.transport).upload(str(tmp_path / "local"), str(tmp_path / "remote"))
+
+
+def test_failed_remote_apply_keeps_the_original_and_falls_back(sshd, tmp_path, monkeypatch):
+    delta_files(tmp_path)
+    old = (tmp_path / "remote").read_bytes()
+    # สร้างไฟล์ชั่วคราวไม่ได้ (เช่นโฟลเดอร์อ่านอย่างเดียว) ต้องกลายเป็น DeltaUnavailable ไม่ใช่ IOError
+    monkeypatch.setattr(delta_sync, "REMOTE_APPLY_SCRIPT",
+                        delta_sync.REMOTE_APPLY_SCRIPT.replace("open(tmp, 'wb')", "open(tmp + '/x', 'wb')"))
+    with pytest.raises(DeltaUnavailable):
+        delta_sync.DeltaUploader(sshd.transport).upload(str(tmp_path / "local"), str(tmp_path / "remote"))
+    assert (tmp_path / "remote").read_bytes() == old
+    assert sorted(os.listdir(tmp_path)) == ["local", "remote"]
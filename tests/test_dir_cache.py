@@ -0,0 +1,86 @@
+import stat
+
+import models.dir_cache as dir_cache
+from models.dir_cache import RemoteDirCache
+from models.file_operations import FileInfo
+
+
+def entry(name, parent="/home/pi", size=0, is_dir=False):
+    return FileInfo(name, parent, size=size, mode=(stat.S_IFDIR if is_dir else stat.S_IFREG) | 0o644)
+
+
+class FakeClock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_missing_path():
+    assert RemoteDirCache().get("/nowhere") == (None, False)
+
+
+def test_fresh_then_stale_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dir_cache.time, "monotonic", clock)
+    cache = RemoteDirCache(ttl=10)
+    files = [entry("a")]
+    assert cache.put("/home/pi", files)
+    assert cache.get("/home/pi") == (files, True)
+    clock.now += 10
+    # หมด TTL แล้วยังแสดงได้ แต่ต้องตรวจใหม่
+    assert cache.get("/home/pi") == (files, False)
+
+
+def test_put_reports_content_change_only():
+    cache = RemoteDirCache()
+    assert cache.put("/p", [entry("a"), entry("b")])
+    assert not cache.put("/p", [entry("b"), entry("a")])
+    assert cache.put("/p", [entry("a", size=5), entry("b")])
+
+
+def test_listing_started_before_invalidate_is_dropped():
+    cache = RemoteDirCache()
+    cache.put("/p", [entry("old")])
+    generation = cache.generation("/p")
+    cache.invalidate("/p")
+    assert not cache.put("/p", [entry("stale")], generation)
+    assert cache.get("/p") == (None, False)
+    assert cache.put("/p", [entry("new")], cache.generation("/p"))
+    assert [f.name for f in cache.get("/p")[0]] == ["new"]
+
+
+def test_paths_are_normalised():
+    cache = RemoteDirCache()
+    cache.put("/home/pi/", [entry("a")])
+    assert cache.get("/home//pi/.")[0] is not None
+
+
+def test_vanished_subfolders_are_pruned():
+    cache = RemoteDirCache()
+    cache.put("/p/sub", [entry("x", "/p/sub")])
+    cache.put("/p", [entry("other", "/p", is_dir=True)])
+    assert cache.get("/p/sub") == (None, False)
+
+
+def test_invalidate_parent_and_remove_tree():
+    cache = RemoteDirCache()
+    cache.put("/p", [entry("sub", "/p", is_dir=True)])
+    cache.put("/p/sub", [entry("x", "/p/sub")])
+    cache.invalidate_parent("/p/sub/")
+    assert cache.get("/p")[0] is None
+    assert cache.get("/p/sub")[0] is not None
+    cache.remove_tree("/p/sub")
+    assert cache.get("/p/sub")[0] is None
+
+
+def test_apply_delta():
+    cache = RemoteDirCache()
+    assert not cache.apply_delta("/p", [entry("a", "/p")], [])
+    cache.put("/p", [entry("a", "/p"), entry("b", "/p")])
+    generation = cache.generation("/p")
+    assert cache.apply_delta("/p", [entry("a", "/p", size=9), entry("c", "/p")], ["b"])
+    files = {f.name: f.size for f in cache.get("/p")[0]}
+    assert files == {"a": 9, "c": 0}
+    # listdir ที่เริ่มก่อน delta อาจไม่เห็นการเปลี่ยนแปลง ต้องไม่เขียนทับ
+    assert not cache.put("/p", [entry("a", "/p")], generation)
@@ -0,0 +1,147 @@
+import stat
+import threading
+import time
+
+import pytest
+
+from controllers.file_controller import FileController
+from models import dir_prefetcher
+from models.dir_cache import RemoteDirCache
+from models.dir_prefetcher import PREFETCH_MAX_PENDING, DirPrefetcher
+from models.file_operations import FileInfo
+from models.ssh_connection import SSHConnection
+
+
+def entry(name):
+    return FileInfo(name, "/p", mode=stat.S_IFREG | 0o644)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Fetcher:
+    def __init__(self):
+        self.fetched = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, path):
+        self.gate.wait(5)
+        self.fetched.append(path)
+        if path.endswith("denied"):
+            raise IOError("Permission denied")
+        return [entry(path.strip("/").replace("/", "_") or "root")]
+
+
+@pytest.fixture
+def fetch():
+    return Fetcher()
+
+
+@pytest.fixture
+def cache():
+    return RemoteDirCache()
+
+
+def test_hints_fill_the_cache_and_skip_fresh_or_failed(cache, fetch):
+    cache.put("/fresh", [entry("x")])
+    prefetcher = DirPrefetcher(cache, fetch, lambda: False)
+    prefetcher.hint(["/a", "/fresh", "/denied", "/b", "/a", ""])
+    wait_for(lambda: len(fetch.fetched) == 3)
+    wait_for(lambda: cache.get("/b")[0] is not None)
+
+    assert fetch.fetched == ["/a", "/denied", "/b"]
+    assert [f.name for f in cache.get("/a")[0]] == ["a"]
+    assert cache.get("/denied")[0] is None
+    prefetcher.stop()
+
+
+def test_newest_hints_first_and_capped(cache, fetch):
+    fetch.gate.clear()
+    prefetcher = DirPrefetcher(cache, fetch, lambda: False)
+    prefetcher.hint(["/first"])
+    wait_for(lambda: not prefetcher._pending)
+    for i in range(12):
+        prefetcher.hint([f"/d{i}"])
+    assert prefetcher._pending == [f"/d{i}" for i in range(11, 11 - PREFETCH_MAX_PENDING, -1)]
+
+    prefetcher.hint(["/x", "/y"], replace=True)
+    fetch.gate.set()
+    wait_for(lambda: len(fetch.fetched) == 3)
+    assert fetch.fetched == ["/first", "/x", "/y"]
+    prefetcher.stop()
+
+
+def test_waits_while_the_link_is_busy(cache, fetch, monkeypatch):
+    monkeypatch.setattr(dir_prefetcher, "PREFETCH_BUSY_BACKOFF", 0.01)
+    busy = threading.Event()
+    busy.set()
+    prefetcher = DirPrefetcher(cache, fetch, busy.is_set)
+    prefetcher.hint(["/a"])
+    time.sleep(0.1)
+    assert fetch.fetched == []
+
+    busy.clear()
+    wait_for(lambda: fetch.fetched == ["/a"])
+    prefetcher.stop()
+
+
+def test_stop_drops_pending_hints(cache, fetch):
+    fetch.gate.clear()
+    prefetcher = DirPrefetcher(cache, fetch, lambda: False)
+    prefetcher.hint(["/a", "/b", "/c"])
+    wait_for(lambda: len(prefetcher._pending) == 2)
+    prefetcher.stop()
+    fetch.gate.set()
+    prefetcher._thread.join(5)
+    assert fetch.fetched == ["/a"]
+    prefetcher.hint(["/d"])
+    assert prefetcher._pending == []
+
+
+class Hints:
+    def __init__(self):
+        self.calls = []
+
+    def hint(self, paths, replace=False):
+        self.calls.append((list(paths), replace))
+
+
+def test_navigation_hints_the_likely_next_folders():
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.file_ops.sftp = True
+    controller.prefetcher = hints = Hints()
+    for path in ("/srv", "/srv/a", "/srv/a/x", "/srv/b"):
+        controller.dir_cache.put(path, [entry("f")])
+
+    for path in ("/srv", "/srv/a", "/srv/a/x", "/srv/b"):
+        controller.load_directory(controller.change_directory(path))
+    controller.load_directory(controller.go_back())
+    controller.load_directory(controller.go_back())
+    assert controller.current_path == "/srv/a"
+    paths, replace = hints.calls[-1]
+    # ลูกที่เคยเข้า, ย้อน/ไปหน้าในประวัติ, โฟลเดอร์แม่, พี่น้องที่เคยเข้า
+    assert replace
+    assert list(dict.fromkeys(paths)) == ["/srv/a/x", "/srv", "/srv/b"]
+
+    controller.prefetch_directory("/srv/b/deep")
+    assert hints.calls[-1] == (["/srv/b/deep"], False)
+    connection.io.shutdown()
+
+
+def test_link_is_busy_while_the_io_thread_works():
+    connection = SSHConnection()
+    controller = FileController(connection)
+    assert not controller._link_busy()
+    gate = threading.Event()
+    future = connection.io.submit(gate.wait, 5)
+    assert controller._link_busy()
+    gate.set()
+    future.result(5)
+    wait_for(lambda: not controller._link_busy())
+    connection.io.shutdown()
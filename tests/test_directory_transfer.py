@@ -0,0 +1,115 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from models.directory_transfer import BatchUploader, DirectoryTransfer
+
+
+def member_path(local_dir, name):
+    return DirectoryTransfer.__new__(DirectoryTransfer)._local_member_path(str(local_dir), "src", name)
+
+
+def test_member_paths_map_into_local_dir(tmp_path):
+    assert member_path(tmp_path, "src") == str(tmp_path)
+    assert member_path(tmp_path, "src/a/b.txt") == os.path.join(str(tmp_path), "a", "b.txt")
+
+
+def test_members_outside_the_tree_are_rejected(tmp_path):
+    assert member_path(tmp_path, "other/x") is None
+    assert member_path(tmp_path, "src/../x") is None
+    assert member_path(tmp_path, "") is None
+
+
+def test_member_below_symlink_leaving_local_dir_is_rejected(tmp_path):
+    outside = tmp_path / "outside"
+    local = tmp_path / "local"
+    outside.mkdir()
+    local.mkdir()
+    os.symlink(outside, local / "link")
+    assert member_path(local, "src/link/pwn") is None
+
+
+def test_tar_errors_are_attributed_by_exact_name():
+    indexes = {"home/pi/data.txt": 0, "home/pi/a.txt": 1, "home/pi/x: y.txt": 2}
+    error_member = BatchUploader._error_member
+    assert error_member("tar: home/pi/a.txt: Cannot open: Permission denied", indexes) == 1
+    assert error_member("tar: home/pi/data.txt: Cannot open: No space left on device", indexes) == 0
+    assert error_member("tar: home/pi/x: y.txt: Cannot open: Permission denied", indexes) == 2
+    assert error_member("tar: Exiting with failure status due to previous errors", indexes) is None
+    assert error_member("home/pi/a.txt: something", indexes) is None
+
+
+# ---------- ผ่าน exec channel จริง (loopback) ----------
+def make_tree(root, files=3, size=1000, mtime=None):
+    (root / "sub").mkdir(parents=True)
+    for i in range(files):
+        path = root / ("sub" if i % 2 else "") / f"file-with-a-fairly-long-name-{i:05d}.txt"
+        path.write_bytes(os.urandom(size))
+        if mtime:
+            os.utime(path, (mtime, mtime))
+    os.symlink("sub", root / "link")
+
+
+def tree_of(root):
+    tree = {}
+    for directory, dirs, names in os.walk(root):
+        for name in dirs + names:
+            path = os.path.join(directory, name)
+            if os.path.islink(path):
+                tree[os.path.relpath(path, root)] = os.readlink(path)
+            elif os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+
+def run_with_timeout(fn, seconds=30):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "transfer hung"
+    return result[0]
+
+
+def test_directory_round_trip_through_tar(sshd, tmp_path):
+    make_tree(tmp_path / "src")
+    transfer = DirectoryTransfer(sshd.transport)
+    transfer.upload_directory(None, str(tmp_path / "src"), str(tmp_path / "remote" / "dst"))
+    transfer.download_directory(None, str(tmp_path / "remote" / "dst"), str(tmp_path / "back"))
+    assert tree_of(tmp_path / "back") == tree_of(tmp_path / "src")
+    assert transfer.warnings == []
+
+
+def test_noisy_remote_tar_does_not_stall_the_upload(sshd, tmp_path):
+    # tar บ่น "time stamp in the future" ทุกไฟล์ จน stderr ล้น window ของ channel ถ้าไม่มีใครอ่านระหว่างทาง
+    make_tree(tmp_path / "src", files=1500, size=100, mtime=time.time() + 10 * 365 * 86400)
+    sshd.set_window_size(32768)
+    stats = run_with_timeout(lambda: DirectoryTransfer(sshd.transport).upload_directory(
+        None, str(tmp_path / "src"), str(tmp_path / "dst")))
+    assert stats.bytes_transferred == 1500 * 100
+    assert len(os.listdir(tmp_path / "dst" / "sub")) == 750
+
+
+def test_files_changed_during_remote_tar_are_a_warning(sshd, tmp_path, monkeypatch):
+    make_tree(tmp_path / "remote")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "tar").write_text(f'#!/bin/sh\n{shutil.which("tar")} "$@" || exit\n'
+                                 'echo "tar: remote/a: file changed as we read it" >&2\nexit 1\n')
+    os.chmod(bin_dir / "tar", 0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+    transfer = DirectoryTransfer(sshd.transport)
+    transfer.download_directory(None, str(tmp_path / "remote"), str(tmp_path / "back"))
+    assert tree_of(tmp_path / "back") == tree_of(tmp_path / "remote")
+    assert transfer.warnings == ["tar: remote/a: file changed as we read it"]
+
+
+def test_other_remote_tar_failures_still_fail(sshd, tmp_path):
+    with pytest.raises(IOError, match="tar download failed"):
+        DirectoryTransfer(sshd.transport).download_directory(None, str(tmp_path / "missing"),
+                                                             str(tmp_path / "back"))
@@ -0,0 +1,41 @@
+import stat
+
+import paramiko
+import pytest
+
+from models.file_operations import FileInfo, permissions_str
+
+
+def reference_permissions(mode: int) -> str:
+    # แบบเดิมก่อนมีตาราง: ไล่ทีละบิต
+    text = 'd' if stat.S_ISDIR(mode) else '-'
+    for who in ('USR', 'GRP', 'OTH'):
+        for what in ('R', 'W', 'X'):
+            text += what.lower() if mode & getattr(stat, f'S_I{what}{who}') else '-'
+    return text
+
+
+@pytest.mark.parametrize("kind", [stat.S_IFREG, stat.S_IFDIR, stat.S_IFLNK])
+def test_permissions_match_bitwise_reference(kind):
+    for bits in range(0o1000):
+        assert permissions_str(kind | bits) == reference_permissions(kind | bits)
+
+
+def test_special_bits_are_ignored():
+    assert permissions_str(stat.S_IFREG | stat.S_ISUID | 0o755) == "-rwxr-xr-x"
+
+
+def test_from_attr_and_path():
+    attr = paramiko.SFTPAttributes()
+    attr.filename, attr.st_size, attr.st_mode, attr.st_mtime, attr.st_uid = "a.txt", 12, stat.S_IFREG | 0o640, 5, 1000
+    info = FileInfo.from_attr(attr, "/home/pi")
+    assert (info.name, info.size, info.mtime, info.uid) == ("a.txt", 12, 5, 1000)
+    assert info.path == "/home/pi/a.txt"
+    assert not info.is_dir
+    assert info.permissions == "-rw-r-----"
+    assert FileInfo("etc", "/", mode=stat.S_IFDIR).path == "/etc"
+
+
+def test_missing_attributes_default_to_zero():
+    info = FileInfo.from_attr(paramiko.SFTPAttributes(), "/", name="x")
+    assert (info.size, info.mode, info.mtime) == (0, 0, 0)
@@ -0,0 +1,99 @@
+import stat
+import threading
+
+import pytest
+
+from controllers.file_controller import FileController
+from models.file_operations import FileInfo
+from models.io_executor import IOExecutor
+from models.ssh_connection import SSHConnection
+from utils.tk_dispatch import TkDispatcher
+
+
+class FakeRoot:
+    """แทน Tk root: เก็บ after() ไว้ให้เทสต์เรียกเอง"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, fn):
+        self.scheduled.append(fn)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for fn in scheduled:
+            fn()
+
+
+def test_main_session_work_runs_in_order_on_one_thread():
+    io = IOExecutor()
+    seen = []
+    futures = [io.submit(lambda i=i: seen.append((i, threading.get_ident()))) for i in range(20)]
+    for future in futures:
+        future.result(timeout=5)
+    assert [i for i, _ in seen] == list(range(20))
+    assert len({ident for _, ident in seen}) == 1
+    io.shutdown()
+
+
+def test_call_from_io_thread_runs_inline():
+    io = IOExecutor()
+    # ถ้า call รอคิวของตัวเองจะค้างตลอดไป
+    assert io.submit(lambda: io.call(lambda: io.in_io_thread())).result(timeout=5) is True
+    assert not io.in_io_thread()
+    io.shutdown()
+
+
+def test_cancel_pending_skips_queued_work():
+    io = IOExecutor()
+    gate = threading.Event()
+    running = io.submit(gate.wait)
+    queued = io.submit(lambda: "never")
+    io.cancel_pending()
+    gate.set()
+    assert running.result(timeout=5) is True
+    assert queued.cancelled()
+    assert not io.is_busy()
+    io.shutdown()
+
+
+def test_dispatcher_delivers_results_and_errors_on_the_root_loop():
+    io = IOExecutor()
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    dispatcher.start()
+    results, errors = [], []
+
+    ok = io.submit(lambda: 42)
+    bad = io.submit(lambda: 1 / 0)
+    dispatcher.deliver(ok, results.append, errors.append)
+    dispatcher.deliver(bad, results.append, errors.append)
+    ok.exception(timeout=5), bad.exception(timeout=5)
+    # callback ยังไม่ถูกเรียกจนกว่า loop ของ root จะดึงคิว
+    assert results == [] and errors == []
+
+    root.run_pending()
+    assert results == [42]
+    assert [type(e) for e in errors] == [ZeroDivisionError]
+    io.shutdown()
+
+
+def test_main_sftp_session_is_only_handed_to_the_io_thread():
+    connection = SSHConnection()
+    with pytest.raises(RuntimeError):
+        connection.get_sftp()
+    assert connection.io.submit(connection.get_sftp).result(timeout=5) is None
+    connection.io.shutdown()
+
+
+def test_committed_navigation_updates_the_connection_path():
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.dir_cache.put("/home/pi/data", [FileInfo("a.txt", "/home/pi/data", mode=stat.S_IFREG | 0o644)])
+
+    seq = controller.change_directory("/home/pi/data")
+    assert connection.get_current_path() == "/"
+    rows = controller.load_directory(seq)
+    assert [f.name for f in rows] == ["a.txt"]
+    assert connection.get_current_path() == "/home/pi/data"
+    connection.io.shutdown()
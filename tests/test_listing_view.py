@@ -0,0 +1,138 @@
+import random
+import stat
+
+import pytest
+
+from controllers.file_controller import FileController
+from models.file_operations import FileInfo
+from models.listing_view import ListingView
+from models.ssh_connection import SSHConnection
+
+
+def entry(name, size=0, mtime=0, is_dir=False):
+    return FileInfo(name, "/p", size=size, mtime=mtime, mode=(stat.S_IFDIR if is_dir else stat.S_IFREG) | 0o644)
+
+
+@pytest.fixture
+def view():
+    v = ListingView()
+    v.set_entries([
+        entry("beta.txt", size=30, mtime=3),
+        entry("Alpha.log", size=10, mtime=2),
+        entry("docs", is_dir=True, mtime=9),
+        entry("gamma.TXT", size=20, mtime=1),
+        entry("Archive", is_dir=True, mtime=5),
+    ])
+    return v
+
+
+def names(view):
+    return [f.name for f in view.rows()]
+
+
+def test_sort_by_name_folders_first_case_insensitive(view):
+    assert names(view) == ["Archive", "docs", "Alpha.log", "beta.txt", "gamma.TXT"]
+
+
+def test_sort_by_size_and_modified(view):
+    view.set_sort("size")
+    # ขนาดเท่ากัน (โฟลเดอร์) คงลำดับเดิมจาก listing
+    assert names(view) == ["docs", "Archive", "Alpha.log", "gamma.TXT", "beta.txt"]
+    view.set_sort("modified")
+    assert names(view) == ["Archive", "docs", "gamma.TXT", "Alpha.log", "beta.txt"]
+
+
+def test_reverse(view):
+    view.set_sort("name", reverse=True)
+    assert names(view) == ["gamma.TXT", "beta.txt", "Alpha.log", "docs", "Archive"]
+
+
+def test_filter_is_case_insensitive_and_keeps_order(view):
+    view.set_filter("TXT")
+    assert names(view) == ["beta.txt", "gamma.TXT"]
+    view.set_filter("")
+    assert len(names(view)) == 5
+
+
+def test_matches_uses_current_filter(view):
+    view.set_filter("alp")
+    assert view.matches(entry("ALPINE"))
+    assert not view.matches(entry("beta"))
+
+
+def test_set_entries_drops_cached_orders_and_filter_results(view):
+    view.set_filter("a")
+    names(view)
+    view.set_entries([entry("zeta"), entry("ant")])
+    assert names(view) == ["ant", "zeta"]
+
+
+@pytest.mark.parametrize("typed", [["a", "ar", "arc"], ["t", "tx", "txt", "tx", "x"], ["b", "", "g"]])
+def test_incremental_filter_equals_full_scan(typed):
+    rng = random.Random(3)
+    entries = [entry("".join(rng.choice("abcrtx.") for _ in range(6)), size=rng.randrange(100),
+                     is_dir=rng.random() < 0.2) for _ in range(500)]
+    view = ListingView()
+    view.set_entries(entries)
+    view.set_sort("size")
+    for pattern in typed:
+        view.set_filter(pattern)
+        incremental = view.rows()
+        fresh = ListingView()
+        fresh.set_entries(entries)
+        fresh.set_sort("size")
+        fresh.set_filter(pattern)
+        # คำค้นที่ยาวขึ้นกรองจากผลเดิม ต้องได้เท่ากับไล่กรองใหม่ทั้งโฟลเดอร์
+        assert incremental == fresh.rows()
+        assert all(pattern in f.name.casefold() for f in incremental)
+
+
+# ---------- ค้นหาระหว่างนำทางที่ยังโหลดไม่เสร็จ ----------
+class StreamingOps:
+    """file_ops ปลอม: ส่ง listing ทีละชุดจาก dict"""
+
+    sftp = True
+
+    def __init__(self, listings):
+        self.listings = listings
+
+    def iter_directory(self, path):
+        yield from self.listings[path]
+
+
+def test_pending_navigation_keeps_the_filter_off_the_old_listing():
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.file_ops = StreamingOps({"/new": [[entry("banana"), entry("cherry")], [entry("anchovy")]]})
+    controller.dir_cache.put("/old", [entry("band"), entry("zebra")])
+    controller.load_directory(controller.change_directory("/old"))
+    assert not controller.is_navigation_pending()
+
+    seq = controller.change_directory("/new")
+    assert controller.is_navigation_pending()
+    controller.set_filter("an")
+    # listing ที่ถืออยู่ยังเป็นของ /old หน้าจอต้องไม่เอามาแสดงตอนนี้
+    assert [f.name for f in controller.current_rows()] == ["band"]
+
+    streamed = []
+    rows = controller.load_directory(seq, streamed.extend)
+    # ชุดที่สตรีมยังไม่กรอง หน้าจอกรองเองด้วย filter_rows ตามตัวกรองล่าสุด
+    assert [f.name for f in streamed] == ["banana", "cherry", "anchovy"]
+    assert [f.name for f in controller.filter_rows(streamed)] == ["banana", "anchovy"]
+    assert not controller.is_navigation_pending()
+    assert [f.name for f in rows] == ["anchovy", "banana"]
+    connection.io.shutdown()
+
+
+def test_failed_navigation_is_not_left_pending():
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.file_ops = StreamingOps({})
+    controller.dir_cache.put("/old", [entry("band")])
+    controller.load_directory(controller.change_directory("/old"))
+
+    with pytest.raises(KeyError):
+        controller.load_directory(controller.change_directory("/missing"), lambda batch: None)
+    assert controller.current_path == "/old"
+    assert not controller.is_navigation_pending()
+    connection.io.shutdown()
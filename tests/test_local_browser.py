@@ -0,0 +1,169 @@
+import os
+from types import SimpleNamespace
+
+import customtkinter as ctk
+import pytest
+
+from views import local_browser
+from views.local_browser import PAGE_SIZE, LocalBrowser, LocalFileInfo
+
+
+class FakeList:
+    def __init__(self):
+        self.items = []
+        self.refreshes = 0
+
+    def set_items(self, items, render_row, **kwargs):
+        self.items = items
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+def fake_ui(self):
+    self.path_entry = SimpleNamespace(delete=lambda *a: None, insert=lambda *a: None)
+    self.file_list = FakeList()
+    self.files = []
+    self._sort_keys = []
+    self._scan = None
+    self._scan_job = None
+
+
+@pytest.fixture
+def browser(monkeypatch, tmp_path):
+    jobs = []
+    monkeypatch.setattr(ctk.CTkFrame, "__init__", lambda self, master, **kwargs: None)
+    monkeypatch.setattr(local_browser.Path, "home", lambda: tmp_path)
+    monkeypatch.setattr(LocalBrowser, "_setup_ui", fake_ui)
+    monkeypatch.setattr(LocalBrowser, "after", lambda self, ms, fn: jobs.append(fn) or fn)
+    monkeypatch.setattr(LocalBrowser, "after_cancel", lambda self, job: jobs.remove(job))
+    browser = LocalBrowser(None)
+    browser.jobs = jobs
+    return browser
+
+
+def run_jobs(browser):
+    while browser.jobs:
+        browser.jobs.pop(0)()
+
+
+def names(browser):
+    return [f.name for f in browser.files]
+
+
+def test_file_info_from_entry(tmp_path):
+    (tmp_path / "data.bin").write_bytes(b"x" * 2048)
+    (tmp_path / "sub").mkdir()
+    os.symlink(tmp_path / "gone", tmp_path / "broken")
+    infos = {e.name: LocalFileInfo.from_entry(e) for e in os.scandir(tmp_path)}
+
+    data = infos["data.bin"]
+    assert (data.is_dir, data.size, data.mtime) == (False, 2048, os.stat(tmp_path / "data.bin").st_mtime)
+    assert data.get_size_str() == "2.00 KB"
+    assert infos["sub"].is_dir and infos["sub"].get_size_str() == "<โฟลเดอร์>"
+    # symlink ที่ชี้ไปไม่มีอยู่ stat ไม่ได้ ยังต้องแสดงในรายการ
+    assert (infos["broken"].is_dir, infos["broken"].size) == (False, 0)
+    assert not hasattr(data, "__dict__")
+
+
+def test_large_folder_is_read_in_pages(browser, tmp_path):
+    for i in range(PAGE_SIZE * 2 + 34):
+        (tmp_path / f"File{i:04d}").touch()
+    for name in ("zeta", "Alpha"):
+        (tmp_path / name).mkdir()
+
+    browser.refresh()
+    # หน้าแรกแสดงได้ทันที ที่เหลืออ่านต่อใน event loop
+    assert len(browser.files) == PAGE_SIZE
+    assert len(browser.jobs) == 1
+    run_jobs(browser)
+
+    assert len(browser.files) == PAGE_SIZE * 2 + 36
+    assert names(browser)[:3] == ["Alpha", "zeta", "File0000"]
+    assert names(browser)[2:] == sorted(names(browser)[2:], key=str.lower)
+    assert browser._scan is None
+    assert browser.file_list.items is browser.files
+
+
+def test_refresh_cancels_the_scan_in_progress(browser, tmp_path):
+    for i in range(PAGE_SIZE + 1):
+        (tmp_path / f"f{i}").touch()
+    browser.refresh()
+    assert len(browser.jobs) == 1
+
+    other = tmp_path / "sub"
+    other.mkdir()
+    (other / "only").touch()
+    browser.current_path = str(other)
+    browser.refresh()
+    run_jobs(browser)
+    assert names(browser) == ["only"]
+
+
+def test_unreadable_folder_shows_nothing(browser, tmp_path, capsys):
+    browser.current_path = str(tmp_path / "missing")
+    browser.refresh()
+    assert browser.files == [] and browser.jobs == []
+    assert "Error listing directory" in capsys.readouterr().out
+
+
+# ---------- delta จาก watcher ----------
+def test_delta_updates_rows_in_place(browser, tmp_path):
+    for name in ("b", "d", "gone"):
+        (tmp_path / name).write_bytes(b"x")
+    (tmp_path / "dir").mkdir()
+    browser.refresh()
+    run_jobs(browser)
+
+    (tmp_path / "gone").unlink()
+    (tmp_path / "c").touch()
+    (tmp_path / "b").write_bytes(b"x" * 10)
+    (tmp_path / "newdir").mkdir()
+    browser._apply_delta(str(tmp_path), {"b", "c", "newdir", "vanished"}, {"gone"})
+    assert names(browser) == ["dir", "newdir", "b", "c", "d"]
+    assert browser.files[2].size == 10
+    assert browser.file_list.items is browser.files
+
+
+def test_delta_for_another_folder_is_ignored(browser, tmp_path):
+    (tmp_path / "a").touch()
+    browser.refresh()
+    run_jobs(browser)
+    browser._apply_delta(str(tmp_path / "elsewhere"), {"x"}, {"a"})
+    assert names(browser) == ["a"]
+
+
+def test_overflow_rescans_the_folder(browser, tmp_path):
+    browser.refresh()
+    run_jobs(browser)
+    (tmp_path / "late").touch()
+    browser._apply_delta(str(tmp_path), None, None)
+    run_jobs(browser)
+    assert names(browser) == ["late"]
+
+
+def test_delta_during_a_scan_waits_for_the_sort(browser, tmp_path):
+    for i in range(PAGE_SIZE + 10):
+        (tmp_path / f"f{i:04d}").touch()
+    browser.refresh()
+    assert browser._scan is not None
+
+    (tmp_path / "f0003").unlink()
+    (tmp_path / "a_new").touch()
+    browser._apply_delta(str(tmp_path), {"a_new"}, {"f0003"})
+    browser._apply_delta(str(tmp_path), {"f0003"}, set())
+    (tmp_path / "f0003").touch()
+    run_jobs(browser)
+    assert names(browser)[:5] == ["a_new", "f0000", "f0001", "f0002", "f0003"]
+    assert len(browser.files) == PAGE_SIZE + 11
+
+
+def test_names_differing_only_in_case_are_separate_rows(browser, tmp_path):
+    for name in ("README", "readme", "Readme"):
+        (tmp_path / name).touch()
+    browser.refresh()
+    run_jobs(browser)
+    assert sorted(names(browser)) == ["README", "Readme", "readme"]
+
+    browser._apply_delta(str(tmp_path), set(), {"readme"})
+    assert sorted(names(browser)) == ["README", "Readme"]
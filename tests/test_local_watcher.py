@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from models.local_watcher import (_EVENT_HEADER, IN_CREATE, IN_DELETE, IN_MODIFY, IN_Q_OVERFLOW,
+                                  LocalWatcher)
+
+pytestmark = pytest.mark.skipif(not LocalWatcher(None).available, reason="needs Linux inotify")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def deltas():
+    return []
+
+
+@pytest.fixture
+def watcher(deltas):
+    watcher = LocalWatcher(lambda path, changed, removed: deltas.append((path, changed, removed)))
+    yield watcher
+    watcher.stop()
+
+
+def test_burst_of_events_becomes_one_delta(watcher, deltas, tmp_path):
+    (tmp_path / "old").touch()
+    watcher.watch(str(tmp_path))
+    with open(tmp_path / "download.part", "wb") as f:
+        for _ in range(20):
+            f.write(b"x" * 4096)
+            f.flush()
+    os.rename(tmp_path / "download.part", tmp_path / "download")
+    (tmp_path / "old").unlink()
+    (tmp_path / "sub").mkdir()
+
+    wait_for(lambda: deltas)
+    time.sleep(0.3)
+    assert deltas == [(str(tmp_path), {"download", "sub"}, {"download.part", "old"})]
+
+
+def test_moving_to_another_folder_drops_the_old_watch(watcher, deltas, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    watcher.watch(str(first))
+    watcher.watch(str(second))
+    (first / "ignored").touch()
+    (second / "seen").touch()
+
+    wait_for(lambda: deltas)
+    time.sleep(0.3)
+    assert deltas == [(str(second), {"seen"}, set())]
+
+    watcher.stop()
+    (second / "after_stop").touch()
+    time.sleep(0.3)
+    assert len(deltas) == 1
+
+
+def test_missing_folder_is_not_watched(watcher, tmp_path):
+    watcher.watch(str(tmp_path / "missing"))
+    assert watcher.path is None
+
+
+def event(wd, mask, name=b""):
+    name = name + b"\0" * (-len(name) % 16) if name else b""
+    return _EVENT_HEADER.pack(wd, mask, 0, len(name)) + name
+
+
+def test_parse_events_of_the_current_watch_only():
+    changed, removed = {"b"}, {"c"}
+    data = (event(1, IN_CREATE, b"a") + event(1, IN_DELETE, b"b") + event(1, IN_MODIFY, b"c")
+            + event(2, IN_CREATE, b"other") + event(1, IN_MODIFY))
+    assert not LocalWatcher._parse(data, 1, changed, removed)
+    assert (changed, removed) == ({"a", "c"}, {"b"})
+    assert LocalWatcher._parse(event(-1, IN_Q_OVERFLOW), 1, set(), set())
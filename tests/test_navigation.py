@@ -0,0 +1,94 @@
+import pytest
+
+from controllers.file_controller import FileController
+from models.ssh_connection import SSHConnection
+
+
+@pytest.fixture
+def controller(sftp, tmp_path):
+    for name in ("a/b/c", "other"):
+        (tmp_path / name).mkdir(parents=True)
+    (tmp_path / "a" / "b" / "c" / "leaf.txt").write_text("x")
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.file_ops.set_sftp(sftp)
+    listed = []
+    fetch = controller.file_ops.fetch_directory
+    controller.file_ops.fetch_directory = lambda path: listed.append(path) or fetch(path)
+    controller.listed = listed
+    controller.load_directory(controller.change_directory(str(tmp_path)))
+    yield controller
+    connection.io.shutdown()
+
+
+def test_rapid_clicks_cost_one_listing(controller, tmp_path):
+    controller.listed.clear()
+    seqs = [controller.change_directory(str(tmp_path / path)) for path in ("a", "a/b", "a/b/c")]
+    assert controller.current_path == str(tmp_path / "a/b/c")
+
+    # ที่โดนแซงไปแล้วไม่ยิงคำขอเลย
+    assert controller.load_directory(seqs[0]) is None
+    assert controller.load_directory(seqs[1]) is None
+    rows = controller.load_directory(seqs[2])
+    assert [f.name for f in rows] == ["leaf.txt"]
+    assert controller.listed == [str(tmp_path / "a/b/c")]
+
+
+def test_superseded_result_is_cached_but_not_shown(controller, tmp_path):
+    seq = controller.change_directory(str(tmp_path / "a"))
+    fetch = controller.file_ops.fetch_directory
+
+    def slow_fetch(path):
+        # ระหว่างรอ listing ผู้ใช้คลิกไปที่อื่นแล้ว
+        controller.change_directory(str(tmp_path / "other"))
+        return fetch(path)
+
+    controller.file_ops.fetch_directory = slow_fetch
+    assert controller.load_directory(seq) is None
+    files, fresh = controller.dir_cache.get(str(tmp_path / "a"))
+    assert [f.name for f in files] == ["b"] and fresh
+    assert controller.current_path == str(tmp_path / "other")
+
+
+def test_failed_navigation_rolls_back_path_and_history(controller, tmp_path):
+    changes = []
+    controller.on_directory_change = changes.append
+    controller.load_directory(controller.change_directory(str(tmp_path / "a")))
+    history = list(controller.history)
+
+    with pytest.raises(IOError):
+        controller.load_directory(controller.change_directory(str(tmp_path / "missing")))
+    assert controller.current_path == str(tmp_path / "a")
+    assert controller.history == history
+    assert changes == [str(tmp_path / "a"), str(tmp_path / "missing"), str(tmp_path / "a")]
+    assert controller.go_forward() is None
+
+
+def test_failure_of_a_superseded_navigation_is_silent(controller, tmp_path):
+    seq = controller.change_directory(str(tmp_path / "missing"))
+    fetch = controller.file_ops.fetch_directory
+
+    def failing_fetch(path):
+        controller.change_directory(str(tmp_path / "other"))
+        return fetch(path)
+
+    controller.file_ops.fetch_directory = failing_fetch
+    # การนำทางที่ใหม่กว่าเป็นเจ้าของหน้าจอแล้ว ไม่ย้อนกลับและไม่แจ้ง error
+    assert controller.load_directory(seq) is None
+    assert controller.current_path == str(tmp_path / "other")
+
+
+def test_history_and_paths_are_updated_on_the_client(controller, tmp_path):
+    controller.load_directory(controller.change_directory(f" {tmp_path}//a/b/../b/c/ "))
+    assert controller.current_path == str(tmp_path / "a/b/c")
+
+    controller.listed.clear()
+    seq = controller.go_back()
+    assert controller.current_path == str(tmp_path)
+    assert controller.go_forward() == seq + 1
+    assert controller.current_path == str(tmp_path / "a/b/c")
+    # ยังไม่มีการโหลดจนกว่า I/O thread จะเรียก load_directory
+    assert controller.listed == []
+    controller.go_to_parent()
+    assert controller.current_path == str(tmp_path / "a/b")
+    assert controller.history[-1] == str(tmp_path / "a/b")
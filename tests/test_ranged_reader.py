@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from models.ranged_reader import LineIndex, NotCached, RangedReader
+
+
+def build(data: bytes, piece: int) -> LineIndex:
+    index = LineIndex()
+    for start in range(0, len(data), piece):
+        index.feed(data[start:start + piece], eof=start + piece >= len(data))
+    return index
+
+
+def test_offsets_do_not_depend_on_block_boundaries():
+    data = b"first\n\nthird line\nlast without newline"
+    expected = [0, 6, 7, 18]
+    for piece in (1, 2, 5, 7, len(data)):
+        index = build(data, piece)
+        assert list(index.offsets) == expected
+        assert index.complete
+
+
+def test_line_of():
+    index = build(b"ab\ncd\nef", 3)
+    assert [index.line_of(o) for o in range(8)] == [0, 0, 0, 1, 1, 1, 2, 2]
+
+
+def test_line_of_beyond_scanned_is_unknown():
+    index = LineIndex()
+    index.feed(b"abc\nde")
+    assert not index.complete
+    assert index.line_of(6) == 1
+    assert index.line_of(7) is None
+
+
+class FakeHandle:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.reads = []
+
+    def stat(self):
+        return SimpleNamespace(st_size=len(self.data))
+
+    def readv(self, ranges):
+        self.reads.append(list(ranges))
+        return [self.data[offset:offset + length] for offset, length in ranges]
+
+    def close(self):
+        pass
+
+
+class FakeSFTP:
+    def __init__(self, data: bytes):
+        self.handle = FakeHandle(data)
+
+    def open(self, path, mode):
+        return self.handle
+
+
+def make_reader(data: bytes, block_size: int = 8):
+    sftp = FakeSFTP(data)
+    return RangedReader(sftp, "/f", block_size=block_size), sftp.handle
+
+
+def test_cached_only_never_touches_the_network():
+    reader, handle = make_reader(b"line1\nline2\nline3\n" * 4)
+    with pytest.raises(NotCached):
+        reader.read_lines(0, 2, cached_only=True)
+    assert handle.reads == []
+
+    reader.prefetch(0, 16)
+    lines, starts, next_offset = reader.read_lines(0, 2, cached_only=True)
+    assert lines == ["line1", "line2"]
+    assert starts == [0, 6]
+    assert next_offset == 12
+    assert len(handle.reads) == 1
+
+
+def test_line_start_before_walks_back_over_block_boundaries():
+    data = b"aaaa\nbbbbbbbbbb\ncc\nd"
+    reader, _ = make_reader(data, block_size=4)
+    end = reader.line_start(len(data))
+    assert end == data.index(b"d")
+    assert reader.line_start_before(end, 2) == data.index(b"bbbb")
+    assert reader.line_start_before(end, 10) == 0
+    # block ที่อ่านมาแล้วใช้ซ้ำได้แบบ cached_only
+    assert reader.line_start_before(end, 2, cached_only=True) == data.index(b"bbbb")
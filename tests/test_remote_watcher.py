@@ -0,0 +1,167 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from controllers.file_controller import WATCH_DELTA_STAT_LIMIT, FileController
+from models import remote_watcher
+from models.file_operations import FileOperations
+from models.remote_watcher import POLL_MAX_INTERVAL, POLL_MIN_INTERVAL, RemoteWatcher
+from models.ssh_connection import SSHConnection
+
+FAKE_INOTIFYWAIT = """#!/bin/bash
+echo "$@" > "$WATCH_ARGS"
+printf 'CREATE/a.txt\\nMODIFY/a.txt\\nDELETE/b.txt\\nMOVED_TO/c d.txt\\n'
+sleep 0.5
+printf 'DELETE/a.txt\\nCLOSE_WRITE,CLOSE/e.txt\\n'
+sleep 1
+"""
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    os.symlink(shutil.which("bash"), bin_dir / "bash")
+    os.symlink(shutil.which("sleep"), bin_dir / "sleep")
+    monkeypatch.setenv("PATH", str(bin_dir))
+    monkeypatch.setenv("WATCH_ARGS", str(tmp_path / "args"))
+    return bin_dir
+
+
+def test_inotify_events_are_coalesced_into_deltas(sshd, tmp_path, fake_bin):
+    (fake_bin / "inotifywait").write_text(FAKE_INOTIFYWAIT)
+    (fake_bin / "inotifywait").chmod(0o755)
+    deltas = []
+    polls = []
+    watcher = RemoteWatcher(sshd.transport, lambda path, changed, removed: deltas.append((path, changed, removed)),
+                            polls.append, lambda: False)
+    watcher.watch("/srv/my dir")
+    wait_for(lambda: len(deltas) == 2)
+    watcher.stop()
+
+    assert deltas[0] == ("/srv/my dir", {"a.txt", "c d.txt"}, {"b.txt"})
+    assert deltas[1] == ("/srv/my dir", {"e.txt"}, {"a.txt"})
+    assert (tmp_path / "args").read_text().endswith("-- /srv/my dir\n")
+    assert polls == []
+
+
+def test_pending_delta_is_sent_when_inotifywait_exits(sshd, fake_bin, monkeypatch):
+    monkeypatch.setattr(remote_watcher, "POLL_MIN_INTERVAL", 60)
+    (fake_bin / "inotifywait").write_text("#!/bin/bash\nprintf 'CREATE/late.txt\\n'\n")
+    (fake_bin / "inotifywait").chmod(0o755)
+    deltas = []
+    watcher = RemoteWatcher(sshd.transport, lambda *delta: deltas.append(delta), lambda path: False, lambda: False)
+    watcher.watch("/srv")
+    wait_for(lambda: deltas)
+    watcher.stop()
+    assert deltas == [("/srv", {"late.txt"}, set())]
+
+
+def test_without_inotifywait_it_polls(sshd, fake_bin, monkeypatch):
+    monkeypatch.setattr(remote_watcher, "POLL_MIN_INTERVAL", 0.01)
+    busy = threading.Event()
+    polls = []
+    watcher = RemoteWatcher(sshd.transport, lambda *args: None, lambda path: polls.append(path) or True, busy.is_set)
+    watcher.watch("/srv")
+    wait_for(lambda: len(polls) >= 2)
+    assert watcher._has_inotify is False and set(polls) == {"/srv"}
+
+    # ลิงก์ยุ่งอยู่ → ข้ามรอบนั้นไป
+    busy.set()
+    time.sleep(0.05)
+    count = len(polls)
+    time.sleep(0.05)
+    assert len(polls) == count
+
+    # ย้ายโฟลเดอร์: ตัวเก่าหยุด ตัวใหม่เริ่ม
+    busy.clear()
+    watcher.watch("/home")
+    wait_for(lambda: polls[-1] == "/home")
+    watcher.stop()
+    time.sleep(0.05)
+    count = len(polls)
+    time.sleep(0.05)
+    assert len(polls) == count
+
+
+class FakeStop:
+    def __init__(self, rounds):
+        self.rounds = rounds
+        self.waits = []
+
+    def wait(self, interval):
+        self.waits.append(interval)
+        return len(self.waits) > self.rounds
+
+
+def test_poll_interval_backs_off_until_something_changes():
+    results = iter([False, False, False, False, False, True, False])
+    watcher = RemoteWatcher(None, None, lambda path: next(results), lambda: False)
+    stop = FakeStop(rounds=7)
+    watcher._watch_polling("/srv", stop)
+    step = POLL_MIN_INTERVAL
+    expected = []
+    for _ in range(6):
+        expected.append(step)
+        step = min(step * 2, POLL_MAX_INTERVAL)
+    assert stop.waits == expected + [POLL_MIN_INTERVAL, POLL_MIN_INTERVAL * 2]
+
+
+@pytest.fixture
+def controller(sftp, tmp_path):
+    connection = SSHConnection()
+    controller = FileController(connection)
+    # งานเบื้องหลังใช้ session แยก ในเทสต์ใช้ session จาก loopback server
+    controller._background_ops = FileOperations(sftp)
+    controller.updates = []
+    controller.on_listing_update = controller.updates.append
+    yield controller
+    connection.io.shutdown()
+
+
+def test_delta_stats_only_the_changed_names(controller, tmp_path):
+    for name in ("keep", "old", "grows"):
+        (tmp_path / name).write_bytes(b"x")
+    controller.dir_cache.put(str(tmp_path), controller._background_fetch(str(tmp_path)))
+    (tmp_path / "old").unlink()
+    (tmp_path / "grows").write_bytes(b"x" * 100)
+    (tmp_path / "new").write_bytes(b"yy")
+
+    controller._on_watch_delta(str(tmp_path), {"grows", "new", "vanished"}, {"old"})
+    files = {f.name: f.size for f in controller.dir_cache.get(str(tmp_path))[0]}
+    # ชื่อที่ stat ไม่เจอแล้ว ถือว่าถูกลบ
+    assert files == {"keep": 1, "grows": 100, "new": 2}
+    assert controller.updates == [str(tmp_path)]
+
+
+def test_large_delta_relists_instead_of_stat(controller, tmp_path):
+    names = {f"f{i}" for i in range(WATCH_DELTA_STAT_LIMIT + 1)}
+    for name in names:
+        (tmp_path / name).touch()
+    stats = []
+    lstat = controller._background_ops.sftp.lstat
+    controller._background_ops.sftp.lstat = lambda path: stats.append(path) or lstat(path)
+
+    controller._on_watch_delta(str(tmp_path), names, set())
+    assert stats == []
+    assert {f.name for f in controller.dir_cache.get(str(tmp_path))[0]} == names
+    assert controller.updates == [str(tmp_path)]
+
+
+def test_poll_reports_only_real_changes(controller, tmp_path):
+    (tmp_path / "a").write_bytes(b"x")
+    assert controller._on_watch_poll(str(tmp_path))
+    assert not controller._on_watch_poll(str(tmp_path))
+    (tmp_path / "b").write_bytes(b"x")
+    assert controller._on_watch_poll(str(tmp_path))
+    assert controller.updates == [str(tmp_path)] * 2
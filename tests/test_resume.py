@@ -0,0 +1,46 @@
+import os
+
+from models.transfer_engine import RESUME_CHECK_SIZE, TransferEngine
+
+
+def write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_resumed_upload_sends_only_the_rest(sftp, tmp_path):
+    data = os.urandom(3 * RESUME_CHECK_SIZE)
+    write(tmp_path / "remote", data[:RESUME_CHECK_SIZE + 5])
+    stats = TransferEngine().upload(sftp, str(write(tmp_path / "src", data)), str(tmp_path / "remote"),
+                                    resume=True)
+    assert stats.resumed_from == RESUME_CHECK_SIZE + 5
+    assert stats.bytes_transferred == len(data) - RESUME_CHECK_SIZE - 5
+    assert (tmp_path / "remote").read_bytes() == data
+
+
+def test_resumed_upload_restarts_when_the_remote_file_differs(sftp, tmp_path):
+    data = os.urandom(3 * RESUME_CHECK_SIZE)
+    write(tmp_path / "remote", os.urandom(RESUME_CHECK_SIZE + 5))
+    stats = TransferEngine().upload(sftp, str(write(tmp_path / "src", data)), str(tmp_path / "remote"),
+                                    resume=True)
+    assert stats.resumed_from == 0
+    assert (tmp_path / "remote").read_bytes() == data
+
+
+def test_resumed_download_appends_to_the_partial_file(sftp, tmp_path):
+    data = os.urandom(2 * RESUME_CHECK_SIZE + 3)
+    write(tmp_path / "local", data[:RESUME_CHECK_SIZE + 1])
+    stats = TransferEngine().download(sftp, str(write(tmp_path / "remote", data)), str(tmp_path / "local"),
+                                      resume=True)
+    assert stats.resumed_from == RESUME_CHECK_SIZE + 1
+    assert (tmp_path / "local").read_bytes() == data
+
+
+def test_resumed_download_restarts_when_the_partial_file_differs(sftp, tmp_path):
+    data = os.urandom(2 * RESUME_CHECK_SIZE)
+    write(tmp_path / "local", b"x" * 100)
+    stats = TransferEngine().download(sftp, str(write(tmp_path / "remote", data)), str(tmp_path / "local"),
+                                      resume=True)
+    assert stats.resumed_from == 0
+    assert (tmp_path / "local").read_bytes() == data
@@ -0,0 +1,46 @@
+import json
+
+from controllers.file_controller import FileController
+from models.resume_journal import ResumeJournal
+from models.ssh_connection import SSHConnection
+from models.transfer_queue import TransferJob
+
+
+def on_disk(journal: ResumeJournal):
+    if not journal.journal_file.exists():
+        return []
+    with open(journal.journal_file) as f:
+        return [(e["direction"], e["remote_path"]) for e in json.load(f)["transfers"]]
+
+
+def test_add_reports_an_existing_entry(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    journal = ResumeJournal()
+    assert journal.add("pi@host:22", "upload", "/l/a", "/r/a") is False
+    assert journal.add("pi@host:22", "upload", "/l/a", "/r/a") is True
+    journal.save()
+
+    reloaded = ResumeJournal()
+    assert [e["remote_path"] for e in reloaded.get_pending("pi@host:22")] == ["/r/a"]
+    assert reloaded.get_pending("other@host:22") == []
+
+
+def test_direct_transfer_is_on_disk_before_it_starts_and_resumes_after_failure(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    controller = FileController(SSHConnection())
+    controller.resume_journal = journal = ResumeJournal()
+    controller.current_path = "/home/pi"
+    calls = []
+
+    def upload(local_path, remote_path, resume=False):
+        # แอปตายตรงนี้ → ต้องมีร่องรอยในไฟล์ journal แล้ว
+        calls.append((resume, on_disk(journal)))
+        return (len(calls) > 1, "done" if len(calls) > 1 else "connection lost")
+
+    controller.file_ops.upload_file = upload
+    assert controller.upload_file("/tmp/big.iso", "big.iso") == (False, "connection lost")
+    assert controller.upload_file("/tmp/big.iso", "big.iso") == (True, "done")
+
+    entry = [(TransferJob.UPLOAD, "/home/pi/big.iso")]
+    assert calls == [(False, entry), (True, entry)]
+    assert journal.get_pending(controller.ssh_connection.get_connection_key()) == []
@@ -0,0 +1,98 @@
+import paramiko
+import pytest
+
+from controllers.file_controller import FileController
+from models.file_operations import FileOperations
+from models.ssh_connection import SSHConnection
+
+
+@pytest.fixture
+def big_dir(tmp_path):
+    folder = tmp_path / "big"
+    folder.mkdir()
+    for i in range(1234):
+        (folder / f"f{i:05d}").write_bytes(b"x" * (i % 7))
+    (folder / "sub").mkdir()
+    return folder
+
+
+def all_names(batches):
+    return sorted(f.name for batch in batches for f in batch)
+
+
+def test_iter_directory_yields_every_entry_in_batches(sftp, big_dir):
+    ops = FileOperations(sftp)
+    batches = list(ops.iter_directory(str(big_dir), batch_size=100))
+    assert all_names(batches) == sorted(p.name for p in big_dir.iterdir())
+    # ชุดแรกออกตั้งแต่คำตอบแรก ไม่ต้องรอครบ batch_size
+    assert len(batches) > 1 and len(batches[0]) < 1235
+    assert all(len(batch) < 200 for batch in batches)
+
+    entry = next(f for batch in batches for f in batch if f.name == "f00006")
+    assert (entry.size, entry.is_dir, entry.path) == (6, False, f"{big_dir}/f00006")
+    assert next(f for batch in batches for f in batch if f.name == "sub").is_dir
+
+
+def test_abandoned_read_closes_the_handle(sftp, big_dir):
+    ops = FileOperations(sftp)
+    closed = []
+    request = sftp._request
+
+    def tracking_request(t, *args):
+        if t == paramiko.sftp.CMD_CLOSE:
+            closed.append(args)
+        return request(t, *args)
+
+    sftp._request = tracking_request
+    batches = ops.iter_directory(str(big_dir), batch_size=100)
+    next(batches)
+    batches.close()
+    assert len(closed) == 1
+    # คำตอบของ READDIR ที่ค้างอยู่ต้องไม่ไปปนกับคำขอถัดไป
+    assert len(sftp.listdir(str(big_dir))) == 1235
+
+
+def test_iter_directory_missing_folder(sftp, tmp_path):
+    with pytest.raises(IOError):
+        list(FileOperations(sftp).iter_directory(str(tmp_path / "missing")))
+
+
+@pytest.fixture
+def controller(sftp):
+    connection = SSHConnection()
+    controller = FileController(connection)
+    controller.file_ops.set_sftp(sftp)
+    yield controller
+    connection.io.shutdown()
+
+
+def test_navigation_streams_then_caches(controller, big_dir):
+    batches = []
+    rows = controller.load_directory(controller.change_directory(str(big_dir)), batches.append)
+    assert len(batches) > 1
+    assert all_names(batches) == sorted(f.name for f in rows)
+    assert [f.name for f in rows[:2]] == ["sub", "f00000"]
+    files, fresh = controller.dir_cache.get(str(big_dir))
+    assert fresh and len(files) == 1235
+
+    # ครั้งต่อไปมาจาก cache ไม่ต้องสตรีม
+    batches.clear()
+    again = controller.load_directory(controller.change_directory(str(big_dir)), batches.append)
+    assert batches == [] and len(again) == 1235
+
+
+def test_navigation_away_stops_the_stream(controller, big_dir, tmp_path):
+    batches = []
+    newer = []
+
+    def on_batch(batch):
+        batches.append(batch)
+        newer.append(controller.change_directory(str(tmp_path)))
+
+    seq = controller.change_directory(str(big_dir))
+    assert controller.load_directory(seq, on_batch) is None
+    assert len(batches) == 1
+    assert controller.dir_cache.get(str(big_dir))[0] is None
+    assert controller.current_path == str(tmp_path)
+    rows = controller.load_directory(newer[0], batches.append)
+    assert [f.name for f in rows] == ["big"]
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from models.io_executor import IOExecutor
+from utils import tk_dispatch
+from utils.tk_dispatch import TkDispatcher
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, fn):
+        self.scheduled.append(fn)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for fn in scheduled:
+            fn()
+
+
+def test_commands_do_not_wait_behind_the_io_thread():
+    io = IOExecutor()
+    gate = threading.Event()
+    blocked = io.submit(gate.wait, 5)
+    # คำสั่ง terminal ที่รันนานต้องไม่ขวางการเปิดโฟลเดอร์ และกลับกัน
+    assert io.submit_command(lambda: "done").result(timeout=5) == "done"
+    assert not blocked.done()
+    gate.set()
+    assert blocked.result(timeout=5) is True
+    io.shutdown()
+
+
+def test_posts_run_in_order_and_one_failure_does_not_stop_the_rest(capsys):
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    dispatcher.start()
+    seen = []
+    dispatcher.post(seen.append, 1)
+    dispatcher.post(lambda: 1 / 0)
+    threading.Thread(target=dispatcher.post, args=(seen.append, 2)).start()
+    time.sleep(0.05)
+
+    root.run_pending()
+    assert seen == [1, 2]
+    assert "Error in UI callback" in capsys.readouterr().out
+    # ดึงคิวต่อเป็นรอบ ๆ จนกว่าจะ stop
+    assert len(root.scheduled) == 1
+    dispatcher.stop()
+    root.run_pending()
+    assert root.scheduled == []
+
+
+def test_long_drain_yields_back_to_tk(monkeypatch):
+    monkeypatch.setattr(tk_dispatch, "MAX_DRAIN_SECONDS", 0.01)
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    dispatcher.start()
+    seen = []
+    for i in range(5):
+        dispatcher.post(lambda i=i: (time.sleep(0.006), seen.append(i)))
+
+    root.run_pending()
+    assert 0 < len(seen) < 5
+    while len(seen) < 5:
+        root.run_pending()
+    assert seen == list(range(5))
+
+
+def test_cancelled_futures_are_not_delivered():
+    io = IOExecutor()
+    root = FakeRoot()
+    dispatcher = TkDispatcher(root)
+    dispatcher.start()
+    gate = threading.Event()
+    io.submit(gate.wait, 5)
+    results = []
+    queued = io.submit(lambda: "late")
+    dispatcher.deliver(queued, results.append, results.append)
+    queued.cancel()
+    gate.set()
+    io.submit(lambda: None).result(timeout=5)
+
+    root.run_pending()
+    assert results == []
+    io.shutdown()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from models.transfer_engine import RESUME_CHECK_SIZE, TransferEngine
+
+
+@pytest.fixture
+def engine():
+    return TransferEngine()
+
+
+def write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def resume(engine, tmp_path, source: bytes, partial: bytes):
+    src = write(tmp_path / "source", source)
+    dst = write(tmp_path / "partial", partial)
+    with open(src, "rb") as s, open(dst, "r+b") as d:
+        offset = engine._resume_offset(s, d, source_size=len(source))
+    return offset, os.path.getsize(dst)
+
+
+def test_resume_continues_after_matching_prefix(engine, tmp_path):
+    source = os.urandom(3 * RESUME_CHECK_SIZE)
+    assert resume(engine, tmp_path, source, source[:RESUME_CHECK_SIZE + 123]) == (RESUME_CHECK_SIZE + 123,) * 2
+
+
+def test_resume_with_prefix_shorter_than_check_block(engine, tmp_path):
+    source = os.urandom(RESUME_CHECK_SIZE)
+    assert resume(engine, tmp_path, source, source[:10]) == (10, 10)
+
+
+def test_empty_partial_starts_from_zero(engine, tmp_path):
+    assert resume(engine, tmp_path, b"data", b"") == (0, 0)
+
+
+def test_partial_longer_than_source_is_discarded(engine, tmp_path):
+    assert resume(engine, tmp_path, b"data", b"data and more") == (0, 0)
+
+
+def test_mismatched_tail_is_discarded(engine, tmp_path):
+    source = os.urandom(2 * RESUME_CHECK_SIZE)
+    partial = bytearray(source[:RESUME_CHECK_SIZE + 10])
+    partial[-1] ^= 0xff
+    assert resume(engine, tmp_path, source, bytes(partial)) == (0, 0)
+
+
+def test_change_before_check_block_is_not_detected(engine, tmp_path):
+    # ตรวจแค่บล็อกท้าย: ถ้าต้องการความมั่นใจเต็มต้องเปิด verify (sha256 ทั้งไฟล์)
+    source = os.urandom(3 * RESUME_CHECK_SIZE)
+    partial = bytearray(source[:2 * RESUME_CHECK_SIZE])
+    partial[0] ^= 0xff
+    assert resume(engine, tmp_path, source, bytes(partial))[0] == 2 * RESUME_CHECK_SIZE
+
+
+def test_preallocation_never_changes_file_size(engine, tmp_path, monkeypatch):
+    import models.transfer_engine as transfer_engine
+    monkeypatch.setattr(transfer_engine, "PREALLOCATE_MIN_SIZE", 1)
+    with open(write(tmp_path / "download", b"x" * 100), "r+b") as f:
+        engine._preallocate(f, 100, 8 << 20)
+        # ถูก kill ตรงนี้ ขนาดไฟล์ต้องยังเท่าข้อมูลที่รับมาจริง resume รอบหน้าจึงไม่หลงว่าครบแล้ว
+        assert os.fstat(f.fileno()).st_size == 100
@@ -0,0 +1,65 @@
+import os
+import stat
+
+import pytest
+
+from models.file_operations import FileOperations
+from models.transfer_engine import TransferEngine, TransferSettings
+
+
+def write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+@pytest.mark.parametrize("size", [0, 1, 32 * 1024 - 1, 32 * 1024, 1024 * 1024 + 7])
+def test_upload_and_download_round_trip(sftp, tmp_path, size):
+    data = os.urandom(size)
+    engine = TransferEngine(TransferSettings(chunk_size=32 * 1024, pipeline_depth=4))
+
+    stats = engine.upload(sftp, str(write(tmp_path / "src", data)), str(tmp_path / "remote"), mode=0o640)
+    assert (tmp_path / "remote").read_bytes() == data
+    assert stat.S_IMODE(os.stat(tmp_path / "remote").st_mode) == 0o640
+    assert stats.bytes_transferred == size
+
+    stats = engine.download(sftp, str(tmp_path / "remote"), str(tmp_path / "back"))
+    assert (tmp_path / "back").read_bytes() == data
+    assert stats.bytes_transferred == size
+
+
+@pytest.mark.parametrize("read_ahead", [True, False])
+def test_download_with_and_without_read_ahead(sftp, tmp_path, read_ahead):
+    data = os.urandom(300 * 1024)
+    engine = TransferEngine(TransferSettings(chunk_size=64 * 1024, read_ahead=read_ahead))
+    engine.download(sftp, str(write(tmp_path / "remote", data)), str(tmp_path / "local"))
+    assert (tmp_path / "local").read_bytes() == data
+
+
+def test_upload_keeps_at_most_pipeline_depth_writes_in_flight(sftp, tmp_path, monkeypatch):
+    engine = TransferEngine(TransferSettings(chunk_size=32 * 1024, pipeline_depth=3))
+    outstanding = []
+    drain = engine._drain_acks
+
+    def watch(handle, keep):
+        drain(handle, keep)
+        outstanding.append(len(handle._reqs))
+
+    monkeypatch.setattr(engine, "_drain_acks", watch)
+    engine.upload(sftp, str(write(tmp_path / "src", os.urandom(20 * 32 * 1024))), str(tmp_path / "dst"))
+    assert max(outstanding) <= 3
+    # ack ทุกตัวถูกรับครบก่อนปิดไฟล์
+    assert outstanding[-1] == 0
+
+
+def test_file_operations_transfer_through_the_engine(sftp, tmp_path):
+    data = os.urandom(200 * 1024)
+    ops = FileOperations(sftp)
+    ops.set_transfer_settings(TransferSettings(chunk_size=16 * 1024))
+    assert ops.upload_file(str(write(tmp_path / "src", data)), str(tmp_path / "remote"))[0]
+    assert ops.download_file(str(tmp_path / "remote"), str(tmp_path / "back"))[0]
+    assert (tmp_path / "back").read_bytes() == data
+    assert ops.last_transfer.bytes_transferred == len(data)
+
+    success, message = ops.upload_file(str(tmp_path / "missing"), str(tmp_path / "remote"))
+    assert not success and "missing" in message
@@ -0,0 +1,103 @@
+import time
+
+import models.transfer_progress as tp
+from models.transfer_progress import TransferProgress, combine_progress, format_eta, format_rate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_progress(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(tp.time, "monotonic", clock)
+    return TransferProgress(**kwargs), clock
+
+
+def test_format_eta():
+    assert format_eta(None) == "--:--"
+    assert format_eta(0) == "00:00"
+    assert format_eta(59.9) == "00:59"
+    assert format_eta(61) == "01:01"
+    assert format_eta(3600) == "1:00:00"
+    assert format_eta(3 * 3600 + 62) == "3:01:02"
+
+
+def test_format_rate():
+    assert format_rate(0) == "0.00 B/s"
+    assert format_rate(1536) == "1.50 KB/s"
+    assert format_rate(3 * 1024 ** 3) == "3.00 GB/s"
+
+
+def test_rate_and_eta(monkeypatch):
+    progress, clock = make_progress(monkeypatch, total_bytes=1000)
+    assert progress.eta is None
+    clock.now += 1.0
+    progress.update(100)
+    assert progress.instant_rate == 100
+    assert progress.smoothed_rate == 100
+    assert progress.eta == 9.0
+    assert progress.get_eta_str() == "00:09"
+    clock.now += 1.0
+    progress.update(400)
+    # EWMA: 100 + 0.2 * (300 - 100)
+    assert progress.smoothed_rate == 140
+
+
+def test_samples_closer_than_interval_are_merged(monkeypatch):
+    progress, clock = make_progress(monkeypatch, total_bytes=1000)
+    clock.now += 0.01
+    progress.update(500)
+    assert progress.instant_rate == 0
+    clock.now += 0.05
+    progress.update(600)
+    assert round(progress.instant_rate) == 10000
+
+
+def test_going_backwards_restarts_sampling(monkeypatch):
+    progress, clock = make_progress(monkeypatch, total_bytes=1000)
+    clock.now += 1.0
+    progress.update(800)
+    clock.now += 1.0
+    progress.update(100)
+    assert progress.bytes_done == 100
+    # เปลี่ยนวิธีส่งกลางทาง (delta → ทั้งไฟล์): ความเร็วนับใหม่จากจุดนี้ ไม่ติดลบ
+    clock.now += 1.0
+    progress.update(300)
+    assert progress.instant_rate == 200
+
+
+def test_callback_is_rate_limited_but_finish_always_reports(monkeypatch):
+    calls = []
+    progress, clock = make_progress(monkeypatch, total_bytes=10, callback=calls.append, interval=1.0)
+    clock.now += 1.0
+    progress.update(1)
+    progress.update(2)
+    progress.update(3)
+    assert len(calls) == 1
+    progress.finish({"transfer": 1.5})
+    assert len(calls) == 2
+    assert progress.eta == 0.0
+    assert progress.phases == {"transfer": 1.5}
+
+
+def test_fraction():
+    assert TransferProgress(0).fraction == 0.0
+    progress = TransferProgress(200)
+    progress.update(50)
+    assert progress.fraction == 0.25
+    progress.update(300)
+    assert progress.fraction == 1.0
+
+
+def test_combine_skips_finished_rates():
+    a, b = TransferProgress(100), TransferProgress(100)
+    a.bytes_done, a.smoothed_rate = 50, 10.0
+    b.bytes_done, b.smoothed_rate = 100, 99.0
+    b.finished = True
+    combined = combine_progress([a, b])
+    assert (combined.total_bytes, combined.bytes_done, combined.smoothed_rate) == (200, 150, 10.0)
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import paramiko
+import pytest
+
+from models.transfer_engine import COMPRESSION_OFF, TransferSettings
+from models.transfer_queue import TransferJob, TransferQueue
+
+
+class FakeSFTP:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """SFTP session ที่ worker เปิด (ไม่มี transport จริง)"""
+    sessions = []
+
+    def from_transport(transport):
+        sessions.append(FakeSFTP())
+        return sessions[-1]
+
+    monkeypatch.setattr(paramiko.SFTPClient, "from_transport", staticmethod(from_transport))
+    return sessions
+
+
+def make_queue(workers: int = 1) -> TransferQueue:
+    return TransferQueue(None, workers=workers, settings=TransferSettings(compression=COMPRESSION_OFF))
+
+
+def wait_for(jobs, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not all(j.is_finished() for j in jobs):
+        assert time.monotonic() < deadline, [j.state for j in jobs]
+        time.sleep(0.005)
+
+
+def test_worker_reopens_sftp_after_a_failed_job(opened, monkeypatch):
+    used = []
+
+    def run_job(self, engine, sftp, job):
+        used.append(sftp)
+        if len(used) == 1:
+            raise EOFError("channel closed")
+        self._finish(job, TransferJob.DONE)
+
+    monkeypatch.setattr(TransferQueue, "_run_job", run_job)
+    queue = make_queue()
+    jobs = [queue.submit_download(f"/r/{n}", f"/l/{n}", size=10) for n in range(3)]
+    wait_for(jobs)
+    queue.stop()
+
+    assert [j.state for j in jobs] == [TransferJob.FAILED, TransferJob.DONE, TransferJob.DONE]
+    assert jobs[0].error == "channel closed"
+    # session ที่พังถูกปิดทิ้ง งานถัดไปได้ session ใหม่ที่ใช้ต่อกันได้
+    assert opened[0].closed
+    assert used == [opened[0], opened[1], opened[1]]
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+from models.transfer_queue import TransferJob, TransferQueue
+
+# ใหญ่พอให้แต่ละไฟล์เป็นงานเดี่ยวของ worker (ไม่ถูกรวมเป็นก้อนเดียว)
+FILE_SIZE = 300 * 1024
+
+
+def wait_for(jobs, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not all(j.is_finished() for j in jobs):
+        assert time.monotonic() < deadline, [j.state for j in jobs]
+        time.sleep(0.01)
+
+
+def make_files(directory, count, size=FILE_SIZE):
+    directory.mkdir()
+    for n in range(count):
+        (directory / f"f{n}").write_bytes(os.urandom(size))
+    return [directory / f"f{n}" for n in range(count)]
+
+
+def test_workers_transfer_in_parallel_on_their_own_sessions(sshd, tmp_path):
+    sources = make_files(tmp_path / "src", 6)
+    (tmp_path / "dst").mkdir()
+    queue = TransferQueue(sshd.transport, workers=3)
+    # ทั้งสาม worker ต้องเริ่มงานพร้อมกันได้ ไม่งั้น barrier หมดเวลา
+    barrier = threading.Barrier(3, timeout=10)
+    started = []
+
+    def on_update(job):
+        if job.state == TransferJob.RUNNING and len(started) < 3:
+            started.append(threading.get_ident())
+            barrier.wait()
+
+    queue.on_job_update = on_update
+    jobs = [queue.submit_upload(str(p), str(tmp_path / "dst" / p.name)) for p in sources]
+    wait_for(jobs)
+
+    assert [j.state for j in jobs] == [TransferJob.DONE] * 6
+    assert len(set(started)) == 3
+    for p in sources:
+        assert (tmp_path / "dst" / p.name).read_bytes() == p.read_bytes()
+    assert queue.get_throughput().bytes_transferred == 6 * FILE_SIZE
+
+    downloads = [queue.submit_download(str(tmp_path / "dst" / p.name), str(tmp_path / f"back-{p.name}"))
+                 for p in sources]
+    wait_for(downloads)
+    queue.stop()
+    for p in sources:
+        assert (tmp_path / f"back-{p.name}").read_bytes() == p.read_bytes()
+
+
+def test_cancel_queued_and_running_jobs(sshd, tmp_path):
+    sources = make_files(tmp_path / "src", 3, size=4 * 1024 * 1024)
+    (tmp_path / "dst").mkdir()
+    queue = TransferQueue(sshd.transport, workers=1)
+    jobs = []
+    submitted = threading.Event()
+
+    def on_update(job):
+        # งานแรกเริ่มแล้ว: ยกเลิกงานที่สองที่ยังรอคิว และงานแรกที่กำลังวิ่ง
+        if job.state == TransferJob.RUNNING and submitted.wait(10) and job is jobs[0]:
+            queue.cancel(jobs[1].job_id)
+            queue.cancel(jobs[0].job_id)
+
+    queue.on_job_update = on_update
+    jobs.extend(queue.submit_upload(str(p), str(tmp_path / "dst" / p.name)) for p in sources)
+    submitted.set()
+    wait_for(jobs)
+    queue.stop()
+
+    assert [j.state for j in jobs] == [TransferJob.CANCELLED, TransferJob.CANCELLED, TransferJob.DONE]
+    assert not (tmp_path / "dst" / "f1").exists()
+    assert (tmp_path / "dst" / "f2").read_bytes() == sources[2].read_bytes()
+
+
+def test_a_failed_job_does_not_stop_the_others(sshd, tmp_path):
+    sources = make_files(tmp_path / "src", 2)
+    (tmp_path / "dst").mkdir()
+    queue = TransferQueue(sshd.transport, workers=1)
+    jobs = [queue.submit_upload(str(sources[0]), str(tmp_path / "missing-dir" / "f0")),
+            queue.submit_upload(str(sources[1]), str(tmp_path / "dst" / "f1"))]
+    wait_for(jobs)
+    queue.stop()
+
+    assert [j.state for j in jobs] == [TransferJob.FAILED, TransferJob.DONE]
+    assert jobs[0].error
+    assert (tmp_path / "dst" / "f1").read_bytes() == sources[1].read_bytes()
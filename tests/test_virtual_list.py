@@ -0,0 +1,169 @@
+from types import SimpleNamespace
+
+import customtkinter as ctk
+import pytest
+
+from views import virtual_list
+from views.virtual_list import ROW_HEIGHT, VirtualList
+
+
+class FakeCanvas:
+    """canvas ปลอม: เก็บพิกัด/ข้อความของ item ไว้ให้ตรวจ (เครื่องเทสต์ไม่มี display)"""
+
+    def __init__(self, *args, **kwargs):
+        self.items = {}
+        self.height = 10 * ROW_HEIGHT
+        self.width = 400
+
+    def _create(self, kind, **options):
+        item = len(self.items) + 1
+        self.items[item] = dict(options, kind=kind)
+        return item
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rect", **options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", **options)
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = coords
+
+    def itemconfigure(self, item, **options):
+        self.items[item].update(options)
+
+    def winfo_height(self):
+        return self.height
+
+    def winfo_width(self):
+        return self.width
+
+    def pack(self, **kwargs):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+
+class FakeFont:
+    def measure(self, text):
+        return 7 * len(text)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(ctk.CTkFrame, "__init__", lambda self, master, **kwargs: None)
+    monkeypatch.setattr(ctk, "CTkFont", FakeFont)
+    monkeypatch.setattr(ctk, "CTkScrollbar", lambda *args, **kwargs: SimpleNamespace(
+        pack=lambda **kw: None, set=lambda first, last: None))
+    monkeypatch.setattr(virtual_list.tk, "Canvas", FakeCanvas)
+    monkeypatch.setattr(VirtualList, "_apply_colors",
+                        lambda self: setattr(self, "_text_color", "") or setattr(self, "_select_color", ""))
+    table = VirtualList(None, columns=[(0, "w"), (100, "e")])
+    table.after_idle = lambda fn: "job"
+    return table
+
+
+def visible_texts(table):
+    rows = []
+    for rect, texts in table._pool:
+        items = [table.canvas.items[text] for text in texts]
+        if items[0]["state"] == "normal":
+            rows.append(tuple(item["text"] for item in items))
+    return rows
+
+
+def load(table, count):
+    rendered = []
+
+    def render_row(item):
+        rendered.append(item)
+        return (f"file{item}", str(item))
+
+    table.set_items(range(count), render_row)
+    table._render()
+    return rendered
+
+
+def test_draws_only_the_visible_rows(table):
+    rendered = load(table, 100_000)
+    # 10 แถวที่เห็น + 1 แถวที่โผล่มาครึ่งเดียว
+    assert len(table._pool) == 11
+    assert rendered == list(range(11))
+    assert len(table.canvas.items) == 11 * 3
+    assert visible_texts(table)[0] == ("file0", "0")
+
+
+def test_scrolling_recycles_the_pool(table):
+    load(table, 1000)
+    items = dict(table.canvas.items)
+    table._scroll(50)
+    assert table.canvas.items.keys() == items.keys()
+    assert [row[1] for row in visible_texts(table)] == [str(i) for i in range(50, 61)]
+
+    table._scroll(5000)
+    assert table._top == 990
+    table._scroll(-5000)
+    assert table._top == 0
+
+
+def test_short_list_hides_unused_slots(table):
+    load(table, 3)
+    assert visible_texts(table) == [("file0", "0"), ("file1", "1"), ("file2", "2")]
+
+    table.clear()
+    table._render()
+    assert visible_texts(table) == []
+
+
+def test_events_map_y_to_the_row_under_the_pointer(table):
+    load(table, 1000)
+    table._scroll(20)
+    selected = []
+    table.on_select = selected.append
+    table._on_click(SimpleNamespace(y=3 * ROW_HEIGHT + 5))
+    assert selected == [23]
+    rect = table._pool[3][0]
+    assert table.canvas.items[rect]["state"] == "normal"
+    assert table._index_at(ROW_HEIGHT * 2000) is None
+
+
+def test_scrollbar_moveto_and_pages(table):
+    load(table, 1000)
+    table._on_scrollbar("moveto", "0.5")
+    table._render()
+    assert table._top == 500
+    table._on_scrollbar("scroll", "1", "pages")
+    assert table._top == 509
+
+
+def test_long_text_is_cut_to_the_column(table):
+    assert table._fit("short", 100) == "short"
+    fitted = table._fit("a" * 50, 100)
+    assert fitted.endswith("…") and FakeFont().measure(fitted) <= 100
+
+
+def test_selection_follows_the_item_across_updates(table):
+    items = [f"n{i}" for i in range(10)]
+    table.item_key = lambda item: item
+    table.set_items(items, lambda item: (item, ""))
+    table._on_click(SimpleNamespace(y=4 * ROW_HEIGHT))
+    assert table._selected == 4
+
+    # แทรกรายการด้านบน แถวที่เลือกต้องตามไปด้วย
+    items.insert(0, "new")
+    table.refresh()
+    assert table._selected == 5
+
+    # รายการชุดใหม่ (คนละ object) จับคู่ด้วย key
+    table.set_items(items[::-1], lambda item: (item, ""), keep_position=True)
+    assert table._items[table._selected] == "n4"
+
+    # แถวที่เลือกถูกลบไปแล้ว
+    table.set_items([item for item in items if item != "n4"], lambda item: (item, ""), keep_position=True)
+    assert table._selected is None
+    table.set_items(items, lambda item: (item, ""), keep_position=True)
+    assert table._selected is None